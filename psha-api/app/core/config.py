@@ -26,6 +26,16 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = env_mode
     DEBUG: bool = True
 
+    # Pool koneksi DB (per proses worker web)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0           # detik menunggu koneksi bebas dari pool
+    DB_POOL_RECYCLE: int = 1800             # detik; koneksi lebih tua diganti (proxy/PG idle timeout)
+    DB_STATEMENT_TIMEOUT_MS: int = 120000   # 0 -> tanpa batas (Postgres)
+    DB_CONNECT_TIMEOUT: int = 10            # detik per percobaan koneksi
+    DB_CONNECT_RETRIES: int = 8             # percobaan saat startup (backoff eksponensial)
+    DB_CONNECT_MAX_DELAY: float = 30.0
+
     # OAuth Google
     GOOGLE_CLIENT_ID: str
     GOOGLE_CLIENT_SECRET: str
@@ -0,0 +1,10 @@
+# app/core/imports.py
+import threading
+
+# Satu lock untuk semua import modul ilmiah berat (OpenQuake, SciPy) yang ditunda.
+# Warm-up (thread background) dan request pertama bisa meng-import paket yang sama
+# bersamaan; tanpa lock, thread kedua bisa melihat modul yang baru setengah
+# ter-inisialisasi -> ImportError "partially initialized module (circular import)".
+# RLock: import di bawah lock boleh memanggil fungsi lain yang ikut mengambilnya.
+# Urutan lock: gmpe_registry._lock -> IMPORT_LOCK, tidak pernah sebaliknya.
+IMPORT_LOCK = threading.RLock()
@@ -0,0 +1,139 @@
+# app/core/warmup.py
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from app.core.imports import IMPORT_LOCK
+
+logger = logging.getLogger(__name__)
+
+# tahap yang gagal dicoba ulang dengan backoff (detik, dobel tiap percobaan)
+WARMUP_RETRIES = int(os.environ.get("WARMUP_RETRIES", 5))
+WARMUP_RETRY_DELAY = float(os.environ.get("WARMUP_RETRY_DELAY", 2.0))
+# modul yang wajib termuat penuh supaya tahap "openquake" dianggap siap
+OPENQUAKE_MODULES = (
+    "scipy.special",
+    "scipy.spatial",
+    "openquake.hazardlib.contexts",
+    "openquake.hazardlib.imt",
+    "openquake.hazardlib.site",
+)
+
+# status per tahap warm-up; readiness = semua True
+_status: Dict[str, bool] = {"database": False, "openquake": False, "compute_pool": False}
+_errors: Dict[str, str] = {}
+_lock = threading.Lock()
+
+
+def _mark(stage: str, ok: bool, error: str = None) -> None:
+    with _lock:
+        _status[stage] = ok
+        if error:
+            _errors[stage] = error
+        else:
+            _errors.pop(stage, None)
+
+
+def warmup_database(engine) -> None:
+    """Tunggu DB siap (backoff) lalu create_all, di luar jalur startup."""
+    from app.database import init_db
+
+    init_db(engine)
+    logger.info("✅ Database connected")
+
+
+def warmup_openquake() -> None:
+    """
+    Import modul ilmiah berat (OpenQuake, SciPy) dan muat registry GMPE,
+    supaya request pertama tidak menanggung biaya import. Import di bawah
+    IMPORT_LOCK yang sama dengan import lazy di jalur request.
+    """
+    from app.services.gmpe_registry import get_registry
+
+    with IMPORT_LOCK:
+        for name in OPENQUAKE_MODULES:
+            importlib.import_module(name)
+
+    get_registry()
+    logger.info("✅ OpenQuake warm")
+
+
+def warmup_compute_pool() -> None:
+    """Start proses worker multi-site sekarang (initializer-nya import OpenQuake)."""
+    from app.services.compute_pool import prewarm_pool
+
+    prewarm_pool()
+
+
+def resume_jobs() -> None:
+    """Jadwalkan ulang job queued + job running yang lease-nya kedaluwarsa (proses mati)."""
+    from app.services.job_service import resume_jobs as _resume
+
+    _resume()
+
+
+def _run_stage(stage: str, fn: Callable[[], None]) -> bool:
+    """Jalankan satu tahap; gagal -> coba ulang WARMUP_RETRIES kali dengan backoff."""
+    delay = WARMUP_RETRY_DELAY
+    for attempt in range(WARMUP_RETRIES + 1):
+        try:
+            fn()
+            _mark(stage, True)
+            return True
+        except Exception as e:
+            logger.error(f"[WARMUP ERROR] {stage} (percobaan {attempt + 1}): {e}", exc_info=True)
+            _mark(stage, False, str(e))
+        if attempt < WARMUP_RETRIES:
+            time.sleep(delay)
+            delay = min(delay * 2, 60.0)
+    return False
+
+
+def run_warmup(engine) -> None:
+    for stage, fn in (
+        ("database", lambda: warmup_database(engine)),
+        ("openquake", warmup_openquake),
+        ("compute_pool", warmup_compute_pool),
+    ):
+        _run_stage(stage, fn)
+
+    # job dilanjutkan setelah DB + OpenQuake siap
+    if _status["database"]:
+        try:
+            resume_jobs()
+        except Exception as e:
+            logger.error(f"[WARMUP ERROR] jobs: {e}", exc_info=True)
+
+
+def start_warmup(engine) -> threading.Thread:
+    """Jalankan warm-up di background thread; app langsung bisa jawab /health."""
+    thread = threading.Thread(target=run_warmup, args=(engine,), name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _openquake_loaded() -> bool:
+    """Semua modul OPENQUAKE_MODULES sudah termuat penuh (mis. lewat request)."""
+    for name in OPENQUAKE_MODULES:
+        module = sys.modules.get(name)
+        spec = getattr(module, "__spec__", None)
+        if module is None or getattr(spec, "_initializing", False):
+            return False
+    return True
+
+
+def readiness() -> Dict[str, Any]:
+    # tahap openquake yang gagal dicek ulang: kalau modulnya kini termuat
+    # (retry warm-up / request yang berhasil), status tidak tertahan di False
+    if not _status["openquake"] and "openquake" in _errors and _openquake_loaded():
+        _mark("openquake", True)
+    with _lock:
+        return {
+            "ready": all(_status.values()),
+            "checks": dict(_status),
+            "errors": dict(_errors),
+        }
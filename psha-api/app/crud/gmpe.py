@@ -1,8 +1,13 @@
 from sqlalchemy.orm import Session
-from app.models.gmpe import GmpeModel, GmpeCoefficient
+from app.models.gmpe import GMPEModel, GMPECoefficient
 
 def get_all_gmpe(db: Session):
-    return db.query(GmpeModel).all()
+    return db.query(GMPEModel).all()
 
 def get_coeff_by_gmpe(db: Session, gmpe_id: int):
-    return db.query(GmpeCoefficient).filter(GmpeCoefficient.gmpe_id == gmpe_id).all()
+    return (
+        db.query(GMPECoefficient)
+        .filter(GMPECoefficient.gmpe_id == gmpe_id)
+        .order_by(GMPECoefficient.period)
+        .all()
+    )
@@ -1,12 +1,74 @@
-from sqlalchemy import create_engine
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 from app.models.base import Base
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+logger = logging.getLogger(__name__)
+
+
+def create_db_engine(url: Optional[str] = None, **overrides: Any) -> Engine:
+    """
+    Satu-satunya tempat engine dibuat: pool (size / overflow / recycle),
+    pool_pre_ping supaya koneksi mati (restart / idle proxy) diganti diam-diam,
+    dan statement_timeout di Postgres supaya query macet tidak menahan koneksi.
+    """
+    url = url or settings.DATABASE_URL
+    kwargs: Dict[str, Any] = {"pool_pre_ping": True}
+    if url.startswith("sqlite"):
+        kwargs["connect_args"] = {"check_same_thread": False}
+    else:
+        connect_args: Dict[str, Any] = {"connect_timeout": settings.DB_CONNECT_TIMEOUT}
+        if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+            connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+        kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            connect_args=connect_args,
+        )
+    kwargs.update(overrides)
+    return create_engine(url, **kwargs)
+
+
+def wait_for_db(
+    engine: Engine,
+    retries: Optional[int] = None,
+    base_delay: float = 0.5,
+    max_delay: Optional[float] = None,
+) -> None:
+    """
+    Tunggu DB bisa dihubungi (mis. Postgres Railway yang masih cold start)
+    dengan backoff eksponensial + jitter; error terakhir di-raise kalau gagal.
+    """
+    retries = settings.DB_CONNECT_RETRIES if retries is None else retries
+    max_delay = settings.DB_CONNECT_MAX_DELAY if max_delay is None else max_delay
+    for attempt in range(1, retries + 1):
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return
+        except OperationalError as e:
+            if attempt == retries:
+                raise RuntimeError(f"❌ Could not connect to database after {retries} attempts") from e
+            delay = min(max_delay, base_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+            logger.warning(f"⚠️ DB not ready, retry {attempt}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def init_db(engine: Engine) -> None:
+    wait_for_db(engine)
+    Base.metadata.create_all(bind=engine)
+
+
+engine = create_db_engine()
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -1,38 +1,32 @@
 from app.middleware.https_redirect import ProxyHTTPSRedirectMiddleware
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from starlette.middleware.sessions import SessionMiddleware
-import numpy as np
-import time
-from sqlalchemy import create_engine
-from sqlalchemy.exc import OperationalError
 from urllib.parse import urlparse
-from app.routers import gmpe, datasource, analysis, hazard, mechanism, meta, auth, projects
-from app.database import Base
+from app.routers import gmpe, datasource, analysis, hazard, jobs, mechanism, meta, auth, projects, results, sites
 from app.core.config import settings
+from app.core.warmup import start_warmup, readiness
+from app.database import engine
+from app.services.compute_pool import shutdown_pool
+from app.services.job_service import shutdown_executor
 
 
-# ======= Setup DB dengan retry =======
-DATABASE_URL = settings.DATABASE_URL
-max_retries = 10
+# ======= Lifespan =======
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # koneksi DB (backoff) + create_all jalan di warm-up background:
+    # startup tidak menunggu Postgres yang masih cold start, /ready = 503 sampai siap
+    start_warmup(engine)
+    yield
+    shutdown_executor()
+    shutdown_pool()
+    engine.dispose()
 
-for i in range(max_retries):
-    try:
-        engine = create_engine(DATABASE_URL)
-        conn = engine.connect()
-        conn.close()
-        print("✅ Database connected")
-        break
-    except OperationalError:
-        print(f"⚠️ DB not ready, retry {i+1}/{max_retries}")
-        time.sleep(5)
-else:
-    raise RuntimeError("❌ Could not connect to database after several retries")
-
-Base.metadata.create_all(bind=engine)
 
 # ======= FastAPI app =======
-app = FastAPI(title="PSHA API", version="1.0.0")
+app = FastAPI(title="PSHA API", version="1.0.0", lifespan=lifespan)
 
 # 🔒 Enforce HTTPS via X-Forwarded-Proto (portable)
 # app.add_middleware(ProxyHTTPSRedirectMiddleware)
@@ -62,6 +56,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Sites"],
 )
 
 # ======= Routers =======
@@ -69,10 +64,13 @@ app.include_router(datasource.router, prefix="/api/v1", tags=["datasource"])
 app.include_router(gmpe.router, prefix="/api/v1", tags=["gmpe"])
 app.include_router(analysis.router, prefix="/api/v1", tags=["analysis"])
 app.include_router(hazard.router, prefix="/api/v1", tags=["hazard"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
 app.include_router(mechanism.router, prefix="/api/v1", tags=["mechanism"])
 app.include_router(meta.router, prefix="/api/v1", tags=["meta"])
 app.include_router(auth.router, prefix="/api/v1", tags=["auth"])
 app.include_router(projects.router, prefix="/api/v1", tags=["projects"])
+app.include_router(results.router, prefix="/api/v1", tags=["results"])
+app.include_router(sites.router, prefix="/api/v1", tags=["sites"])
 
 @app.get("/")
 def read_root():
@@ -80,19 +78,11 @@ def read_root():
 
 @app.get("/health")
 def health_check():
+    """Liveness: proses hidup, tidak menunggu DB/OpenQuake."""
     return {"status": "ok"}
 
-@app.get("/run-psha")
-def run_psha(lat: float, lon: float, rp: int = 475):
-    periods = [0.1, 0.2, 0.5, 1.0, 2.0]
-    values = list(np.exp(-np.array(periods) / (rp/500)))
-
-    return {
-        "lat": lat,
-        "lon": lon,
-        "return_period": rp,
-        "hazardCurve": {"periods": periods, "values": values},
-        "resultTable": [
-            {"period": p, "iml": round(v, 3)} for p, v in zip(periods, values)
-        ],
-    }
+@app.get("/ready")
+def ready_check():
+    """Readiness: 200 hanya setelah warm-up (DB + OpenQuake) selesai."""
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
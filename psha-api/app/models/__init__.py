@@ -1,17 +1,20 @@
 from app.models.user import User
 from app.models.project import Project
-from app.models.datasource import DataSource, DataSourceGMPE
+from app.models.datasource import DataSource, DataSourceGMPE, DataSourceMFD
 from app.models.siteparameter import SiteParameter
 from app.models.gmpe import GMPEModel, GMPECoefficient
 from app.models.result import Result
+from app.models.job import AnalysisJob
 
 __all__ = [
     "User",
     "Project",
     "DataSource",
     "DataSourceGMPE",
+    "DataSourceMFD",
     "SiteParameter",
     "GMPEModel",
     "GMPECoefficient",
     "Result",
+    "AnalysisJob",
 ]
@@ -1,10 +1,12 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, JSON, DateTime, Index, UniqueConstraint, func
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 
 
 class DataSource(Base):
     __tablename__ = "datasources"
+    # listing per project (+ mechanism) urut id (keyset pagination)
+    __table_args__ = (Index("ix_datasources_project_mechanism_id", "project_id", "mechanism", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -23,6 +25,12 @@ class DataSource(Base):
     gr_rate = Column(Float, nullable=True)
     gr_weight = Column(Float, nullable=True)
 
+    # magnitude-frequency distribution: "truncated_gr" (default) / "characteristic"
+    mfd_type = Column(String, nullable=True, default="truncated_gr")
+    mfd_bin_width = Column(Float, nullable=True)   # kosong -> default engine (0.1)
+    char_mag = Column(Float, nullable=True)        # characteristic (Youngs & Coppersmith 1985)
+    char_rate = Column(Float, nullable=True)       # laju tahunan kotak karakteristik
+
     # fault geometry
     dip_angle = Column(Float, nullable=True)
     strike_angle = Column(Float, nullable=True)
@@ -32,15 +40,35 @@ class DataSource(Base):
     project = relationship("Project", back_populates="datasources")
 
     gmpe_weights = relationship("DataSourceGMPE", back_populates="datasource", cascade="all, delete-orphan")
+    mfd_tables = relationship("DataSourceMFD", back_populates="datasource", cascade="all, delete-orphan")
 
 
 class DataSourceGMPE(Base):
     __tablename__ = "datasource_gmpe"
 
     id = Column(Integer, primary_key=True, index=True)
-    datasource_id = Column(Integer, ForeignKey("datasources.id", ondelete="CASCADE"))
+    datasource_id = Column(Integer, ForeignKey("datasources.id", ondelete="CASCADE"), index=True)
 
     gmpe_name = Column(String, nullable=False)  # langsung nama GMPE
     weight = Column(Float, nullable=False)
 
     datasource = relationship("DataSource", back_populates="gmpe_weights")
+
+
+class DataSourceMFD(Base):
+    """Tabel MFD (bin magnitudo + laju tahunan) hasil hitung, di-cache per datasource."""
+    __tablename__ = "datasource_mfd"
+    __table_args__ = (UniqueConstraint("datasource_id", "bin_width", name="uq_datasource_mfd_bin"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    datasource_id = Column(Integer, ForeignKey("datasources.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    version = Column(Integer, nullable=False)      # versi algoritma MFD
+    params_hash = Column(String, nullable=False)   # hash parameter MFD datasource saat dihitung
+    bin_width = Column(Float, nullable=False)
+    mags = Column(JSON, nullable=False)            # titik tengah bin
+    rates = Column(JSON, nullable=False)           # laju tahunan per bin
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    datasource = relationship("DataSource", back_populates="mfd_tables")
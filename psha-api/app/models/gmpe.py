@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index, func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from app.models.base import Base  # import Base dari base.py
@@ -7,10 +7,11 @@ class GMPEModel(Base):
     __tablename__ = "gmpe_models"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
     year = Column(Integer, default=0)
     region = Column(String, default="Global")
     site_type = Column(String, default="Unknown")   # NEW
+    functional_form = Column(String, nullable=True)  # bentuk fungsi evaluator native (gmpe_native)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     coeffs = relationship("GMPECoefficient", back_populates="gmpe", cascade="all, delete-orphan")
@@ -18,6 +19,7 @@ class GMPEModel(Base):
 
 class GMPECoefficient(Base):
     __tablename__ = "gmpe_coeffs"
+    __table_args__ = (Index("ix_gmpe_coeffs_gmpe_period", "gmpe_id", "period"),)
 
     id = Column(Integer, primary_key=True, index=True)
     gmpe_id = Column(Integer, ForeignKey("gmpe_models.id", ondelete="CASCADE"))
@@ -0,0 +1,36 @@
+from sqlalchemy import Boolean, Column, Integer, String, Float, ForeignKey, JSON, DateTime, func, true as sa_true
+from sqlalchemy.orm import relationship
+from app.models.base import Base
+
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # "single" (HazardRequest) / "multi" (MultiSiteRequest)
+    mode = Column(String, nullable=False)
+    params = Column(JSON, nullable=False)
+    # False -> selalu hitung ulang walau input identik sudah ada di results
+    use_cache = Column(Boolean, nullable=False, default=True, server_default=sa_true())
+
+    # queued -> running -> done / failed
+    status = Column(String, nullable=False, default="queued", index=True)
+    progress = Column(Float, nullable=False, default=0.0)  # 0..1
+    error = Column(String, nullable=True)
+
+    # lease: proses yang sedang menghitung + heartbeat terakhirnya; lease kedaluwarsa
+    # (proses mati) -> job dikembalikan ke antrean oleh proses lain
+    worker_id = Column(String(64), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+
+    # hasil akhir disimpan di tabel results
+    result_id = Column(Integer, ForeignKey("results.id", ondelete="SET NULL"), nullable=True)
+
+    project = relationship("Project")
+    result = relationship("Result")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, ForeignKey, JSON, DateTime, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import DDL, Column, Integer, String, ForeignKey, JSON, DateTime, LargeBinary, event, func
+from sqlalchemy.orm import relationship, deferred
 from app.models.base import Base
 
 class Result(Base):
@@ -8,9 +8,28 @@ class Result(Base):
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
 
-    # hasil analisis disimpan JSON (hazard curve, UHS, deagg, dll)
+    # hasil analisis disimpan JSON (hazard curve, UHS, deagg, dll);
+    # untuk format "npz" kolom ini hanya index kecil (metadata + daftar potongan)
     output = Column(JSON, nullable=False)
 
+    # "json" -> semua di output; "npz" -> array di data (dibaca lazy per member)
+    format = Column(String, nullable=False, default="json", server_default="json")
+    # deferred: tidak ikut ter-load saat query Result / project.results
+    data = deferred(Column(LargeBinary, nullable=True))
+
+    # hash semua input analisis (lihat result_cache); request identik -> result dipakai ulang
+    cache_key = Column(String(32), nullable=True, index=True)
+
     project = relationship("Project", back_populates="results")
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# PostgreSQL: blob npz sudah terkompresi (deflate) -> simpan TOAST tanpa kompresi
+# (EXTERNAL), supaya substr() hanya membaca chunk yang diminta, bukan
+# mendekompresi seluruh nilai. Sama dengan migrasi 5d2a7c9e4f13 untuk create_all.
+event.listen(
+    Result.__table__,
+    "after_create",
+    DDL("ALTER TABLE results ALTER COLUMN data SET STORAGE EXTERNAL").execute_if(dialect="postgresql"),
+)
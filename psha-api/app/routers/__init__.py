@@ -3,9 +3,12 @@ from .analysis import router as analysis_router
 from .datasource import router as datasource_router
 from .gmpe import router as gmpe_router
 from .hazard import router as hazard_router
+from .jobs import router as jobs_router
 from .mechanism import router as mechanism_router
 from .meta import router as meta_router
 from .projects import router as projects_router
+from .results import router as results_router
+from .sites import router as sites_router
 
 __all__ = [
     "auth_router",
@@ -13,7 +16,10 @@ __all__ = [
     "datasource_router",
     "gmpe_router",
     "hazard_router",
+    "jobs_router",
     "mechanism_router",
     "meta_router",
     "projects_router",
+    "results_router",
+    "sites_router",
 ]
@@ -1,15 +1,114 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas.analysis import HazardRequest, HazardResult, HazardResultPoint
+import json
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.schemas.analysis import (
+    HazardRequest,
+    HazardResult,
+    HazardResultPoint,
+    MultiSiteRequest,
+    HazardGridResult,
+    LogicTreeRequest,
+    LogicTreeResult,
+    UHSRequest,
+    UHSResult,
+)
+from app.services.analysis_service import (
+    run_psha_analysis,
+    run_multi_site,
+    prepare_multi_site,
+    iter_multi_site,
+    run_uhs,
+)
+from app.services.logic_tree_service import run_logic_tree
 
 router = APIRouter(prefix="/analysis", tags=["Analysis"])
 
 
 @router.post("/", response_model=HazardResult)
-def run_analysis(req: HazardRequest):
+def run_analysis(req: HazardRequest, db: Session = Depends(get_db)):
     """
     Jalankan analisis probabilistic seismic hazard (PSHA).
     """
     if not req.datasource_ids:
         raise HTTPException(status_code=400, detail="Minimal 1 datasource harus dipilih")
 
-    return run_psha_analysis(req)  # ✅ delegasi ke service
\ No newline at end of file
+    try:
+        return run_psha_analysis(req, db)  # ✅ delegasi ke service
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/uhs", response_model=UHSResult)
+def run_analysis_uhs(req: UHSRequest, db: Session = Depends(get_db)):
+    """
+    Uniform Hazard Spectrum: IML pada return period untuk tiap periode (PGA,
+    SA(0.2), SA(1.0), ...), semua periode dihitung dalam satu pass GMPE.
+    """
+    if not req.datasource_ids:
+        raise HTTPException(status_code=400, detail="Minimal 1 datasource harus dipilih")
+
+    try:
+        return run_uhs(req, db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/logic-tree", response_model=LogicTreeResult)
+def run_analysis_logic_tree(req: LogicTreeRequest, db: Session = Depends(get_db)):
+    """
+    PSHA single-site dengan logic tree penuh (cabang source model + GMPE per TRT):
+    enumerasi semua path kalau <= max_branches, selain itu Monte Carlo n_samples
+    path. Return kurva mean, kuantil, dan IML pada return period.
+    """
+    if not req.datasource_ids and not req.source_branch_sets:
+        raise HTTPException(status_code=400, detail="Minimal 1 datasource harus dipilih")
+
+    try:
+        return run_logic_tree(req, db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/multi", response_model=HazardGridResult)
+def run_analysis_multi(req: MultiSiteRequest, db: Session = Depends(get_db)):
+    """
+    Analisis PSHA multi-site (grid / site project) -> IML pada return period per site.
+    """
+    if not req.datasource_ids:
+        raise HTTPException(status_code=400, detail="Minimal 1 datasource harus dipilih")
+
+    try:
+        return run_multi_site(req, db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/multi/stream")
+def run_analysis_multi_stream(req: MultiSiteRequest, db: Session = Depends(get_db)):
+    """
+    Sama dengan /multi tapi di-stream sebagai NDJSON: satu site per baris,
+    dikirim begitu potongannya selesai (urutan tidak dijamin), sehingga peta
+    bisa digambar bertahap dan memori server tidak tergantung ukuran grid.
+    Jumlah site total ada di header X-Total-Sites.
+    """
+    if not req.datasource_ids:
+        raise HTTPException(status_code=400, detail="Minimal 1 datasource harus dipilih")
+
+    try:
+        plan = prepare_multi_site(req, db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def lines():
+        for points in iter_multi_site(plan):
+            yield "".join(json.dumps(p.dict()) + "\n" for p in points)
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"X-Total-Sites": str(len(plan["sites"]["lon"]))},
+    )
@@ -1,18 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import io
+import os
+from typing import List, Literal, Optional, Union
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
+from sqlalchemy.orm import Session, load_only, selectinload
 from app.models import datasource as models
-from app.schemas import DataSourceCreate, DataSourceOut
-from app.database import SessionLocal
+from app.models.project import Project
+from app.schemas import DataSourceCreate, DataSourceImportResult, DataSourceOut, DataSourceSummary
+from app.services.datasource_import import import_datasources, parse_gmpes
+from app.utils.tabular import DELIMITERS
+from app.database import get_db
+from app.services.mfd_service import invalidate_mfd
+from app.services.source_service import invalidate_source
 
 router = APIRouter(prefix="/datasource", tags=["DataSource"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 2000
+# kolom yang dibaca untuk fields=summary (coords JSON dilewati)
+SUMMARY_COLUMNS = (
+    models.DataSource.id,
+    models.DataSource.project_id,
+    models.DataSource.name,
+    models.DataSource.mechanism,
+    models.DataSource.min_mag,
+    models.DataSource.max_mag,
+    models.DataSource.mfd_type,
+    models.DataSource.dip_angle,
+    models.DataSource.strike_angle,
+)
 
 # CREATE
 @router.post("/", response_model=DataSourceOut)
@@ -27,6 +43,10 @@ def create_datasource(ds: DataSourceCreate, db: Session = Depends(get_db)):
         gr_beta=ds.gr_beta,
         gr_rate=ds.gr_rate,
         gr_weight=ds.gr_weight,
+        mfd_type=ds.mfd_type,
+        mfd_bin_width=ds.mfd_bin_width,
+        char_mag=ds.char_mag,
+        char_rate=ds.char_rate,
         dip_angle=ds.dip_angle,
         strike_angle=ds.strike_angle,
     )
@@ -47,10 +67,74 @@ def create_datasource(ds: DataSourceCreate, db: Session = Depends(get_db)):
     return new_ds
 
 
-# READ ALL
-@router.get("/", response_model=list[DataSourceOut])
-def list_datasource(db: Session = Depends(get_db)):
-    return db.query(models.DataSource).all()
+# BULK IMPORT (DataSource.txt legacy / CSV)
+@router.post("/import", response_model=DataSourceImportResult)
+def import_datasource(
+    project_id: int,
+    file: UploadFile = File(...),
+    default_gmpes: Optional[str] = Query(None, description='Untuk baris tanpa kolom gmpes, mis. "AbrahamsonSilva1997:1"'),
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Import massal datasource dari file tabel (baris pertama = header):
+    .csv (koma), .tsv (tab), selain itu TXT legacy dipisah spasi. File dibaca
+    streaming, divalidasi per batch, lalu di-bulk insert dalam satu transaksi;
+    satu baris saja error -> tidak ada yang tersimpan (400 + daftar error).
+    """
+    if not db.query(Project.id).filter(Project.id == project_id).first():
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    delimiter = DELIMITERS.get(ext)
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        result = import_datasources(
+            db, project_id, lines, delimiter,
+            default_gmpes=parse_gmpes(default_gmpes) if default_gmpes else None,
+            dry_run=dry_run,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        lines.detach()
+    if result.n_errors:
+        raise HTTPException(status_code=400, detail=result.dict())
+    return result
+
+
+# READ ALL (keyset pagination)
+@router.get("/", response_model=List[Union[DataSourceOut, DataSourceSummary]])
+def list_datasource(
+    response: Response,
+    project_id: Optional[int] = None,
+    mechanism: Optional[str] = None,
+    after_id: Optional[int] = Query(None, description="Cursor: id terakhir halaman sebelumnya (X-Next-Cursor)"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Literal["full", "summary"] = "full",
+    db: Session = Depends(get_db),
+):
+    """
+    Daftar datasource urut id, per halaman `limit`. Halaman berikutnya:
+    after_id = header X-Next-Cursor (tidak ada header -> halaman terakhir).
+    fields=summary -> tanpa coords_up/coords_down (tidak dibaca dari DB).
+    """
+    q = db.query(models.DataSource).options(selectinload(models.DataSource.gmpe_weights))
+    if fields == "summary":
+        q = q.options(load_only(*SUMMARY_COLUMNS))
+    if project_id is not None:
+        q = q.filter(models.DataSource.project_id == project_id)
+    if mechanism is not None:
+        q = q.filter(models.DataSource.mechanism == mechanism)
+    if after_id is not None:
+        q = q.filter(models.DataSource.id > after_id)
+    rows = q.order_by(models.DataSource.id).limit(limit + 1).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    schema = DataSourceSummary if fields == "summary" else DataSourceOut
+    return [schema.model_validate(ds) for ds in rows]
 
 
 # READ ONE
@@ -78,9 +162,16 @@ def update_datasource(id: int, ds: DataSourceCreate, db: Session = Depends(get_d
     datasource.gr_beta = ds.gr_beta
     datasource.gr_rate = ds.gr_rate
     datasource.gr_weight = ds.gr_weight
+    datasource.mfd_type = ds.mfd_type
+    datasource.mfd_bin_width = ds.mfd_bin_width
+    datasource.char_mag = ds.char_mag
+    datasource.char_rate = ds.char_rate
     datasource.dip_angle = ds.dip_angle
     datasource.strike_angle = ds.strike_angle
 
+    # tabel MFD lama tidak berlaku lagi
+    invalidate_mfd(db, id)
+
     # replace gmpe_weights
     db.query(models.DataSourceGMPE).filter(
         models.DataSourceGMPE.datasource_id == id
@@ -96,6 +187,7 @@ def update_datasource(id: int, ds: DataSourceCreate, db: Session = Depends(get_d
 
     db.commit()
     db.refresh(datasource)
+    invalidate_source(id)  # geometri bisa berubah -> mesh di-cache dibuang
     return datasource
 
 
@@ -112,5 +204,6 @@ def delete_datasource(id: int, db: Session = Depends(get_db)):
 
     db.delete(datasource)
     db.commit()
+    invalidate_source(id)
 
     return {"detail": "Deleted successfully"}
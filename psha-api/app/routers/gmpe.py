@@ -1,6 +1,13 @@
-from typing import List, Optional
+import io
+import os
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.utils.tabular import DELIMITERS
+from app.models.gmpe import GMPEModel
 
 from app.schemas.gmpe import (
     GMPEInfo,
@@ -8,13 +15,23 @@ from app.schemas.gmpe import (
     EvaluateResponse,
     HazardCurveRequest,
     HazardCurveResponse,
+    GMPEModelOut,
+    GMPECoefficientImportResult,
+)
+from app.services.gmpe_coeff_service import (
+    coefficient_cache_stats,
+    get_coefficient_table,
+    import_coefficients,
+    legacy_model_name,
 )
+from app.services.gmpe_native import available_forms, is_native_gmpe, native_gmpe_metadata
 from app.services.gmpe_service import (
     gmpe_metadata,
     evaluate_gmpe,
     hazard_curve,
     resolve_gmpe,
     required_params,
+    cache_stats,
 )
 
 router = APIRouter(prefix="/gmpe", tags=["GMPE"])
@@ -24,17 +41,27 @@ router = APIRouter(prefix="/gmpe", tags=["GMPE"])
 def list_gmpes_root(
     mechanism: Optional[str] = Query(
         None, description="Filter substring: 'ACTIVE', 'SUBDUCTION', 'STABLE', dst."
-    )
+    ),
+    db: Session = Depends(get_db),
 ):
-    return gmpe_metadata(mechanism)
+    # GSIM OpenQuake + model tabel koefisien DB ("db:<nama>")
+    return gmpe_metadata(mechanism) + native_gmpe_metadata(db, mechanism)
 
 
 @router.get("/required-params")
 def get_required_params(code: str):
+    if is_native_gmpe(code):
+        return {"sites": ["vs30"], "rupture": ["mag"], "distances": ["rrup"]}
     cls = resolve_gmpe(code)
     return required_params(cls)
 
 
+@router.get("/cache-stats")
+def get_cache_stats():
+    """Statistik cache evaluator GMPE (hit/miss, ukuran, memori memo)."""
+    return {**cache_stats(), "coefficients": coefficient_cache_stats()}
+
+
 @router.post("/evaluate", response_model=EvaluateResponse)
 def eval_gmpe(req: EvaluateRequest):
     try:
@@ -59,7 +86,72 @@ def hazard_curve_api(req: HazardCurveRequest):
             z2pt5=req.z2pt5,
             imls=req.imls,
             annual_rate=req.annual_rate,
+            truncation_level=req.truncation_level,
+            return_periods=req.return_periods,
         )
         return out
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+# --------- koefisien GMPE (tabel DB) ----------
+@router.get("/coefficients/forms")
+def list_functional_forms():
+    """Bentuk fungsi evaluator native yang tersedia + kolom koefisien wajibnya."""
+    return available_forms()
+
+
+@router.get("/coefficients", response_model=List[GMPEModelOut])
+def list_coefficient_models(db: Session = Depends(get_db)):
+    return db.query(GMPEModel).order_by(GMPEModel.name).all()
+
+
+@router.post("/coefficients/import", response_model=GMPECoefficientImportResult)
+def import_coefficient_file(
+    file: UploadFile = File(...),
+    name: Optional[str] = Query(None, description="Kosong -> dari nama file, mis. 02sadig1997s.txt -> sadig1997s"),
+    columns: Optional[str] = Query(None, description="Untuk file tanpa header: nama kolom dipisah koma, mis. period,c1,c2,sigma"),
+    region: Optional[str] = None,
+    site_type: Optional[str] = None,
+    functional_form: Optional[str] = Query(None, description="Bentuk fungsi evaluator native, lihat /gmpe/coefficients/forms"),
+    db: Session = Depends(get_db),
+):
+    """
+    Import tabel koefisien GMPE legacy SRModel (satu baris per periode).
+    Koefisien lama model dengan nama sama diganti; ada baris error -> 400,
+    tidak ada yang disimpan. Model dengan bentuk fungsi bisa dipakai di
+    datasource / logic tree dengan kode "db:<nama>".
+    """
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        result = import_coefficients(
+            db, lines, name or legacy_model_name(file.filename or "gmpe"),
+            delimiter=DELIMITERS.get(ext),
+            columns=[c.strip() for c in columns.split(",")] if columns else None,
+            region=region,
+            site_type=site_type,
+            functional_form=functional_form,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        lines.detach()
+    if result.n_errors:
+        raise HTTPException(status_code=400, detail=result.dict())
+    return result
+
+
+@router.get("/coefficients/{gmpe_id}")
+def get_coefficients(
+    gmpe_id: int,
+    imt: List[str] = Query(["PGA"], description="Boleh berulang: imt=PGA&imt=SA(0.3)"),
+    db: Session = Depends(get_db),
+) -> Dict[str, Dict[str, float]]:
+    """Koefisien per IMT; periode di antara baris tabel diinterpolasi linear di ln(T)."""
+    try:
+        table = get_coefficient_table(db, gmpe_id)
+        values = table.for_imts(imt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {i: dict(zip(table.names, row.tolist())) for i, row in zip(imt, values)}
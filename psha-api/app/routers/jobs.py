@@ -0,0 +1,41 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.project import Project
+from app.schemas.job import JobCreate, JobOut
+from app.services.job_service import submit_job, get_job, list_jobs
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.post("/", response_model=JobOut, status_code=202)
+def create_job(payload: JobCreate, db: Session = Depends(get_db)):
+    """
+    Antrekan analisis (single / multi) di background; status & progress
+    dipantau lewat GET /jobs/{id}, hasil akhir tersimpan di results.
+    Input identik (isi datasource, site, parameter) -> result lama dipakai ulang.
+    """
+    if not db.query(Project.id).filter(Project.id == payload.project_id).first():
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    try:
+        return submit_job(db, payload.project_id, payload.mode, payload.params, payload.use_cache)
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/", response_model=List[JobOut])
+def read_jobs(project_id: Optional[int] = None, limit: int = 50, db: Session = Depends(get_db)):
+    return list_jobs(db, project_id, limit)
+
+
+@router.get("/{job_id}", response_model=JobOut)
+def read_job(job_id: int, db: Session = Depends(get_db)):
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
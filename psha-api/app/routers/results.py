@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.result import Result
+from app.services.result_store import nearest_site, read_period_slice, read_raw, read_site
+
+router = APIRouter(prefix="/results", tags=["Results"])
+
+
+def _get_result(db: Session, result_id: int) -> Result:
+    result = db.query(Result).filter(Result.id == result_id).first()
+    if not result:
+        raise HTTPException(status_code=404, detail="Result not found")
+    return result
+
+
+@router.get("/{result_id}")
+def read_result(result_id: int, db: Session = Depends(get_db)):
+    """
+    Result JSON utuh (single / logic tree), atau index-nya saja untuk result
+    binary (multi-site); kurva dibaca per site lewat endpoint di bawah.
+    """
+    return _get_result(db, result_id).output
+
+
+@router.get("/{result_id}/sites/{site}")
+def read_result_site(result_id: int, site: int, db: Session = Depends(get_db)):
+    result = _get_result(db, result_id)
+    try:
+        return read_site(db, result, site)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{result_id}/nearest")
+def read_result_nearest(result_id: int, lat: float, lon: float, db: Session = Depends(get_db)):
+    result = _get_result(db, result_id)
+    try:
+        return read_site(db, result, nearest_site(db, result, lat, lon))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{result_id}/map")
+def read_result_map(result_id: int, return_period: int, db: Session = Depends(get_db)):
+    result = _get_result(db, result_id)
+    try:
+        return read_period_slice(db, result, return_period)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{result_id}/download")
+def download_result(result_id: int, db: Session = Depends(get_db)):
+    """Blob npz mentah; buka dengan numpy.load."""
+    result = _get_result(db, result_id)
+    try:
+        data = read_raw(db, result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(
+        content=data,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="result_{result_id}.npz"'},
+    )
@@ -0,0 +1,48 @@
+import io
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.project import Project
+from app.schemas.siteparameter import SiteUploadResult
+from app.services.site_import import import_sites
+from app.utils.tabular import DELIMITERS
+
+router = APIRouter(prefix="/sites", tags=["Sites"])
+
+
+@router.post("/upload", response_model=SiteUploadResult)
+def upload_sites(
+    project_id: int,
+    file: UploadFile = File(...),
+    vs30: Optional[float] = Query(760.0, gt=0, description="Default untuk baris tanpa vs30"),
+    z1p0: Optional[float] = Query(None, ge=0, description="Default z1p0 (m)"),
+    z2p5: Optional[float] = Query(None, ge=0, description="Default z2p5 (m)"),
+    derive_depths: bool = True,
+    replace: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Upload site multi-site dari CSV (template_sites.csv: Latitude,Longitude,
+    kolom opsional vs30, z1p0, z2p5, site_name). Dibaca streaming dan
+    di-insert per potongan; baris invalid dilaporkan tanpa membatalkan upload.
+    """
+    if not db.query(Project.id).filter(Project.id == project_id).first():
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    # .txt / .dat (mis. 333MSitedat.txt) dipisah spasi; selain itu CSV
+    delimiter = None if ext in (".txt", ".dat") else DELIMITERS.get(ext, ",")
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        return import_sites(
+            db, project_id, lines, delimiter,
+            vs30=vs30, z1p0=z1p0, z2p5=z2p5, derive_depths=derive_depths, replace=replace,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        lines.detach()
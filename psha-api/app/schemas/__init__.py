@@ -5,6 +5,9 @@ from .datasource import (
     DataSourceCreate,
     DataSourceGMPEOut,
     DataSourceOut,
+    DataSourceSummary,
+    ImportRowError,
+    DataSourceImportResult,
 )
 
 from .gmpe import (
@@ -14,16 +17,40 @@ from .gmpe import (
     EvaluateResponse,
     HazardCurveRequest,
     HazardCurveResponse,
+    GMPEModelOut,
+    GMPECoefficientImportResult,
 )
 
 
 
 from .analysis import (
+    DisaggRequest,
+    DisaggSummary,
+    DisaggResult,
     HazardRequest,
     HazardResultPoint,
     HazardResult,
+    ReturnPeriodIML,
+    SitePoint,
+    GridSpec,
+    MultiSiteRequest,
+    HazardGridPoint,
+    HazardGridResult,
+    SourceBranch,
+    SourceBranchSet,
+    LogicTreeRequest,
+    LogicTreeResult,
+    UHSRequest,
+    UHSPoint,
+    UHSSpectrum,
+    UHSResult,
 )
 
 from .meta import (
     MetaResponse,
 )
+
+from .job import (
+    JobCreate,
+    JobOut,
+)
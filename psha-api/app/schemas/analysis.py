@@ -1,5 +1,50 @@
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Dict, Any
+
+from app.schemas.gmpe import GMPEWeight
+from app.utils.disagg import DEFAULT_EPS_EDGES
+
+
+class DisaggRequest(BaseModel):
+    """
+    Disagregasi magnitudo-jarak-epsilon di IML pada return period tertentu,
+    dihitung dalam pass yang sama dengan hazard curve. Jarak = rrup.
+    """
+    return_periods: List[int] = [2475]
+    mag_bin_width: float = Field(0.5, gt=0)
+    distance_bin_width: float = Field(20.0, gt=0)  # km
+    eps_edges: List[float] = list(DEFAULT_EPS_EDGES)  # di luar rentang -> bin ujung
+    by_source: bool = False
+    by_trt: bool = False
+
+
+class DisaggSummary(BaseModel):
+    """
+    Ringkasan disagregasi satu return period: nilai rata-rata (tertimbang
+    kontribusi) dan bin modal (titik tengah bin M-R-eps terbesar).
+    None kalau RP di luar rentang kurva.
+    """
+    return_period: int
+    iml: Optional[float] = None
+    mean_mag: Optional[float] = None
+    mean_dist: Optional[float] = None
+    mean_eps: Optional[float] = None
+    mode_mag: Optional[float] = None
+    mode_dist: Optional[float] = None
+    mode_eps: Optional[float] = None
+    sources: Optional[Dict[str, float]] = None  # nama datasource -> fraksi kontribusi
+    trts: Optional[Dict[str, float]] = None     # mechanism/TRT -> fraksi kontribusi
+
+
+class DisaggResult(DisaggSummary):
+    """
+    Disagregasi lengkap single-site: fraksi kontribusi per bin
+    mag_dist_eps[i_mag][i_dist][i_eps] (total = 1).
+    """
+    mag_edges: List[float] = []
+    dist_edges: List[float] = []
+    eps_edges: List[float] = []
+    mag_dist_eps: List[List[List[float]]] = []
 
 
 class HazardRequest(BaseModel):
@@ -11,7 +56,15 @@ class HazardRequest(BaseModel):
     return_periods: List[int]  # misal [475, 2475] tahun
     site_lat: float
     site_lon: float
-    vs30: Optional[float] = 760.0  # kondisi tanah default
+    vs30: float = Field(760.0, gt=0)  # kondisi tanah default (m/s)
+    z1pt0: Optional[float] = None
+    z2pt5: Optional[float] = None
+    imt: str = "PGA"  # e.g. "PGA", "SA(0.2)"
+    imls: Optional[List[float]] = None  # kosong -> grid adaptif (rapat di sekitar return period)
+    integration_distance: Optional[Dict[str, float]] = None  # km per mechanism, override default
+    truncation_level: Optional[float] = Field(None, ge=0)  # sigma; kosong -> tanpa truncation
+    precision: Literal["float64", "float32"] = "float64"  # float32 -> hemat memori kernel exceedance
+    disagg: Optional[DisaggRequest] = None  # isi -> disagregasi M-R-eps ikut dihitung
 
 
 class HazardResultPoint(BaseModel):
@@ -22,6 +75,14 @@ class HazardResultPoint(BaseModel):
     prob: float  # exceedance probability
 
 
+class ReturnPeriodIML(BaseModel):
+    """
+    IML hasil inversi hazard curve pada return period tertentu.
+    """
+    return_period: int
+    iml: Optional[float] = None  # None kalau RP di luar rentang kurva
+
+
 class HazardResult(BaseModel):
     """
     Response utama dari analisis hazard.
@@ -29,7 +90,166 @@ class HazardResult(BaseModel):
     site_lat: float
     site_lon: float
     return_period: int
+    imt: str = "PGA"
     results: List[HazardResultPoint]
+    iml_at_return_periods: List[ReturnPeriodIML] = []
+    disagg: List[DisaggResult] = []
 
     class Config:
         from_attributes = True
+
+
+class SourceBranch(BaseModel):
+    """
+    Satu cabang source model: himpunan datasource alternatif + bobotnya.
+    """
+    name: str
+    datasource_ids: List[int]
+    weight: float = Field(..., ge=0.0)
+
+
+class SourceBranchSet(BaseModel):
+    """
+    Ketidakpastian source model (mis. dua alternatif geometri/MFD suatu fault);
+    satu path memilih tepat satu cabang dari tiap set.
+    """
+    name: str
+    branches: List[SourceBranch]
+
+
+class LogicTreeRequest(HazardRequest):
+    """
+    Analisis PSHA dengan logic tree: datasource_ids = sumber yang selalu dipakai,
+    source_branch_sets = alternatif source model, gmpe_branch_sets = GMPE per
+    mechanism/TRT (kosong -> dari bobot GMPE datasource di TRT tsb).
+    Enumerasi penuh kalau jumlah path <= max_branches, selain itu Monte Carlo.
+    """
+    datasource_ids: List[int] = []
+    source_branch_sets: List[SourceBranchSet] = []
+    gmpe_branch_sets: Optional[Dict[str, List[GMPEWeight]]] = None
+    max_branches: int = Field(1000, ge=1)
+    n_samples: int = Field(500, ge=1)
+    seed: Optional[int] = 42
+    quantiles: List[float] = [0.16, 0.5, 0.84]
+
+
+class LogicTreeResult(BaseModel):
+    """
+    Hasil logic tree: kurva mean & kuantil (annual PoE) + IML pada return period.
+    """
+    site_lat: float
+    site_lon: float
+    imt: str
+    imls: List[float]
+    mean: List[float]
+    quantiles: Dict[str, List[float]] = {}
+    iml_at_return_periods: Dict[str, List[ReturnPeriodIML]] = {}  # "mean", "0.5", ...
+    meta: Dict[str, Any] = {}
+
+
+class UHSRequest(BaseModel):
+    """
+    Request Uniform Hazard Spectrum: semua IMT dihitung dalam satu pass
+    (context GMPE dipakai bersama), lalu diinversi per return period.
+    """
+    datasource_ids: List[int]
+    return_periods: List[int]  # misal [475, 2475] tahun
+    site_lat: float
+    site_lon: float
+    imts: List[str] = ["PGA", "SA(0.1)", "SA(0.2)", "SA(0.3)", "SA(0.5)", "SA(1.0)", "SA(2.0)", "SA(3.0)"]
+    vs30: float = Field(760.0, gt=0)
+    z1pt0: Optional[float] = None
+    z2pt5: Optional[float] = None
+    imls: Optional[List[float]] = None  # kosong -> grid adaptif per IMT
+    integration_distance: Optional[Dict[str, float]] = None
+    truncation_level: Optional[float] = Field(None, ge=0)
+    precision: Literal["float64", "float32"] = "float64"
+
+
+class UHSPoint(BaseModel):
+    """
+    Satu titik spektrum: IMT + periodenya (PGA -> 0) dan IML pada return period.
+    """
+    imt: str
+    period: float
+    iml: Optional[float] = None  # None kalau RP di luar rentang kurva
+
+
+class UHSSpectrum(BaseModel):
+    return_period: int
+    points: List[UHSPoint]
+
+
+class UHSResult(BaseModel):
+    """
+    Response UHS: spektrum per return period + hazard curve (annual PoE) per IMT.
+    """
+    site_lat: float
+    site_lon: float
+    curves: Dict[str, List[HazardResultPoint]] = {}
+    spectra: List[UHSSpectrum] = []
+
+
+class SitePoint(BaseModel):
+    """
+    Satu lokasi site untuk analisis multi-site.
+    """
+    lat: float
+    lon: float
+    vs30: Optional[float] = Field(None, gt=0)  # kosong -> vs30 default request
+    z1pt0: Optional[float] = None  # m; kosong -> default request / korelasi vs30
+    z2pt5: Optional[float] = None  # km; kosong -> default request / korelasi vs30
+
+
+class GridSpec(BaseModel):
+    """
+    Grid reguler dalam bounding box (derajat), mis. spacing 0.05°.
+    """
+    min_lat: float
+    max_lat: float
+    min_lon: float
+    max_lon: float
+    spacing: float = 0.05
+
+
+class MultiSiteRequest(BaseModel):
+    """
+    Request analisis multi-site. Sumber site (pilih salah satu, urutan prioritas):
+    `sites` eksplisit, SiteParameter milik `project_id`, atau `grid`.
+    """
+    datasource_ids: List[int]
+    return_periods: List[int]
+    sites: Optional[List[SitePoint]] = None
+    project_id: Optional[int] = None
+    grid: Optional[GridSpec] = None
+    vs30: float = Field(760.0, gt=0)
+    z1pt0: Optional[float] = None  # m; default site tanpa z1pt0 (kosong -> korelasi vs30)
+    z2pt5: Optional[float] = None  # km; default site tanpa z2pt5 (kosong -> korelasi vs30)
+    imt: str = "PGA"
+    imls: Optional[List[float]] = None  # kosong -> grid adaptif per site
+    integration_distance: Optional[Dict[str, float]] = None  # km per mechanism
+    truncation_level: Optional[float] = Field(None, ge=0)
+    precision: Literal["float64", "float32"] = "float64"
+    disagg: Optional[DisaggRequest] = None  # ringkasan disagregasi per site
+    chunk_size: int = Field(500, ge=1)
+    max_sites: int = Field(200_000, ge=1)
+
+
+class HazardGridPoint(BaseModel):
+    """
+    Hasil satu site: IML pada tiap return period (urutan = return_periods request).
+    """
+    lat: float
+    lon: float
+    iml_at_rp: List[Optional[float]]
+    disagg: Optional[List[DisaggSummary]] = None
+
+
+class HazardGridResult(BaseModel):
+    """
+    Response analisis multi-site (peta hazard).
+    """
+    imt: str
+    return_periods: List[int]
+    grid: List[HazardGridPoint]
+    meta: Dict[str, Any] = {}
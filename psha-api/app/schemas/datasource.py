@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 
 # Koordinat (dengan depth)
@@ -25,6 +25,10 @@ class DataSourceBase(BaseModel):
     gr_beta: Optional[float] = None      # ✅ cukup optional float
     gr_rate: Optional[float] = None
     gr_weight: Optional[float] = None  
+    mfd_type: Optional[Literal["truncated_gr", "characteristic"]] = "truncated_gr"
+    mfd_bin_width: Optional[float] = None  # kosong -> 0.1
+    char_mag: Optional[float] = None       # untuk mfd_type "characteristic"
+    char_rate: Optional[float] = None
     dip_angle: Optional[float] = None  # Dip angle
     strike_angle: Optional[float] = None  # Strike angle     
 
@@ -49,3 +53,35 @@ class DataSourceOut(DataSourceBase):
 
     class Config:
         from_attributes = True
+
+
+# Untuk listing ringan (tanpa koordinat JSON) -> GET /datasource/?fields=summary
+class DataSourceSummary(BaseModel):
+    id: int
+    project_id: Optional[int] = None
+    name: str
+    mechanism: str
+    min_mag: Optional[float] = None
+    max_mag: Optional[float] = None
+    mfd_type: Optional[str] = None
+    dip_angle: Optional[float] = None
+    strike_angle: Optional[float] = None
+    gmpe_weights: List[DataSourceGMPEOut] = []
+
+    class Config:
+        from_attributes = True
+
+
+# Hasil POST /datasource/import
+class ImportRowError(BaseModel):
+    line: int          # nomor baris di file (1 = header)
+    error: str
+
+
+class DataSourceImportResult(BaseModel):
+    imported: int                      # 0 kalau ada error / dry_run (transaksi di-rollback)
+    valid: int                         # sumber yang lolos validasi
+    n_errors: int
+    errors: List[ImportRowError] = []  # maksimal 100 pertama
+    ids: List[int] = []
+    dry_run: bool = False
@@ -1,6 +1,8 @@
 from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 
+from .datasource import ImportRowError
+
 
 class GMPEInfo(BaseModel):
     id: str
@@ -38,13 +40,40 @@ class HazardCurveRequest(BaseModel):
     mag: float
     rrup: List[float]
     vs30: float
-    imls: List[float]
+    imls: Optional[List[float]] = None    # kosong -> grid adaptif di sekitar return_periods
     z1pt0: Optional[float] = None
     z2pt5: Optional[float] = None
     annual_rate: float = 0.01
+    truncation_level: Optional[float] = Field(None, ge=0)  # sigma; kosong -> tanpa truncation
+    return_periods: List[int] = [43, 475, 2475]  # IML pada RP ini dilaporkan di meta
 
 
 class HazardCurveResponse(BaseModel):
     imls: List[float]
     poe: List[float]
     meta: Dict[str, Any]
+
+
+# ----------- Koefisien GMPE (tabel DB, import file legacy) -----------
+class GMPEModelOut(BaseModel):
+    id: int
+    name: str
+    year: Optional[int] = None
+    region: Optional[str] = None
+    site_type: Optional[str] = None
+    functional_form: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class GMPECoefficientImportResult(BaseModel):
+    gmpe_id: Optional[int] = None      # kosong kalau ada error (tidak ada yang disimpan)
+    name: str
+    code: Optional[str] = None         # kode untuk datasource / logic tree, mis. "db:sadig1997s"
+    functional_form: Optional[str] = None
+    n_periods: int = 0
+    columns: List[str] = []
+    periods: List[float] = []
+    n_errors: int = 0
+    errors: List[ImportRowError] = []  # maksimal 100 pertama
@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Literal, Optional
+from datetime import datetime
+
+
+# ----------- Create (POST) -----------
+class JobCreate(BaseModel):
+    project_id: int                       # hasil disimpan ke Result milik project ini
+    mode: Literal["single", "multi", "logic_tree"]  # single -> HazardRequest, multi -> MultiSiteRequest,
+                                                    # logic_tree -> LogicTreeRequest
+    params: Dict[str, Any]                # body request analisis
+    use_cache: bool = True                # False -> hitung ulang walau input identik sudah ada hasilnya
+
+
+# ----------- Output (GET) -----------
+class JobOut(BaseModel):
+    id: int
+    project_id: int
+    mode: str
+    status: str                           # queued / running / done / failed
+    progress: float
+    error: Optional[str] = None
+    use_cache: bool = True
+    result_id: Optional[int] = None
+    worker_id: Optional[str] = None       # proses yang memegang lease job "running"
+    heartbeat_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,7 +1,9 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
+from .datasource import ImportRowError
+
 
 # ----------- Base Schema -----------
 class SiteParameterBase(BaseModel):
@@ -34,3 +36,11 @@ class SiteParameterOut(SiteParameterBase):
 
     class Config:
         from_attributes = True
+
+
+# ----------- Upload CSV (POST /sites/upload) -----------
+class SiteUploadResult(BaseModel):
+    inserted: int
+    deleted: int = 0                   # site lama yang dihapus (replace=true)
+    n_errors: int                      # baris invalid (dilewati, tidak membatalkan upload)
+    errors: List[ImportRowError] = []  # maksimal 100 pertama
@@ -0,0 +1,806 @@
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, wait
+import os
+from itertools import groupby, islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.imports import IMPORT_LOCK
+from app.models.datasource import DataSource
+from app.models.siteparameter import SiteParameter
+from app.schemas.analysis import (
+    HazardRequest,
+    HazardResult,
+    HazardResultPoint,
+    ReturnPeriodIML,
+    MultiSiteRequest,
+    HazardGridResult,
+    HazardGridPoint,
+    DisaggRequest,
+    DisaggSummary,
+    DisaggResult,
+    UHSRequest,
+    UHSResult,
+    UHSSpectrum,
+    UHSPoint,
+)
+from app.services.compute_pool import COMPUTE_WORKERS, get_pool
+from app.services.gmpe_service import (
+    ADAPTIVE_IML_RANGE,
+    check_imt_support,
+    evaluate_gmpe_imts,
+    iml_scale,
+    parse_imt,
+)
+from app.services.mechanism_service import integration_distance
+from app.services.mfd_service import load_mfd_tables
+from app.services.source_service import source_index, source_ruptures
+from app.utils.disagg import add_histogram, bin_centers, bin_edges, bin_index, histogram_mode
+from app.utils.geometry import rupture_distances
+from app.utils.spatial import SourceIndex
+from app.utils.psha_math import (
+    adaptive_hazard_curve,
+    exceedance_probability,
+    exceedance_rate,
+    iml_at_return_periods,
+)
+
+# grid IML tetap (g) untuk logic tree (kurva semua path harus di grid yang sama);
+# PGV/PGD dikali iml_scale
+DEFAULT_IMLS = np.logspace(np.log10(0.005), np.log10(3.0), 30)
+
+# grid IML adaptif (ADAPTIVE_IML_RANGE, g; x iml_scale per IMT) kalau request
+# tidak menyertakan imls: grid kasar log-spaced + titik rapat di sekitar
+# perpotongan tiap return period
+IML_COARSE_POINTS = int(os.environ.get("IML_COARSE_POINTS", 12))
+IML_REFINE_POINTS = int(os.environ.get("IML_REFINE_POINTS", 4))
+
+# field rupture yang dibawa spec ke worker & jenis jarak yang dihitung per site
+RUPTURE_GEOMETRY = ("lon", "lat", "depth", "strike", "dip", "length", "width", "ztor", "hypo_depth")
+DISTANCE_TYPES = ("rrup", "rjb", "rx", "ry0", "rhypo", "repi")
+
+# batas elemen (site x skenario) per evaluasi GMPE, menjaga memori matriks PoE
+MAX_SCENARIOS_PER_BATCH = 200_000
+
+
+# --------- loading ----------
+def load_datasources(db: Session, ids: List[int]) -> List[DataSource]:
+    """Ambil DataSource terpilih + bobot GMPE-nya dalam 2 query (tanpa N+1)."""
+    rows = (
+        db.query(DataSource)
+        .options(selectinload(DataSource.gmpe_weights))
+        .filter(DataSource.id.in_(ids))
+        .all()
+    )
+    missing = set(ids) - {ds.id for ds in rows}
+    if missing:
+        raise ValueError(f"Datasource tidak ditemukan: {sorted(missing)}")
+    return rows
+
+
+# --------- spesifikasi sumber ----------
+def source_spec(
+    ds: DataSource,
+    mags: np.ndarray,
+    rates: np.ndarray,
+    integration: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """
+    Ubah DataSource (ORM) + tabel MFD-nya jadi dict biasa yang siap dihitung
+    (dan bisa di-pickle ke proses worker): rupture planar per bin magnitudo
+    (dari mesh permukaan yang di-cache) + lajunya, dan bobot GMPE.
+    Semua bagian yang tidak bergantung site dihitung sekali di sini.
+    """
+    if not ds.gmpe_weights:
+        raise ValueError(f"Datasource '{ds.name}' belum punya GMPE.")
+
+    if ds.gr_weight is not None:
+        rates = rates * ds.gr_weight
+
+    rup = source_ruptures(ds, mags)
+    total_w = sum(w.weight for w in ds.gmpe_weights)
+    return {
+        "id": ds.id,
+        "name": ds.name,
+        "mechanism": ds.mechanism,
+        "max_distance": integration_distance(ds.mechanism, integration),
+        "ruptures": {
+            **{k: rup[k] for k in RUPTURE_GEOMETRY},
+            "mag": mags[rup["mag_idx"]],
+            "rate": rates[rup["mag_idx"]] * rup["weight"],
+        },
+        "gmpes": [(w.gmpe_name, w.weight / total_w) for w in ds.gmpe_weights],
+    }
+
+
+def load_sources(
+    db: Session, ids: List[int], integration: Optional[Dict[str, float]] = None
+) -> Tuple[List[Dict[str, Any]], SourceIndex]:
+    """Spec semua sumber terpilih + index spasialnya (untuk pruning per site)."""
+    rows = load_datasources(db, ids)
+    mfd = load_mfd_tables(db, rows)
+    bounds = list(zip(mfd["offsets"][:-1], mfd["offsets"][1:]))
+    specs = [
+        source_spec(ds, mfd["mags"][a:b], mfd["rates"][a:b], integration)
+        for ds, (a, b) in zip(rows, bounds)
+    ]
+    index = source_index(rows, [s["max_distance"] for s in specs])
+    # simpan tabel MFD yang baru dihitung; bentrok dengan request paralel -> cukup dibuang
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+    return specs, index
+
+
+def _source_block(spec: Dict[str, Any], lons: np.ndarray, lats: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Skenario (rupture) satu sumber untuk K site:
+    parameter rupture -> (S,), distances -> (K, S).
+    """
+    rup = spec["ruptures"]
+    return {**rup, **rupture_distances(lons, lats, rup)}
+
+
+# --------- hazard ----------
+def _gmpe_batches(
+    specs: List[Dict[str, Any]],
+    lons: np.ndarray,
+    lats: np.ndarray,
+    imts: Sequence[str],
+    vs30: np.ndarray,
+    z1pt0: Optional[np.ndarray] = None,
+    z2pt5: Optional[np.ndarray] = None,
+    near: Optional[np.ndarray] = None,
+    gmpes: Optional[List[List[Tuple[str, float]]]] = None,
+) -> Iterator[Tuple[slice, str, List[Tuple[int, float]], np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Evaluasi GMPE per (batch site, GMPE): skenario semua sumber yang memakai
+    GMPE yang sama digabung -> 1 evaluasi OpenQuake per GMPE per batch site,
+    untuk semua IMT sekaligus (context dipakai bersama).
+    near: mask (K, n_sumber) dari SourceIndex; sumber di luar jarak integrasi
+    semua site di batch tidak dievaluasi, dan lajunya ke site jauh = 0.
+    gmpes: per sumber [(code, weight)], default spec["gmpes"].
+    Yield (sl, code, items [(idx sumber, bobot)], sizes (skenario per item),
+    mean, sigma, rate, scen) dengan mean/sigma (M, Kb, S), rate (Kb, S) yang
+    belum dikali bobot GMPE, dan scen = {"mag": (S,), "rrup": (Kb, S)} untuk
+    disagregasi.
+    """
+    lons = np.atleast_1d(np.asarray(lons, dtype=float))
+    lats = np.atleast_1d(np.asarray(lats, dtype=float))
+    n_sites = len(lons)
+    gmpes = gmpes if gmpes is not None else [spec["gmpes"] for spec in specs]
+
+    def _per_site(x):
+        return None if x is None else np.broadcast_to(np.asarray(x, dtype=float), (n_sites,))
+
+    vs30, z1pt0, z2pt5 = _per_site(vs30), _per_site(z1pt0), _per_site(z2pt5)
+    if near is None:
+        near = np.ones((n_sites, len(specs)), dtype=bool)
+
+    # jumlah skenario terbesar per GMPE -> ukuran batch site
+    per_gmpe: Dict[str, int] = defaultdict(int)
+    for spec, items in zip(specs, gmpes):
+        for code, _ in items:
+            per_gmpe[code] += len(spec["ruptures"]["mag"])
+    n_scen = max(per_gmpe.values(), default=1)
+    batch = max(1, MAX_SCENARIOS_PER_BATCH // max(n_scen * len(imts), 1))
+
+    for start in range(0, n_sites, batch):
+        sl = slice(start, min(start + batch, n_sites))
+        near_b = near[sl]
+
+        # kelompokkan sumber yang dekat per GMPE
+        by_gmpe: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for i in np.flatnonzero(near_b.any(axis=0)):
+            for code, weight in gmpes[i]:
+                by_gmpe[code].append((i, weight))
+
+        blocks = {}
+        for code, items in by_gmpe.items():
+            for i, _ in items:
+                if i not in blocks:
+                    blocks[i] = _source_block(specs[i], lons[sl], lats[sl])
+            parts = [blocks[i] for i, _ in items]
+
+            # laju per (site, skenario): 0 kalau sumber di luar jarak integrasi site
+            rate = np.concatenate(
+                [np.where(near_b[:, [i]], b["rate"], 0.0) for b, (i, _) in zip(parts, items)], axis=1
+            )
+            rup = {
+                k: np.concatenate([b[k] for b in parts])[None, :]
+                for k in ("mag", "hypo_depth", "dip", "ztor", "width")
+            }
+            dists = {k: np.concatenate([b[k] for b in parts], axis=1) for k in DISTANCE_TYPES}
+
+            scen = {"mag": rup.pop("mag")[0], "rrup": dists.pop("rrup")}
+            mean, sigma = evaluate_gmpe_imts(
+                code, imts,
+                mag=scen["mag"][None, :], rrup=scen["rrup"],
+                vs30=vs30[sl, None],
+                z1pt0=None if z1pt0 is None else z1pt0[sl, None],
+                z2pt5=None if z2pt5 is None else z2pt5[sl, None],
+                hypo_depth=rup.pop("hypo_depth"),
+                distances=dists,
+                rupture=rup,
+                memoize=n_sites == 1,
+            )
+            sizes = np.array([len(b["rate"]) for b in parts])
+            yield sl, code, items, sizes, mean, sigma, rate, scen
+
+
+def disagg_bins(specs: List[Dict[str, Any]], req: DisaggRequest) -> Dict[str, Any]:
+    """Tepi bin M / R (rrup) / epsilon untuk disagregasi sekumpulan sumber."""
+    mags = np.concatenate([spec["ruptures"]["mag"] for spec in specs])
+    return {
+        "return_periods": list(req.return_periods),
+        "mag": bin_edges(mags.min(), mags.max(), req.mag_bin_width),
+        "dist": bin_edges(0.0, max(spec["max_distance"] for spec in specs), req.distance_bin_width),
+        "eps": np.unique(np.asarray(req.eps_edges, dtype=float)),
+    }
+
+
+def _disagg_arrays(bins: Dict[str, Any], n_imt: int, n_sites: int, n_src: int) -> Dict[str, np.ndarray]:
+    lead = (n_imt, n_sites, len(bins["return_periods"]))
+    return {
+        "iml": np.full(lead, np.nan),
+        # kontribusi laju exceedance di IML(RP) per bin (M, R, eps) dan per sumber
+        "mre": np.zeros(lead + (len(bins["mag"]) - 1, len(bins["dist"]) - 1, len(bins["eps"]) - 1)),
+        "src": np.zeros(lead + (n_src,)),
+        # sum kontribusi x (mag, rrup, eps) -> nilai rata-rata eksak (bukan titik tengah bin)
+        "moments": np.zeros(lead + (3,)),
+    }
+
+
+def _accumulate_disagg(
+    out: Dict[str, np.ndarray],
+    bins: Dict[str, Any],
+    sl: slice,
+    evals: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, np.ndarray]]],
+    truncation_level: Optional[float],
+    dtype,
+) -> None:
+    """
+    Histogram kontribusi (M, R, eps, sumber) di IML target per site batch,
+    dari mean/sigma yang sama dengan kurva hazard (tanpa evaluasi GMPE ulang).
+    """
+    # IML di luar rentang kurva -> +inf: PoE 0, tidak berkontribusi
+    log_t = np.log(out["iml"][:, sl])
+    log_t = np.where(np.isnan(log_t), np.inf, log_t)[:, :, None, :]  # (M, Kb, 1, Rd)
+    n_imt, n_sites, n_rp = out["iml"][:, sl].shape
+    imt_i = np.arange(n_imt)[:, None, None, None]
+    site_i = np.arange(n_sites)[None, :, None, None]
+    rp_i = np.arange(n_rp)[None, None, None, :]
+
+    mre = np.zeros((n_imt, n_sites) + out["mre"].shape[2:])
+    src = np.zeros((n_imt, n_sites) + out["src"].shape[2:])
+    for mean, sigma, rw, src_idx, scen in evals:
+        # (M, Kb, S, Rd)
+        contrib = exceedance_probability(mean, sigma, log_t, truncation_level, dtype).astype(float)
+        contrib *= rw[None, :, :, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            eps = (log_t - mean[..., None]) / sigma[..., None]
+        eps = np.where(contrib > 0, eps, 0.0)
+
+        m_i = bin_index(scen["mag"], bins["mag"])[None, None, :, None]
+        r_i = bin_index(scen["rrup"], bins["dist"])[None, :, :, None]
+        add_histogram(mre, (imt_i, site_i, rp_i, m_i, r_i, bin_index(eps, bins["eps"])), contrib)
+        add_histogram(src, (imt_i, site_i, rp_i, src_idx[None, None, :, None]), contrib)
+        out["moments"][:, sl] += np.stack([
+            np.einsum("mksr,s->mkr", contrib, scen["mag"]),
+            np.einsum("mksr,ks->mkr", contrib, scen["rrup"]),
+            np.einsum("mksr,mksr->mkr", contrib, eps),
+        ], axis=-1)
+    out["mre"][:, sl] += mre
+    out["src"][:, sl] += src
+
+
+def curves_for_sites(
+    specs: List[Dict[str, Any]],
+    lons: np.ndarray,
+    lats: np.ndarray,
+    imts: Sequence[str],
+    imls: Optional[np.ndarray],
+    return_periods: Sequence[float],
+    vs30: np.ndarray,
+    z1pt0: Optional[np.ndarray] = None,
+    z2pt5: Optional[np.ndarray] = None,
+    near: Optional[np.ndarray] = None,
+    truncation_level: Optional[float] = None,
+    dtype=np.float64,
+    disagg: Optional[Dict[str, Any]] = None,
+) -> Tuple[np.ndarray, np.ndarray, Optional[Dict[str, np.ndarray]]]:
+    """
+    Laju tahunan exceedance lambda(IML) untuk K site dan M IMT sekaligus, dengan
+    bobot GMPE per sumber (mean logic tree GMPE). Integrasi magnitudo x jarak x
+    IML = satu kontraksi tensor (IMT x site x skenario x IML) per batch site;
+    truncation_level / dtype diteruskan ke kernel exceedance (psha_math).
+    Grid IML dari `imls` kalau ada, selain itu adaptif per (site, IMT): grid
+    kasar lalu titik rapat di sekitar perpotongan tiap return_periods.
+    disagg: bin dari disagg_bins -> histogram kontribusi di IML(RP) dihitung di
+    pass yang sama, dari mean/sigma GMPE yang sudah ada di memori.
+    Return (imls, lam, disagg) dengan imls/lam (K, M, N); disagg berisi array
+    berdimensi depan (M, K, RP).
+    """
+    n_sites = len(np.atleast_1d(lons))
+    n_imt = len(imts)
+    # grid adaptif dirapatkan juga di RP disagregasi
+    return_periods = list(dict.fromkeys(list(return_periods) + (disagg["return_periods"] if disagg else [])))
+    grid = dict(
+        min_iml=ADAPTIVE_IML_RANGE[0], max_iml=ADAPTIVE_IML_RANGE[1],
+        n_coarse=IML_COARSE_POINTS, n_refine=IML_REFINE_POINTS,
+    )
+    # satuan per IMT (PGV cm/s, ...): grid log bersama digeser ln(faktor) per IMT -> (M, 1, 1)
+    log_scale = np.log([iml_scale(i) for i in imts])[:, None, None]
+
+    def _curve(rate_fn: Callable[[np.ndarray], np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        if imls is None:
+            grid_imls, lam = adaptive_hazard_curve(lambda log_u: rate_fn(log_u + log_scale), return_periods, **grid)
+            return grid_imls * np.exp(log_scale), lam
+        lam = rate_fn(np.log(np.asarray(imls, dtype=float)))
+        return np.broadcast_to(np.asarray(imls, dtype=float), lam.shape), lam
+
+    # site tanpa sumber dalam jarak integrasi: laju 0
+    out_imls, out_lam = _curve(lambda log_imls: np.zeros((n_imt, n_sites, log_imls.shape[-1])))
+    out_imls = np.array(out_imls)
+    out_dis = _disagg_arrays(disagg, n_imt, n_sites, len(specs)) if disagg else None
+
+    batches = _gmpe_batches(specs, lons, lats, imts, vs30, z1pt0, z2pt5, near)
+    for _, group in groupby(batches, key=lambda b: (b[0].start, b[0].stop)):
+        # semua GMPE satu batch site dikumpulkan: kurva, grid adaptif dan
+        # disagregasi memakai mean/sigma yang sama
+        group = list(group)
+        sl = group[0][0]
+        evals = [
+            (mean, sigma, rate * np.repeat([w for _, w in items], sizes),
+             np.repeat([i for i, _ in items], sizes), scen)
+            for _, _, items, sizes, mean, sigma, rate, scen in group
+        ]
+
+        def _rate(log_imls: np.ndarray) -> np.ndarray:
+            # log_imls (N,) grid bersama / (M, Kb, P) grid per kurva -> (M, Kb, N|P)
+            log_imls = log_imls[..., None, :]
+            return sum(
+                exceedance_rate(mean, sigma, rw, log_imls, truncation_level, dtype)
+                for mean, sigma, rw, _, _ in evals
+            )
+
+        out_imls[:, sl], out_lam[:, sl] = _curve(_rate)
+        if out_dis is not None:
+            out_dis["iml"][:, sl] = iml_at_return_periods(
+                out_imls[:, sl], out_lam[:, sl], disagg["return_periods"]
+            )
+            _accumulate_disagg(out_dis, disagg, sl, evals, truncation_level, dtype)
+
+    return out_imls.transpose(1, 0, 2), out_lam.transpose(1, 0, 2), out_dis
+
+
+def hazard_terms(
+    specs: List[Dict[str, Any]],
+    gmpes: List[List[str]],
+    lons: np.ndarray,
+    lats: np.ndarray,
+    imt: str,
+    imls: np.ndarray,
+    vs30: np.ndarray,
+    z1pt0: Optional[np.ndarray] = None,
+    z2pt5: Optional[np.ndarray] = None,
+    near: Optional[np.ndarray] = None,
+    truncation_level: Optional[float] = None,
+    dtype=np.float64,
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Kontribusi laju exceedance per (sumber, GMPE) tanpa bobot, untuk logic tree:
+    gmpes[i] = daftar GMPE kandidat sumber i.
+    Return (terms (K, n_sumber, n_gmpe, N_iml), codes) ; terms[:, i, j] = 0 kalau
+    GMPE codes[j] bukan kandidat sumber i.
+    """
+    n_sites = len(np.atleast_1d(lons))
+    log_imls = np.log(np.asarray(imls, dtype=float))
+    codes = sorted({c for items in gmpes for c in items})
+    col = {c: j for j, c in enumerate(codes)}
+
+    terms = np.zeros((n_sites, len(specs), len(codes), len(log_imls)))
+    for sl, code, items, sizes, mean, sigma, rate, _ in _gmpe_batches(
+        specs, lons, lats, (imt,), vs30, z1pt0, z2pt5, near,
+        gmpes=[[(c, 1.0) for c in items] for items in gmpes],
+    ):
+        poe = exceedance_probability(mean[0], sigma[0], log_imls, truncation_level, dtype)
+        poe *= rate[..., None]
+        # jumlah per segmen sumber: (Kb, S, N) -> (Kb, n_item, N)
+        seg = np.add.reduceat(poe, np.concatenate([[0], np.cumsum(sizes)[:-1]]), axis=1)
+        terms[sl, [i for i, _ in items], col[code]] += seg
+    return terms, codes
+
+
+def disagg_stats(out: Dict[str, np.ndarray], bins: Dict[str, Any], imt_index: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Histogram disagregasi satu IMT -> array (K, RP, ...): iml, mean & mode
+    [mag, dist, eps], fraksi kontribusi per bin M-R-eps dan per sumber.
+    NaN kalau RP di luar rentang kurva.
+    """
+    mre = out["mre"][imt_index]
+    total = mre.sum(axis=(-3, -2, -1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "iml": out["iml"][imt_index],
+            "mean": out["moments"][imt_index] / total[..., None],
+            "mode": histogram_mode(mre, [bin_centers(bins[k]) for k in ("mag", "dist", "eps")]),
+            "mag_dist_eps": mre / total[..., None, None, None],
+            "sources": out["src"][imt_index] / total[..., None],
+        }
+
+
+def disagg_summaries(
+    out: Dict[str, np.ndarray],
+    bins: Dict[str, Any],
+    specs: List[Dict[str, Any]],
+    req: DisaggRequest,
+    imt_index: int = 0,
+    full: bool = False,
+) -> List[List[DisaggSummary]]:
+    """
+    Histogram hasil curves_for_sites -> per site daftar DisaggSummary (atau
+    DisaggResult lengkap dengan matriks M-R-eps kalau full=True), satu per RP.
+    """
+    stats = disagg_stats(out, bins, imt_index)
+    frac, src = stats["mag_dist_eps"], stats["sources"]
+    means, modes = _nan_to_none(stats["mean"]), _nan_to_none(stats["mode"])
+    iml = _nan_to_none(stats["iml"])
+
+    trts = sorted({spec["mechanism"] for spec in specs})
+    trt_of = np.array([trts.index(spec["mechanism"]) for spec in specs])
+    by_trt = np.stack([src[..., trt_of == t].sum(axis=-1) for t in range(len(trts))], axis=-1)
+
+    def _fractions(names, values):
+        return None if np.isnan(values).any() else {n: float(v) for n, v in zip(names, values)}
+
+    rows = []
+    for k in range(len(frac)):
+        row = []
+        for r, rp in enumerate(bins["return_periods"]):
+            summary = dict(
+                return_period=rp,
+                iml=iml[k][r],
+                mean_mag=means[k][r][0], mean_dist=means[k][r][1], mean_eps=means[k][r][2],
+                mode_mag=modes[k][r][0], mode_dist=modes[k][r][1], mode_eps=modes[k][r][2],
+                sources=_fractions([spec["name"] for spec in specs], src[k, r]) if req.by_source else None,
+                trts=_fractions(trts, by_trt[k, r]) if req.by_trt else None,
+            )
+            if full:
+                row.append(DisaggResult(
+                    **summary,
+                    mag_edges=bins["mag"].tolist(),
+                    dist_edges=bins["dist"].tolist(),
+                    eps_edges=bins["eps"].tolist(),
+                    mag_dist_eps=np.nan_to_num(frac[k, r]).tolist(),
+                ))
+            else:
+                row.append(DisaggSummary(**summary))
+        rows.append(row)
+    return rows
+
+
+def _iml_at_rps(imls: np.ndarray, lam: np.ndarray, return_periods: List[int]) -> List[Optional[float]]:
+    """IML pada tiap RP untuk satu kurva; di luar rentang kurva -> None."""
+    return _nan_to_none(iml_at_return_periods(imls, lam, return_periods))
+
+
+def _nan_to_none(values: np.ndarray) -> list:
+    """Array IML (..., R) -> list bertingkat, NaN -> None (JSON-safe)."""
+    arr = np.asarray(values, dtype=object)
+    arr[np.isnan(np.asarray(values, dtype=float))] = None
+    return arr.tolist()
+
+
+def run_psha_analysis(req: HazardRequest, db: Session) -> HazardResult:
+    """
+    Analisis PSHA single-site: integrasi sumber (GR x geometri) dan GMPE logic tree
+    per datasource, lalu inversi kurva ke IML pada return period yang diminta.
+    """
+    parse_imt(req.imt)
+    specs, index = load_sources(db, req.datasource_ids, req.integration_distance)
+    bins = disagg_bins(specs, req.disagg) if req.disagg else None
+
+    imls, lam, dis = curves_for_sites(
+        specs, req.site_lon, req.site_lat, (req.imt,), req.imls, req.return_periods,
+        req.vs30, req.z1pt0, req.z2pt5,
+        near=index.sources_within(req.site_lon, req.site_lat),
+        truncation_level=req.truncation_level,
+        dtype=req.precision,
+        disagg=bins,
+    )
+    imls, lam = imls[0, 0], lam[0, 0]
+    # Poisson, 1 tahun
+    poe_annual = 1.0 - np.exp(-lam)
+
+    return HazardResult(
+        site_lat=req.site_lat,
+        site_lon=req.site_lon,
+        return_period=req.return_periods[0] if req.return_periods else 0,
+        imt=req.imt,
+        results=[
+            HazardResultPoint(iml=float(x), prob=float(p)) for x, p in zip(imls, poe_annual)
+        ],
+        iml_at_return_periods=[
+            ReturnPeriodIML(return_period=rp, iml=v)
+            for rp, v in zip(req.return_periods, _iml_at_rps(imls, lam, req.return_periods))
+        ],
+        disagg=disagg_summaries(dis, bins, specs, req.disagg, full=True)[0] if bins else [],
+    )
+
+
+def run_uhs(req: UHSRequest, db: Session) -> UHSResult:
+    """
+    Uniform Hazard Spectrum single-site: semua IMT dievaluasi dalam satu pass
+    (1 context per GMPE per batch, dipakai bersama semua periode), lalu tiap
+    kurva diinversi ke IML pada return period yang diminta.
+    """
+    imts = [parse_imt(name) for name in dict.fromkeys(req.imts)]
+    if not imts:
+        raise ValueError("Minimal 1 IMT harus dipilih")
+    # urut periode (PGA = 0) supaya spektrum langsung bisa diplot
+    imts.sort(key=lambda i: i.period)
+
+    specs, index = load_sources(db, req.datasource_ids, req.integration_distance)
+
+    imls, lam, _ = curves_for_sites(
+        specs, req.site_lon, req.site_lat, [i.string for i in imts], req.imls, req.return_periods,
+        req.vs30, req.z1pt0, req.z2pt5,
+        near=index.sources_within(req.site_lon, req.site_lat),
+        truncation_level=req.truncation_level,
+        dtype=req.precision,
+    )
+
+    imls, lam = imls[0], lam[0]
+    at_rp = _nan_to_none(iml_at_return_periods(imls, lam, req.return_periods))
+    return UHSResult(
+        site_lat=req.site_lat,
+        site_lon=req.site_lon,
+        # Poisson, 1 tahun
+        curves={
+            i.string: [HazardResultPoint(iml=float(x), prob=float(p)) for x, p in zip(x_imt, 1.0 - np.exp(-curve))]
+            for i, x_imt, curve in zip(imts, imls, lam)
+        },
+        spectra=[
+            UHSSpectrum(
+                return_period=rp,
+                points=[
+                    UHSPoint(imt=i.string, period=i.period, iml=values[k])
+                    for i, values in zip(imts, at_rp)
+                ],
+            )
+            for k, rp in enumerate(req.return_periods)
+        ],
+    )
+
+
+# --------- multi-site ----------
+def grid_sites(grid) -> Tuple[np.ndarray, np.ndarray]:
+    """GridSpec (bbox + spacing derajat) -> array lon, lat semua titik grid."""
+    if grid.spacing <= 0:
+        raise ValueError("spacing grid harus > 0.")
+    lats = np.arange(grid.min_lat, grid.max_lat + grid.spacing * 1e-6, grid.spacing)
+    lons = np.arange(grid.min_lon, grid.max_lon + grid.spacing * 1e-6, grid.spacing)
+    lon2d, lat2d = np.meshgrid(lons, lats)
+    return lon2d.ravel(), lat2d.ravel()
+
+
+def _site_depths(values: Sequence[Optional[float]], default: Optional[float], vs30: np.ndarray, name: str):
+    """
+    Kedalaman per site (z1pt0 m / z2pt5 km): kosong -> default request -> korelasi
+    vs30 OpenQuake. Semua kosong -> None (get_site_params yang mengisi dari vs30).
+    """
+    arr = np.array([np.nan if v is None else v for v in values], dtype=float)
+    if default is not None:
+        arr[np.isnan(arr)] = default
+    missing = np.isnan(arr)
+    if missing.all():
+        return None
+    if missing.any():
+        with IMPORT_LOCK:
+            from openquake.hazardlib.site import calculate_z1pt0, calculate_z2pt5
+
+        arr[missing] = (calculate_z1pt0 if name == "z1pt0" else calculate_z2pt5)(vs30[missing])
+    return arr
+
+
+def collect_sites(req: MultiSiteRequest, db: Session) -> Dict[str, Optional[np.ndarray]]:
+    """
+    Kumpulkan site dari daftar eksplisit, SiteParameter project, atau grid:
+    lon, lat, vs30, dan z1pt0 (m) / z2pt5 (km) per site (None = dari vs30).
+    """
+    if req.sites:
+        lons = np.array([s.lon for s in req.sites], dtype=float)
+        lats = np.array([s.lat for s in req.sites], dtype=float)
+        vs30 = np.array([s.vs30 or req.vs30 for s in req.sites], dtype=float)
+        z1 = [s.z1pt0 for s in req.sites]
+        z2 = [s.z2pt5 for s in req.sites]
+    elif req.project_id is not None:
+        rows = (
+            db.query(SiteParameter.longitude, SiteParameter.latitude, SiteParameter.vs30,
+                     SiteParameter.z1p0, SiteParameter.z2p5)
+            .filter(SiteParameter.project_id == req.project_id)
+            .order_by(SiteParameter.id)
+            .all()
+        )
+        lons = np.array([r[0] for r in rows], dtype=float)
+        lats = np.array([r[1] for r in rows], dtype=float)
+        vs30 = np.array([r[2] or req.vs30 for r in rows], dtype=float)
+        z1 = [r[3] for r in rows]
+        # SiteParameter menyimpan z2p5 dalam meter; GMPE OpenQuake memakai km
+        z2 = [None if r[4] is None else r[4] / 1000.0 for r in rows]
+    elif req.grid is not None:
+        lons, lats = grid_sites(req.grid)
+        vs30 = np.full(len(lons), req.vs30, dtype=float)
+        z1 = z2 = [None] * len(lons)
+    else:
+        raise ValueError("Isi salah satu: sites, project_id, atau grid.")
+
+    if len(lons) == 0:
+        raise ValueError("Tidak ada site untuk dihitung.")
+    if len(lons) > req.max_sites:
+        raise ValueError(f"Jumlah site ({len(lons)}) melebihi batas {req.max_sites}.")
+    return {
+        "lon": lons,
+        "lat": lats,
+        "vs30": vs30,
+        "z1pt0": _site_depths(z1, req.z1pt0, vs30, "z1pt0"),
+        "z2pt5": _site_depths(z2, req.z2pt5, vs30, "z2pt5"),
+    }
+
+
+def _hazard_chunk(
+    specs: List[Dict[str, Any]],
+    lons: np.ndarray,
+    lats: np.ndarray,
+    vs30: np.ndarray,
+    z1pt0: Optional[np.ndarray],
+    z2pt5: Optional[np.ndarray],
+    imt: str,
+    imls: Optional[np.ndarray],
+    return_periods: List[int],
+    near: Optional[np.ndarray] = None,
+    truncation_level: Optional[float] = None,
+    dtype=np.float64,
+    bins: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Task worker: hazard satu potongan site -> array hasil (tanpa objek pydantic,
+    murah di-pickle): kurva imls/lam (K, N), iml_at_rp (K, R), dan histogram
+    disagregasi kalau diminta.
+    """
+    imls, lam, dis = curves_for_sites(
+        specs, lons, lats, (imt,), imls, return_periods, vs30, z1pt0, z2pt5,
+        near=near, truncation_level=truncation_level, dtype=dtype, disagg=bins,
+    )
+    imls, lam = imls[:, 0], lam[:, 0]
+    return {
+        "imls": imls,
+        "lam": lam,
+        # inversi semua site sekaligus: (K, N) -> (K, R)
+        "iml_at_rp": iml_at_return_periods(imls, lam, return_periods),
+        "disagg": dis,
+    }
+
+
+def prepare_multi_site(req: MultiSiteRequest, db: Session) -> Dict[str, Any]:
+    """
+    Semua kerja yang butuh DB (sumber + site) dilakukan di sini, sebelum hitungan,
+    supaya error input keluar sebagai 400 dan generator tidak memegang session.
+    """
+    parse_imt(req.imt)
+    specs, index = load_sources(db, req.datasource_ids, req.integration_distance)
+    sites = collect_sites(req, db)
+    # stream tidak bisa lagi jadi 400 setelah dimulai -> cek koefisien GMPE untuk IMT di depan
+    check_imt_support((code for spec in specs for code, _ in spec["gmpes"]), (req.imt,))
+    imls = np.asarray(req.imls, dtype=float) if req.imls else None
+    n = len(sites["lon"])
+    return {
+        "req": req,
+        "specs": specs,
+        "index": index,
+        "sites": sites,
+        "imls": imls,
+        "bins": disagg_bins(specs, req.disagg) if req.disagg else None,
+        "chunks": [slice(i, min(i + req.chunk_size, n)) for i in range(0, n, req.chunk_size)],
+    }
+
+
+def iter_multi_site_chunks(
+    plan: Dict[str, Any], ordered: bool = False
+) -> Iterator[Tuple[slice, Dict[str, Any]]]:
+    """
+    Generator (slice site, array hasil) per potongan site, di-yield begitu potongan selesai.
+    Jumlah potongan yang sedang dihitung dibatasi (2 x worker), jadi memori
+    tetap datar berapapun ukuran grid dan selambat apapun konsumennya.
+    ordered=True -> urutan potongan sama dengan urutan site.
+    """
+    req, specs, sites, imls = plan["req"], plan["specs"], plan["sites"], plan["imls"]
+    chunks = plan["chunks"]
+
+    def _args(sl):
+        # pruning dihitung di proses utama; worker cukup menerima mask (site x sumber)
+        lons, lats = sites["lon"][sl], sites["lat"][sl]
+        near = plan["index"].sources_within(lons, lats)
+        z1pt0, z2pt5 = (None if sites[k] is None else sites[k][sl] for k in ("z1pt0", "z2pt5"))
+        return (
+            specs, lons, lats, sites["vs30"][sl], z1pt0, z2pt5, req.imt, imls, req.return_periods, near,
+            req.truncation_level, req.precision, plan["bins"],
+        )
+
+    pool = get_pool()
+    if pool is None or len(chunks) == 1:
+        for sl in chunks:
+            yield sl, _hazard_chunk(*_args(sl))
+        return
+
+    window = 2 * max(1, COMPUTE_WORKERS)
+    pending = {}
+    todo = iter(chunks)
+    try:
+        for sl in islice(todo, window):
+            pending[pool.submit(_hazard_chunk, *_args(sl))] = sl
+        while pending:
+            if ordered:
+                fut = next(iter(pending))
+                fut.result()
+            else:
+                fut = next(iter(wait(pending, return_when=FIRST_COMPLETED).done))
+            sl = pending.pop(fut)
+            for nxt in islice(todo, 1):
+                pending[pool.submit(_hazard_chunk, *_args(nxt))] = nxt
+            yield sl, fut.result()
+    finally:
+        # klien putus di tengah stream -> batalkan potongan yang belum jalan
+        for fut in pending:
+            fut.cancel()
+
+
+def grid_points(plan: Dict[str, Any], sl: slice, chunk: Dict[str, Any]) -> List[HazardGridPoint]:
+    """Array hasil satu potongan -> HazardGridPoint per site."""
+    req, sites = plan["req"], plan["sites"]
+    rows = _nan_to_none(chunk["iml_at_rp"])
+    dis = [None] * len(rows)
+    if chunk["disagg"] is not None:
+        dis = disagg_summaries(chunk["disagg"], plan["bins"], plan["specs"], req.disagg)
+    return [
+        HazardGridPoint(lat=float(lat), lon=float(lon), iml_at_rp=row, disagg=d)
+        for lon, lat, row, d in zip(sites["lon"][sl], sites["lat"][sl], rows, dis)
+    ]
+
+
+def iter_multi_site(plan: Dict[str, Any], ordered: bool = False) -> Iterator[List[HazardGridPoint]]:
+    """Seperti iter_multi_site_chunks, tapi hasil per potongan sudah berupa HazardGridPoint."""
+    for sl, chunk in iter_multi_site_chunks(plan, ordered):
+        yield grid_points(plan, sl, chunk)
+
+
+def run_multi_site(
+    req: MultiSiteRequest,
+    db: Session,
+    progress: Optional[Callable[[float], None]] = None,
+) -> HazardGridResult:
+    """
+    PSHA multi-site: site dipecah jadi potongan (chunk_size) dan dikirim ke
+    process pool yang sudah memuat OpenQuake; hasil IML@RP per site.
+    progress(fraksi) dipanggil tiap potongan selesai (dipakai job background).
+    """
+    plan = prepare_multi_site(req, db)
+    n_chunks = len(plan["chunks"])
+
+    grid = []
+    for i, points in enumerate(iter_multi_site(plan, ordered=True), start=1):
+        grid.extend(points)
+        if progress is not None:
+            progress(i / n_chunks)
+
+    return HazardGridResult(
+        imt=req.imt,
+        return_periods=req.return_periods,
+        grid=grid,
+        meta={"n_sites": len(grid), "n_chunks": n_chunks, "n_sources": len(plan["specs"])},
+    )
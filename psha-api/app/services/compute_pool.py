@@ -0,0 +1,68 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Sizing: tiap worker web (gunicorn) punya pool sendiri, dan tiap proses pool
+# memuat OpenQuake. Total proses hitung = WEB_CONCURRENCY x COMPUTE_WORKERS, jadi
+# default COMPUTE_WORKERS = bagian CPU per worker web (cpu // WEB_CONCURRENCY).
+# WEB_CONCURRENCY juga dibaca gunicorn sebagai jumlah worker (default 1); kalau
+# jumlah worker diatur lewat --workers, set WEB_CONCURRENCY ke nilai yang sama.
+# COMPUTE_WORKERS=0 -> hitung inline di proses web (tanpa pool).
+WEB_CONCURRENCY = max(1, int(os.environ.get("WEB_CONCURRENCY") or 1))
+COMPUTE_WORKERS = int(os.environ.get("COMPUTE_WORKERS", max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def _init_worker() -> None:
+    """Initializer proses worker: import OpenQuake + registry GMPE sekali per proses."""
+    from app.core.warmup import warmup_openquake
+
+    warmup_openquake()
+
+
+def _ping(_: int = 0) -> int:
+    return os.getpid()
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    """Process pool bersama (lazy); None kalau COMPUTE_WORKERS = 0."""
+    global _pool
+    if COMPUTE_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                # spawn: aman dipakai dari proses web yang sudah punya thread
+                _pool = ProcessPoolExecutor(
+                    max_workers=COMPUTE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+    return _pool
+
+
+def prewarm_pool() -> None:
+    """
+    Paksa semua proses worker start (dan menjalankan initializer) sekarang,
+    bukan saat request multi-site pertama datang.
+    """
+    pool = get_pool()
+    if pool is None:
+        return
+    pids = set(pool.map(_ping, range(COMPUTE_WORKERS * 4)))
+    logger.info(f"✅ Compute pool warm ({len(pids)} proses)")
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
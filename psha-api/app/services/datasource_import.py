@@ -0,0 +1,201 @@
+import math
+import os
+from itertools import groupby
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.datasource import DataSource, DataSourceGMPE
+from app.schemas.datasource import (
+    CoordPoint,
+    DataSourceCreate,
+    DataSourceGMPEBase,
+    DataSourceImportResult,
+    ImportRowError,
+)
+from app.services.gmpe_native import native_gmpe_codes
+from app.services.gmpe_registry import get_registry
+from app.utils.tabular import iter_records
+
+# jumlah sumber per batch validasi + bulk insert
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", 500))
+# error yang dilaporkan paling banyak (sisanya hanya dihitung)
+MAX_IMPORT_ERRORS = 100
+
+# nama kolom legacy / alternatif -> field DataSourceCreate
+_ALIASES = {
+    "source": "name", "nama": "name",
+    "type": "mechanism", "trt": "mechanism", "mekanisme": "mechanism",
+    "mmin": "min_mag", "mmax": "max_mag", "mchar": "char_mag",
+    "beta": "gr_beta", "rate": "gr_rate", "weight": "gr_weight", "w": "gr_weight",
+    "b": "b_value", "a": "a_value",
+    "dip": "dip_angle", "strike": "strike_angle",
+    "gmpe": "gmpes", "gmpe_weights": "gmpes",
+    "latitude": "lat", "longitude": "lon", "z": "depth",
+}
+
+
+def parse_coords(text: str) -> List[Dict[str, float]]:
+    """"lat lon depth; lat lon depth; ..." -> list CoordPoint dict."""
+    out = []
+    for item in filter(None, (p.strip() for p in text.split(";"))):
+        vals = [float(v) for v in item.replace(",", " ").split()]
+        if len(vals) not in (2, 3):
+            raise ValueError(f"Koordinat '{item}' harus 'lat lon [depth]'.")
+        out.append(CoordPoint(lat=vals[0], lon=vals[1], depth=vals[2] if len(vals) == 3 else 0.0).dict())
+    return out
+
+
+def parse_gmpes(text: str) -> List[DataSourceGMPEBase]:
+    """"AbrahamsonSilva1997:0.5;db:sadig1997s:0.5" -> bobot GMPE (bobot kosong = 1)."""
+    out = []
+    for item in filter(None, (p.strip() for p in text.split(";"))):
+        # kode model DB juga memakai ":" -> bobot = bagian setelah ":" terakhir, kalau angka
+        name, _, weight = item.rpartition(":")
+        try:
+            value = float(weight)
+        except ValueError:
+            name, value = item, 1.0
+        out.append(DataSourceGMPEBase(gmpe_name=(name or item).strip(), weight=value))
+    return out
+
+
+def iter_sources(
+    records: Iterable[Tuple[int, Dict[str, str]]]
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Gabungkan record jadi satu dict per sumber. Dua layout:
+    - lebar: satu baris per sumber, geometri di kolom coords_up / coords_down;
+    - panjang (gaya DataSource.txt): satu baris per titik (kolom lat, lon,
+      depth, edge = up/down), baris berurutan dengan name sama = satu sumber.
+    """
+    for name, group in groupby(records, key=lambda r: r[1].get("name")):
+        group = list(group)
+        line, first = group[0]
+        if "lat" not in first and "lon" not in first:
+            # layout lebar: name berulang = sumber berbeda dengan nama sama
+            for line, rec in group:
+                yield line, dict(rec)
+            continue
+        fields = {k: v for k, v in first.items() if k not in ("lat", "lon", "depth", "edge")}
+        up, down = [], []
+        for n, rec in group:
+            if "_error" in rec:
+                fields["_error"] = f"baris {n}: {rec['_error']}"
+            point = f"{rec.get('lat', '')} {rec.get('lon', '')} {rec.get('depth', 0)}"
+            (down if rec.get("edge", "up").lower() in ("down", "bottom", "bawah") else up).append(point)
+        fields["coords_up"] = "; ".join(up)
+        if down:
+            fields["coords_down"] = "; ".join(down)
+        yield line, fields
+
+
+def to_datasource(fields: Dict[str, Any], default_gmpes: List[DataSourceGMPEBase]) -> DataSourceCreate:
+    """Dict sumber (string) -> DataSourceCreate tervalidasi; a/b-value dikonversi ke beta/rate."""
+    data: Dict[str, Any] = dict(fields)
+    if "_error" in data:
+        raise ValueError(data["_error"])
+    b_value = data.pop("b_value", None)
+    a_value = data.pop("a_value", None)
+    if b_value is not None and "gr_beta" not in data:
+        data["gr_beta"] = float(b_value) * math.log(10.0)
+    if a_value is not None and "gr_rate" not in data:
+        if b_value is None or "min_mag" not in data:
+            raise ValueError("a_value butuh b_value dan min_mag.")
+        # laju tahunan M >= Mmin dari log10 N = a - b M
+        data["gr_rate"] = 10.0 ** (float(a_value) - float(b_value) * float(data["min_mag"]))
+    if "mechanism" in data:
+        # TXT dipisah spasi: "Active_Shallow_Crust" -> "Active Shallow Crust"
+        data["mechanism"] = data["mechanism"].replace("_", " ")
+    for key in ("coords_up", "coords_down"):
+        if key in data:
+            data[key] = parse_coords(data[key])
+    data["gmpe_weights"] = parse_gmpes(data.pop("gmpes")) if "gmpes" in data else default_gmpes
+    return DataSourceCreate(**data)
+
+
+def _row_error(line: int, e: Exception) -> ImportRowError:
+    if isinstance(e, ValidationError):
+        msg = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+    else:
+        msg = str(e)
+    return ImportRowError(line=line, error=msg)
+
+
+def _insert_batch(db: Session, project_id: int, batch: List[DataSourceCreate]) -> List[int]:
+    """Bulk insert satu batch: 1 INSERT ... RETURNING untuk sumber + 1 untuk bobot GMPE."""
+    rows = [{**ds.dict(exclude={"gmpe_weights"}), "project_id": project_id} for ds in batch]
+    ids = list(db.scalars(insert(DataSource).returning(DataSource.id, sort_by_parameter_order=True), rows))
+    weights = [
+        {"datasource_id": ds_id, "gmpe_name": w.gmpe_name, "weight": w.weight}
+        for ds_id, ds in zip(ids, batch)
+        for w in ds.gmpe_weights
+    ]
+    if weights:
+        db.execute(insert(DataSourceGMPE), weights)
+    return ids
+
+
+def import_datasources(
+    db: Session,
+    project_id: int,
+    lines: Iterable[str],
+    delimiter: Optional[str] = None,
+    default_gmpes: Optional[List[DataSourceGMPEBase]] = None,
+    dry_run: bool = False,
+) -> DataSourceImportResult:
+    """
+    Import massal datasource dari file tabel (streaming). Sumber divalidasi dan
+    di-insert per batch dalam SATU transaksi: ada baris error -> semua di-rollback
+    dan daftar error dikembalikan; dry_run -> hanya validasi.
+    """
+    default_gmpes = default_gmpes or []
+    known = set(get_registry()) | native_gmpe_codes(db)
+    errors: List[ImportRowError] = []
+    n_errors = 0
+    ids: List[int] = []
+    n_valid = 0
+    batch: List[DataSourceCreate] = []
+
+    def _flush():
+        nonlocal batch
+        if batch and not n_errors and not dry_run:
+            ids.extend(_insert_batch(db, project_id, batch))
+        batch = []
+
+    try:
+        for line, fields in iter_sources(iter_records(lines, delimiter, _ALIASES)):
+            try:
+                ds = to_datasource(fields, default_gmpes)
+                unknown = [w.gmpe_name for w in ds.gmpe_weights if w.gmpe_name not in known]
+                if unknown:
+                    raise ValueError(f"GMPE tidak dikenal: {', '.join(unknown)}")
+            except (ValueError, ValidationError) as e:
+                n_errors += 1
+                if len(errors) < MAX_IMPORT_ERRORS:
+                    errors.append(_row_error(line, e))
+                continue
+            n_valid += 1
+            batch.append(ds)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                _flush()
+        _flush()
+
+        if n_errors or dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return DataSourceImportResult(
+        imported=0 if (n_errors or dry_run) else len(ids),
+        valid=n_valid,
+        n_errors=n_errors,
+        errors=errors,
+        ids=ids if not n_errors else [],
+        dry_run=dry_run,
+    )
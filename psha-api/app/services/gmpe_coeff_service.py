@@ -0,0 +1,204 @@
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.models.gmpe import GMPECoefficient, GMPEModel
+from app.schemas.datasource import ImportRowError
+from app.schemas.gmpe import GMPECoefficientImportResult
+from app.services.gmpe_native import DEFAULT_FORM, NATIVE_GMPE_PREFIX, check_form, invalidate_native
+from app.utils.cache import LRUCache
+from app.utils.coeff_table import PGA_PERIOD, PGV_PERIOD, CoefficientTable
+from app.utils.tabular import iter_records
+
+MAX_COEFF_ERRORS = 100
+
+# satu entry per GMPE: {"fingerprint", "table"}; dibagi semua request di proses ini
+_table_cache = LRUCache(
+    int(os.environ.get("COEFF_CACHE_SIZE", 64)),
+    max_bytes=int(os.environ.get("COEFF_CACHE_BYTES", 32 * 1024 * 1024)),
+    sizeof=lambda entry: entry["table"].nbytes,
+)
+
+# header tabel koefisien legacy (SRModel) -> "period"
+_ALIASES = {"t": "period", "per": "period", "periode": "period", "t(s)": "period", "period(s)": "period"}
+
+
+def _parse_period(text: str) -> float:
+    up = text.strip().upper()
+    if up == "PGA":
+        return PGA_PERIOD
+    if up == "PGV":
+        return PGV_PERIOD
+    return float(text)
+
+
+def legacy_model_name(filename: str) -> str:
+    """"02sadig1997s.txt" -> "sadig1997s" (nomor urut file SRModel dibuang)."""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return re.sub(r"^\d+[_-]?", "", stem) or stem
+
+
+def _model_year(name: str) -> int:
+    m = re.search(r"(19|20)\d{2}", name)
+    return int(m.group(0)) if m else 0
+
+
+# --------- import ----------
+def import_coefficients(
+    db: Session,
+    lines: Iterable[str],
+    name: str,
+    delimiter: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    region: Optional[str] = None,
+    site_type: Optional[str] = None,
+    functional_form: Optional[str] = None,
+) -> GMPECoefficientImportResult:
+    """
+    Import tabel koefisien GMPE (satu baris per periode; kolom "period" atau
+    kolom pertama, PGA/PGV boleh ditulis teks). File tanpa header -> isi
+    `columns`. Koefisien lama model dengan nama sama diganti seluruhnya, dalam
+    satu transaksi; ada baris error -> tidak ada yang disimpan.
+    `functional_form` memilih bentuk fungsi evaluator native (kosong -> bentuk
+    model lama / DEFAULT_FORM kalau kolomnya cocok); kolom wajibnya harus ada.
+    """
+    rows: List[Dict[str, Any]] = []
+    errors: List[ImportRowError] = []
+    n_errors = 0
+    names: List[str] = []
+    for line, rec in iter_records(lines, delimiter, _ALIASES, names=columns):
+        try:
+            if "_error" in rec:
+                raise ValueError(rec["_error"])
+            if "period" not in rec:
+                raise ValueError("Kolom period kosong.")
+            period = _parse_period(rec.pop("period"))
+            coeffs = {}
+            for k, v in rec.items():
+                try:
+                    coeffs[k] = float(v)
+                except ValueError:
+                    raise ValueError(f"{k}: '{v}' bukan angka.")
+        except ValueError as e:
+            n_errors += 1
+            if len(errors) < MAX_COEFF_ERRORS:
+                errors.append(ImportRowError(line=line, error=str(e)))
+            continue
+        names.extend(k for k in coeffs if k not in names)
+        rows.append({"period": period, "coeffs": coeffs})
+
+    periods = [r["period"] for r in rows]
+    if not n_errors and len(set(periods)) != len(periods):
+        n_errors += 1
+        errors.append(ImportRowError(line=0, error="Periode duplikat."))
+    if not rows and not n_errors:
+        raise ValueError("File koefisien kosong.")
+    if n_errors:
+        return GMPECoefficientImportResult(name=name, n_errors=n_errors, errors=errors)
+
+    model = db.query(GMPEModel).filter(GMPEModel.name == name).first()
+    if functional_form:
+        check_form(functional_form, names)
+        form = functional_form
+    else:
+        # tabel yang kolomnya tidak cocok tetap bisa di-import (lookup saja), tanpa evaluator native
+        form = (model.functional_form if model is not None else None) or DEFAULT_FORM
+        try:
+            check_form(form, names)
+        except ValueError:
+            form = None
+
+    try:
+        if model is None:
+            model = GMPEModel(name=name, year=_model_year(name))
+            db.add(model)
+        model.functional_form = form
+        if region is not None:
+            model.region = region
+        if site_type is not None:
+            model.site_type = site_type
+        db.flush()
+        # insert baru dulu, baru hapus yang lama: id terbesar pasti berubah (SQLite bisa
+        # memakai ulang id yang dihapus), jadi fingerprint cache proses lain ikut berubah
+        old_max = db.query(func.max(GMPECoefficient.id)).filter(GMPECoefficient.gmpe_id == model.id).scalar()
+        db.execute(insert(GMPECoefficient), [{**r, "gmpe_id": model.id} for r in rows])
+        if old_max is not None:
+            db.query(GMPECoefficient).filter(
+                GMPECoefficient.gmpe_id == model.id, GMPECoefficient.id <= old_max
+            ).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    invalidate_coefficients(model.id)
+    invalidate_native(name)
+
+    return GMPECoefficientImportResult(
+        gmpe_id=model.id,
+        name=name,
+        code=NATIVE_GMPE_PREFIX + name,
+        functional_form=form,
+        n_periods=len(rows),
+        columns=names,
+        periods=sorted(periods),
+    )
+
+
+# --------- cache ----------
+def _fingerprint(db: Session, gmpe_id: int) -> Tuple[int, Optional[int]]:
+    """(jumlah baris, id terbesar): berubah setiap kali koefisien di-import ulang."""
+    n, max_id = (
+        db.query(func.count(GMPECoefficient.id), func.max(GMPECoefficient.id))
+        .filter(GMPECoefficient.gmpe_id == gmpe_id)
+        .one()
+    )
+    return int(n), max_id
+
+
+def _load_table(db: Session, gmpe_id: int) -> CoefficientTable:
+    rows = (
+        db.query(GMPECoefficient.period, GMPECoefficient.coeffs)
+        .filter(GMPECoefficient.gmpe_id == gmpe_id)
+        .all()
+    )
+    if not rows:
+        raise ValueError(f"GMPE id {gmpe_id} belum punya koefisien.")
+    names: List[str] = []
+    for _, coeffs in rows:
+        names.extend(k for k in coeffs if k not in names)
+    # kolom yang tidak ada di suatu periode -> NaN
+    values = np.array([[coeffs.get(n, np.nan) for n in names] for _, coeffs in rows], dtype=float)
+    return CoefficientTable(names, [p for p, _ in rows], values)
+
+
+def get_coefficient_table(db: Session, gmpe_id: int) -> CoefficientTable:
+    """
+    Tabel koefisien GMPE (array terurut periode) dari cache proses. Validasi
+    cache cukup satu query agregat kecil, jadi import ulang di worker lain
+    tetap terlihat tanpa membaca ulang baris JSONB.
+    """
+    fp = _fingerprint(db, gmpe_id)
+    entry = _table_cache.get(gmpe_id)
+    if entry is None or entry["fingerprint"] != fp:
+        entry = {"fingerprint": fp, "table": _load_table(db, gmpe_id)}
+        _table_cache.put(gmpe_id, entry)
+    return entry["table"]
+
+
+def get_coefficient_table_by_name(db: Session, name: str) -> CoefficientTable:
+    model_id = db.query(GMPEModel.id).filter(GMPEModel.name == name).scalar()
+    if model_id is None:
+        raise ValueError(f"GMPE koefisien '{name}' tidak ditemukan.")
+    return get_coefficient_table(db, model_id)
+
+
+def invalidate_coefficients(gmpe_id: int) -> None:
+    _table_cache.pop(gmpe_id)
+
+
+def coefficient_cache_stats() -> Dict[str, Any]:
+    return _table_cache.stats()
@@ -0,0 +1,197 @@
+import math
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.gmpe import GMPECoefficient, GMPEModel
+from app.utils.coeff_table import CoefficientTable
+
+# kode GMPE di datasource / logic tree untuk model tabel koefisien DB, mis. "db:sadig1997s"
+NATIVE_GMPE_PREFIX = "db:"
+DEFAULT_FORM = "log10_c6"
+# detik; setelah ini tabel dicek ulang ke DB (import ulang dari worker lain ikut terlihat)
+NATIVE_TABLE_TTL = float(os.environ.get("NATIVE_TABLE_TTL", 30.0))
+
+LN10 = math.log(10.0)
+
+# bentuk fungsi: (nama kolom tabel, kolom(nama) -> (M, 1..), mag, rrup, vs30) -> (mean_ln, sigma_ln)
+FormFn = Callable[
+    [Sequence[str], Callable[[str], np.ndarray], np.ndarray, np.ndarray, np.ndarray],
+    Tuple[np.ndarray, np.ndarray],
+]
+# nama -> (fungsi, kolom koefisien wajib)
+_FORMS: Dict[str, Tuple[FormFn, Tuple[str, ...]]] = {}
+
+# nama model -> (tabel, bentuk fungsi, waktu cek terakhir)
+_tables: Dict[str, Tuple[CoefficientTable, str, float]] = {}
+
+
+def functional_form(name: str, columns: Sequence[str]) -> Callable[[FormFn], FormFn]:
+    """Daftarkan bentuk fungsi GMPE parametrik (dipilih lewat gmpe_models.functional_form)."""
+    def _register(fn: FormFn) -> FormFn:
+        _FORMS[name] = (fn, tuple(columns))
+        return fn
+    return _register
+
+
+def available_forms() -> Dict[str, Dict[str, Any]]:
+    return {
+        name: {"equation": (fn.__doc__ or "").strip().splitlines()[0], "columns": list(cols)}
+        for name, (fn, cols) in _FORMS.items()
+    }
+
+
+def check_form(form: str, columns: Sequence[str]) -> None:
+    """ValueError kalau bentuk fungsi tidak dikenal atau kolom koefisien wajibnya tidak ada."""
+    if form not in _FORMS:
+        raise ValueError(f"Bentuk fungsi '{form}' tidak dikenal (tersedia: {', '.join(_FORMS)}).")
+    missing = [c for c in _FORMS[form][1] if c not in columns]
+    if missing:
+        raise ValueError(f"Bentuk fungsi '{form}' butuh kolom koefisien: {', '.join(missing)}.")
+
+
+# --------- bentuk fungsi ----------
+@functional_form("log10_c6", ("c1", "c2", "c3", "c4", "c5", "c6", "sigma"))
+def _log10_c6(coef, col, mag, rrup, vs30):
+    """
+    log10 Y[g] = c1 + c2 M + c3 log10(R + c4 10^(c5 M)) + c6 R (+ cv log10(Vs30/760)).
+    Bentuk atenuasi legacy (tipe Fukushima-Tanaka); sigma dalam log10.
+    """
+    c1, c2, c3, c4, c5, c6 = (col(f"c{i}") for i in range(1, 7))
+    log_y = c1 + c2 * mag + c3 * np.log10(rrup + c4 * 10.0 ** (c5 * mag)) + c6 * rrup
+    if "cv" in coef:
+        log_y = log_y + col("cv") * np.log10(vs30 / 760.0)
+    return log_y * LN10, np.broadcast_to(col("sigma") * LN10, log_y.shape)
+
+
+@functional_form("sadigh1997", ("c1", "c2", "c3", "c4", "c5", "c6", "c7", "sigma"))
+def _sadigh1997(coef, col, mag, rrup, vs30):
+    """
+    ln Y[g] = c1 + c2 M + c3 (8.5 - M)^2.5 + c4 ln(R + exp(c5 + c6 M)) + c7 ln(R + 2).
+    Sadigh et al. (1997), batuan; sigma dalam ln.
+    """
+    c1, c2, c3, c4, c5, c6, c7 = (col(f"c{i}") for i in range(1, 8))
+    ln_y = (
+        c1 + c2 * mag + c3 * np.clip(8.5 - mag, 0.0, None) ** 2.5
+        + c4 * np.log(rrup + np.exp(c5 + c6 * mag)) + c7 * np.log(rrup + 2.0)
+    )
+    return ln_y, np.broadcast_to(col("sigma"), ln_y.shape)
+
+
+# --------- tabel koefisien ----------
+def is_native_gmpe(code: str) -> bool:
+    return code.startswith(NATIVE_GMPE_PREFIX)
+
+
+def native_model_name(code: str) -> str:
+    return code[len(NATIVE_GMPE_PREFIX):]
+
+
+def native_gmpe_codes(db: Session) -> Set[str]:
+    """Kode "db:<nama>" semua model yang punya bentuk fungsi (bisa dievaluasi)."""
+    rows = db.query(GMPEModel.name).filter(GMPEModel.functional_form.isnot(None)).all()
+    return {NATIVE_GMPE_PREFIX + name for (name,) in rows}
+
+
+def native_gmpe_metadata(db: Session, mechanism: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Model tabel koefisien DB yang bisa dievaluasi, format gmpe_metadata (id = kode "db:<nama>")."""
+    out = []
+    for m in db.query(GMPEModel).filter(GMPEModel.functional_form.isnot(None)).order_by(GMPEModel.name):
+        region = m.region or "Global"
+        if mechanism and mechanism.lower() not in region.lower():
+            continue
+        out.append({
+            "id": NATIVE_GMPE_PREFIX + m.name,
+            "name": m.name,
+            "description": f"Tabel koefisien DB ({m.functional_form})",
+            "tectonic_region": region,
+            "req_site_params": ["vs30"],
+            "req_rupture_params": ["mag"],
+            "req_distances": ["rrup"],
+        })
+    return out
+
+
+def native_fingerprint(db: Session, codes: Iterable[str]) -> List[List[Any]]:
+    """[nama, bentuk fungsi, jumlah baris, id terbesar] per model DB yang dipakai (untuk cache key)."""
+    names = sorted({native_model_name(c) for c in codes if is_native_gmpe(c)})
+    if not names:
+        return []
+    rows = (
+        db.query(GMPEModel.name, GMPEModel.functional_form,
+                 func.count(GMPECoefficient.id), func.max(GMPECoefficient.id))
+        .outerjoin(GMPECoefficient, GMPECoefficient.gmpe_id == GMPEModel.id)
+        .filter(GMPEModel.name.in_(names))
+        .group_by(GMPEModel.id, GMPEModel.name, GMPEModel.functional_form)
+        .order_by(GMPEModel.name)
+        .all()
+    )
+    return [list(r) for r in rows]
+
+
+def _load(name: str) -> Tuple[CoefficientTable, str]:
+    # import lokal: modul ini ikut dimuat di proses worker compute pool
+    from app.database import SessionLocal
+    from app.services.gmpe_coeff_service import get_coefficient_table
+
+    with SessionLocal() as db:
+        model = db.query(GMPEModel.id, GMPEModel.functional_form).filter(GMPEModel.name == name).first()
+        if model is None:
+            raise ValueError(f"GMPE '{NATIVE_GMPE_PREFIX}{name}' tidak ditemukan di tabel koefisien.")
+        if not model.functional_form:
+            raise ValueError(f"GMPE '{NATIVE_GMPE_PREFIX}{name}' belum punya bentuk fungsi (import ulang dengan functional_form).")
+        return get_coefficient_table(db, model.id), model.functional_form
+
+
+def native_table(code: str) -> Tuple[CoefficientTable, str]:
+    """(tabel koefisien, bentuk fungsi) model DB; dicek ulang ke DB paling sering tiap NATIVE_TABLE_TTL."""
+    name = native_model_name(code)
+    entry = _tables.get(name)
+    now = time.monotonic()
+    if entry is None or now - entry[2] > NATIVE_TABLE_TTL:
+        table, form = _load(name)
+        check_form(form, table.names)
+        entry = (table, form, now)
+        _tables[name] = entry
+    return entry[0], entry[1]
+
+
+def invalidate_native(name: Optional[str] = None) -> None:
+    if name is None:
+        _tables.clear()
+    else:
+        _tables.pop(name, None)
+
+
+# --------- evaluator ----------
+def evaluate_native(
+    code: str,
+    imts: Sequence[str],
+    mag,
+    rrup,
+    vs30,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluasi GMPE tabel koefisien untuk semua skenario x IMT dalam satu
+    ekspresi NumPy (tanpa context OpenQuake). Koefisien per IMT diambil dari
+    tabel (interpolasi ln T), lalu di-broadcast ke bentuk input.
+    Return (mean_ln, sigma_ln) berbentuk (M, *shape), sama dengan evaluator OQ.
+    """
+    table, form = native_table(code)
+    coef = table.for_imts(imts)  # (M, C)
+    shape = np.broadcast_shapes(np.shape(mag), np.shape(rrup), np.shape(vs30))
+    expand = (slice(None),) + (None,) * len(shape)
+    mag = np.broadcast_to(np.asarray(mag, dtype=float), shape)
+    rrup = np.broadcast_to(np.asarray(rrup, dtype=float), shape)
+    vs30 = np.broadcast_to(np.asarray(vs30, dtype=float), shape)
+
+    def col(name: str) -> np.ndarray:
+        return coef[:, table.column(name)][expand]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean, sigma = _FORMS[form][0](table.names, col, mag, rrup, vs30)
+    return np.ascontiguousarray(np.broadcast_to(mean, (len(imts),) + shape)), np.ascontiguousarray(sigma)
@@ -0,0 +1,189 @@
+import abc
+import importlib
+import json
+import os
+import pkgutil
+import re
+import tempfile
+import threading
+import traceback
+from importlib import metadata
+from typing import Any, Dict, Optional
+
+from app.core.imports import IMPORT_LOCK
+
+# format file index; naikkan kalau struktur entry berubah
+REGISTRY_FORMAT = 1
+
+REGISTRY_DIR = os.environ.get(
+    "GMPE_REGISTRY_DIR", os.path.join(tempfile.gettempdir(), "psha-api")
+)
+
+_lock = threading.Lock()
+_index: Optional[Dict[str, Dict[str, Any]]] = None
+
+
+# --------- utils ----------
+def _safe_str(x: Any) -> str:
+    """ubah konstanta/enum atau abstractproperty jadi string yang aman."""
+    try:
+        if isinstance(x, (abc.abstractproperty, property)):
+            return "Unknown"
+        s = str(x)
+        if s.startswith("TRT."):
+            return s.split(".", 1)[1]
+        return s
+    except Exception:
+        return "Unknown"
+
+
+def _safe_get_list(cls: type, attr: str) -> list:
+    """
+    REQUIRES_* pada beberapa versi OQ adalah abstractproperty.
+    Kembalikan list() kalau bisa, kalau tidak -> [].
+    """
+    try:
+        val = getattr(cls, attr, [])
+        if isinstance(val, (list, tuple)):
+            return list(val)
+        if isinstance(val, (set, frozenset)):
+            # OQ menyimpan REQUIRES_* sebagai frozenset
+            return sorted(val)
+        # kalau callable / abstractproperty -> fallback
+        return []
+    except Exception:
+        return []
+
+
+def openquake_version() -> str:
+    """Versi OpenQuake terpasang, dibaca dari metadata paket (tanpa import OQ)."""
+    for dist in ("openquake.engine", "openquake-engine"):
+        try:
+            return metadata.version(dist)
+        except metadata.PackageNotFoundError:
+            continue
+    with IMPORT_LOCK:
+        from openquake.baselib import __version__
+
+    return __version__
+
+
+def registry_path() -> str:
+    return os.path.join(
+        REGISTRY_DIR, f"gmpe_registry-oq{openquake_version()}-v{REGISTRY_FORMAT}.json"
+    )
+
+
+# --------- build ----------
+def build_registry() -> Dict[str, Dict[str, Any]]:
+    """
+    Scan semua modul openquake.hazardlib.gsim SEKALI dan kumpulkan metadata
+    tiap class GSIM: modul asal, TRT, tahun, dan parameter yang dibutuhkan.
+    """
+    with IMPORT_LOCK:
+        from openquake.hazardlib.gsim.base import GroundShakingIntensityModel as GSIM
+
+        package = importlib.import_module("openquake.hazardlib.gsim")
+    index: Dict[str, Dict[str, Any]] = {}
+
+    for _, modname, ispkg in pkgutil.iter_modules(package.__path__):
+        if ispkg:
+            continue
+        try:
+            with IMPORT_LOCK:
+                module = importlib.import_module(f"openquake.hazardlib.gsim.{modname}")
+        except Exception:
+            traceback.print_exc()
+            continue
+
+        for name, obj in module.__dict__.items():
+            if not (
+                isinstance(obj, type)
+                and issubclass(obj, GSIM)
+                and obj is not GSIM
+                and name != "GMPE"
+            ):
+                continue
+            # class yang di-import ulang dari modul lain cukup dicatat sekali
+            if name in index:
+                continue
+
+            trt = getattr(obj, "DEFINED_FOR_TECTONIC_REGION_TYPE", None)
+            tectonic_val = _safe_str(trt) if trt else "Unknown"
+
+            # cari tahun
+            year_match = re.search(r"(19|20)\d{2}", name) or re.search(r"(19|20)\d{2}", obj.__doc__ or "")
+            year = int(year_match.group()) if year_match else None
+
+            index[name] = {
+                "id": name,
+                "name": name,
+                "module": obj.__module__,
+                "description": (obj.__doc__ or "").strip().split("\n")[0],
+                "tectonic_region": tectonic_val,
+                "year": year,
+                "req_site_params": _safe_get_list(obj, "REQUIRES_SITES_PARAMETERS"),
+                "req_rupture_params": _safe_get_list(obj, "REQUIRES_RUPTURE_PARAMETERS"),
+                "req_distances": _safe_get_list(obj, "REQUIRES_DISTANCES"),
+            }
+    return index
+
+
+def _write_registry(path: str, index: Dict[str, Dict[str, Any]]) -> None:
+    """Tulis atomik (tmp + rename) supaya worker lain tidak membaca file setengah jadi."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _read_registry(path: str) -> Optional[Dict[str, Dict[str, Any]]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# --------- akses ----------
+def get_registry(rebuild: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Index GMPE: class name -> metadata.
+    Urutan: memori proses -> file di disk (per versi OQ) -> scan ulang lalu simpan.
+    """
+    global _index
+    if _index is not None and not rebuild:
+        return _index
+
+    with _lock:
+        if _index is not None and not rebuild:
+            return _index
+
+        path = registry_path()
+        index = None if rebuild else _read_registry(path)
+        if index is None:
+            index = build_registry()
+            try:
+                _write_registry(path, index)
+            except OSError:
+                # disk read-only -> tetap pakai index di memori
+                traceback.print_exc()
+        _index = index
+        return _index
+
+
+def load_gmpe_class(code: str) -> type:
+    """Import HANYA modul tempat class GMPE didefinisikan."""
+    entry = get_registry().get(code)
+    if entry is None:
+        raise ImportError(f"GMPE '{code}' tidak ditemukan di OpenQuake.")
+    with IMPORT_LOCK:
+        module = importlib.import_module(entry["module"])
+    return getattr(module, code)
+
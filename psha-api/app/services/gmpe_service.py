@@ -1,95 +1,31 @@
-import abc
-import importlib
-import pkgutil
-import traceback
-import re
+import hashlib
+import os
 from functools import lru_cache
-from math import erf, sqrt, log
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
-from openquake.hazardlib.gsim.base import GroundShakingIntensityModel as GSIM
-from openquake.hazardlib.imt import from_string
-from openquake.hazardlib.site import Site, SiteCollection
-from openquake.hazardlib.source.rupture import PointRupture
-from openquake.hazardlib.geo.point import Point
-from openquake.hazardlib.const import StdDev
 
-
-# --------- utils ----------
-def _safe_str(x: Any) -> str:
-    """ubah konstanta/enum atau abstractproperty jadi string yang aman."""
-    try:
-        if isinstance(x, (abc.abstractproperty, property)):
-            return "Unknown"
-        s = str(x)
-        if s.startswith("TRT."):
-            return s.split(".", 1)[1]
-        return s
-    except Exception:
-        return "Unknown"
-
-
-def _safe_get_list(cls: type, attr: str) -> List[str]:
-    """
-    REQUIRES_* pada beberapa versi OQ adalah abstractproperty.
-    Kembalikan list() kalau bisa, kalau tidak -> [].
-    """
-    try:
-        val = getattr(cls, attr, [])
-        if isinstance(val, (list, tuple, set)):
-            return list(val)
-        # kalau callable / abstractproperty -> fallback
-        return []
-    except Exception:
-        return []
+# NB: OpenQuake sengaja di-import di dalam fungsi (lazy, di bawah IMPORT_LOCK) supaya
+# import modul ini (dan router yang memakainya) murah; warm-up di app.core.warmup yang memuatnya.
+from app.core.imports import IMPORT_LOCK
+from app.services.gmpe_native import evaluate_native, invalidate_native, is_native_gmpe, native_table
+from app.services.gmpe_registry import _safe_get_list, get_registry, load_gmpe_class
+from app.utils.cache import LRUCache
+from app.utils.geometry import magnitude_width, point_rupture_distances
+from app.utils.psha_math import adaptive_hazard_curve, exceedance_rate, iml_at_return_periods
 
 
 # --------- discovery ----------
 def gmpe_metadata(mechanism: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Daftar GMPE dari index registry (dibangun sekali per versi OQ, disimpan di disk).
+    Tidak ada import modul GSIM di sini.
+    """
     result: List[Dict[str, Any]] = []
-    package = importlib.import_module("openquake.hazardlib.gsim")
-
-    for _, modname, ispkg in pkgutil.iter_modules(package.__path__):
-        if ispkg:
-            continue
-        try:
-            module = importlib.import_module(f"openquake.hazardlib.gsim.{modname}")
-            for name, obj in module.__dict__.items():
-                if (
-                    isinstance(obj, type)
-                    and issubclass(obj, GSIM)
-                    and obj is not GSIM
-                    and name != "GMPE"
-                ):
-                    # cari tectonic region
-                    trt = getattr(obj, "DEFINED_FOR_TECTONIC_REGION_TYPE", None)
-                    tectonic_val = _safe_str(trt) if trt else "Unknown"
-
-                    if mechanism and mechanism.lower() not in tectonic_val.lower():
-                        continue
-
-                    # cari tahun
-                    year_match = re.search(r"(19|20)\d{2}", name) or re.search(r"(19|20)\d{2}", obj.__doc__ or "")
-                    year = int(year_match.group()) if year_match else None
-
-                    result.append(
-                        {
-                            "id": name,
-                            "name": name,
-                            "description": (obj.__doc__ or "").strip().split("\n")[0],
-                            "tectonic_region": tectonic_val,
-                            "year": year,
-                            "req_site_params": _safe_get_list(obj, "REQUIRES_SITES_PARAMETERS"),
-                            "req_rupture_params": _safe_get_list(obj, "REQUIRES_RUPTURE_PARAMETERS"),
-                            "req_distances": _safe_get_list(obj, "REQUIRES_DISTANCES"),
-                        }
-                    )
-
-
-        except Exception:
-            traceback.print_exc()
+    for entry in get_registry().values():
+        if mechanism and mechanism.lower() not in entry["tectonic_region"].lower():
             continue
+        result.append({k: v for k, v in entry.items() if k != "module"})
 
     result.sort(key=lambda x: (x["tectonic_region"], x["id"]))
     return result
@@ -100,19 +36,16 @@ def gmpe_metadata(mechanism: Optional[str] = None) -> List[Dict[str, Any]]:
 @lru_cache(maxsize=256)
 def resolve_gmpe(code: str) -> type:
     """
-    Temukan class GMPE dari OpenQuake berdasarkan nama class (exact),
-    dengan cara scanning modul GSIM sekali lalu cache.
+    Temukan class GMPE dari OpenQuake berdasarkan nama class (exact).
+    Lookup lewat registry -> hanya modul asal class tersebut yang di-import.
     """
-    package = importlib.import_module("openquake.hazardlib.gsim")
-    for _, modname, ispkg in pkgutil.iter_modules(package.__path__):
-        if ispkg:
-            continue
-        module = importlib.import_module(f"openquake.hazardlib.gsim.{modname}")
-        if hasattr(module, code):
-            obj = getattr(module, code)
-            if isinstance(obj, type) and issubclass(obj, GSIM) and obj is not GSIM:
-                return obj
-    raise ImportError(f"GMPE '{code}' tidak ditemukan di OpenQuake.")
+    with IMPORT_LOCK:
+        from openquake.hazardlib.gsim.base import GroundShakingIntensityModel as GSIM
+
+    obj = load_gmpe_class(code)
+    if not (isinstance(obj, type) and issubclass(obj, GSIM) and obj is not GSIM):
+        raise ImportError(f"GMPE '{code}' tidak ditemukan di OpenQuake.")
+    return obj
 
 
 def required_params(gmpe_class: type) -> Dict[str, List[str]]:
@@ -123,26 +56,412 @@ def required_params(gmpe_class: type) -> Dict[str, List[str]]:
     }
 
 
+# --------- cache objek evaluator ----------
+ArrayLike = Union[float, List[float], np.ndarray]
+
+GSIM_CACHE_SIZE = int(os.environ.get("GSIM_CACHE_SIZE", 256))
+SITE_CACHE_SIZE = int(os.environ.get("SITE_CACHE_SIZE", 64))
+
+_gsim_cache = LRUCache(GSIM_CACHE_SIZE)
+_imt_cache = LRUCache(GSIM_CACHE_SIZE)
+_cmaker_cache = LRUCache(GSIM_CACHE_SIZE)
+_site_cache = LRUCache(SITE_CACHE_SIZE)
+
+
+def get_gsim(code: str):
+    """Instance GSIM dipakai ulang (GSIM OQ reentrant, tanpa state per panggilan)."""
+    return _gsim_cache.get_or_create(code, lambda: resolve_gmpe(code)())
+
+
+def get_imt(imt: str):
+    """Objek IMT hasil parse from_string, di-cache per string."""
+    with IMPORT_LOCK:
+        from openquake.hazardlib.imt import from_string
+
+    return _imt_cache.get_or_create(imt, lambda: from_string(imt))
+
+
+def parse_imt(imt: str):
+    """get_imt untuk input user: IMT tidak dikenal -> ValueError (from_string melempar KeyError)."""
+    try:
+        return get_imt(imt)
+    except (KeyError, ValueError):
+        raise ValueError(f"IMT tidak valid: '{imt}'")
+
+
+# grid IML default ditulis dalam g; IMT bersatuan lain (satuan OpenQuake) dikali faktor ini
+IML_UNIT_SCALE = {"PGV": 100.0, "PGD": 100.0}  # cm/s, cm
+
+
+def iml_scale(imt: str) -> float:
+    """Faktor g -> satuan IMT untuk grid IML default (PGV cm/s, PGD cm; SA/PGA/lainnya 1)."""
+    return IML_UNIT_SCALE.get(get_imt(imt).string, 1.0)
+
+
+def get_context_maker(codes: Tuple[str, ...], imts: Tuple[str, ...]):
+    """ContextMaker per kombinasi (GMPE, IMT); ini objek paling mahal untuk dibuat."""
+    with IMPORT_LOCK:
+        from openquake.hazardlib.contexts import ContextMaker
+
+    def _make():
+        gsims = [get_gsim(c) for c in codes]
+        imtls = {get_imt(i).string: [0] for i in imts}
+        return ContextMaker("*", gsims, {"imtls": imtls})
+
+    return _cmaker_cache.get_or_create((tuple(codes), tuple(imts)), _make)
+
+
+def _array_key(x: Optional[ArrayLike]) -> Hashable:
+    """Key hashable untuk skalar/array (array besar -> digest isi)."""
+    if x is None:
+        return None
+    arr = np.asarray(x, dtype=float)
+    if arr.ndim == 0:
+        return float(arr)
+    return (arr.shape, hashlib.blake2b(arr.tobytes(), digest_size=16).hexdigest())
+
+
+def get_site_params(
+    vs30: ArrayLike,
+    z1pt0: Optional[ArrayLike] = None,
+    z2pt5: Optional[ArrayLike] = None,
+    site_key: Optional[Hashable] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Parameter site (vs30, z1pt0, z2pt5) dengan default z1pt0/z2pt5 dari vs30,
+    di-cache per (set site project, vs30, z1pt0, z2pt5).
+    site_key: identitas set site (mis. ("project", id)); opsional.
+    Array hasil read-only karena dipakai bersama antar request.
+    """
+    with IMPORT_LOCK:
+        from openquake.hazardlib.site import calculate_z1pt0, calculate_z2pt5
+
+    key = (site_key, _array_key(vs30), _array_key(z1pt0), _array_key(z2pt5))
+
+    def _make() -> Dict[str, np.ndarray]:
+        # np.array -> salinan, supaya array milik pemanggil tidak ikut read-only
+        v = np.array(vs30, dtype=float)
+        # z1pt0 / z2pt5 kosong -> estimasi dari vs30 (konvensi OQ)
+        out = {
+            "vs30": v,
+            "z1pt0": calculate_z1pt0(v) if z1pt0 is None else np.array(z1pt0, dtype=float),
+            "z2pt5": calculate_z2pt5(v) if z2pt5 is None else np.array(z2pt5, dtype=float),
+        }
+        for arr in out.values():
+            arr.setflags(write=False)
+        return out
+
+    return _site_cache.get_or_create(key, _make)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {
+        "gsim": _gsim_cache.stats(),
+        "imt": _imt_cache.stats(),
+        "context_maker": _cmaker_cache.stats(),
+        "site": _site_cache.stats(),
+        "memo": memo_stats(),
+    }
+
+
+def clear_caches() -> None:
+    for c in (_gsim_cache, _imt_cache, _cmaker_cache, _site_cache, _memo):
+        c.clear()
+    invalidate_native()
+
+
 # --------- evaluator ----------
-def _build_distances(required: List[str], rrup: float) -> Dict[str, np.ndarray]:
+def _build_distances(
+    required: List[str],
+    rrup: np.ndarray,
+    extra: Optional[Dict[str, np.ndarray]] = None,
+    hypo_depth: ArrayLike = 10.0,
+) -> Dict[str, np.ndarray]:
     """
     Buat dict distances sesuai kebutuhan GMPE.
-    Saat ini hanya mendukung 'rrup'. Kalau GMPE minta distance lain -> error eksplisit.
+    Jarak dari pemanggil (`extra`, mis. hasil geometry.rupture_distances) dipakai
+    apa adanya; rjb/rx/ry0/rhypo/repi yang tidak disediakan diturunkan dari rrup
+    dengan asumsi rupture titik. Distance jenis lain -> error eksplisit.
     """
+    extra = extra or {}
     d: Dict[str, np.ndarray] = {}
     if "rrup" in required:
-        d["rrup"] = np.array([rrup], dtype=float)
+        d["rrup"] = np.asarray(rrup, dtype=float)
+    if any(k not in extra for k in required if k != "rrup"):
+        extra = {**point_rupture_distances(rrup, hypo_depth), **extra}
+    for k, v in extra.items():
+        if k in required:
+            d[k] = v
 
-    # cek apakah ada distance lain yang diminta
     unsupported = [k for k in required if k not in d]
     if unsupported:
-        raise ValueError(
-            f"GMPE ini membutuhkan distances {unsupported} yang belum didukung evaluator sederhana. "
-            f"Gunakan GMPE yang hanya butuh 'rrup' atau implementasi perhitungan jarak lengkap."
-        )
+        raise ValueError(f"GMPE ini membutuhkan distances {unsupported} yang belum didukung.")
     return d
 
 
+def _build_context(
+    cmaker: "ContextMaker",
+    mag: np.ndarray,
+    hypo_depth: np.ndarray,
+    sites: Dict[str, np.ndarray],
+    distances: Dict[str, np.ndarray],
+    rupture: Optional[Dict[str, np.ndarray]] = None,
+) -> np.recarray:
+    """
+    Isi recarray context OpenQuake (N skenario) langsung dari array NumPy.
+    Field yang tidak dibutuhkan GMPE tidak ada di dtype -> dilewati.
+    rupture: parameter rupture per skenario (dip, ztor, width, rake), default
+    rupture titik vertikal.
+    """
+    n = len(mag)
+    ctx = cmaker.new_ctx(n)
+    names = set(ctx.dtype.names)
+
+    fields = {
+        # rupture (point rupture: ztor = kedalaman hiposenter)
+        "mag": mag,
+        "rake": 0.0,
+        "dip": 90.0,
+        "width": 0.0,
+        "ztor": hypo_depth,
+        "hypo_depth": hypo_depth,
+        # site
+        "vs30measured": False,
+        "backarc": False,
+    }
+    fields.update(rupture or {})
+    # rupture titik / garis (lebar 0) -> lebar dari skala magnitudo;
+    # beberapa GMPE (mis. ASK14) membagi dengan lebar rupture
+    fields["width"] = np.where(np.asarray(fields["width"]) > 0, fields["width"], magnitude_width(mag))
+    fields.update(sites)
+    fields.update(distances)
+    for name, value in fields.items():
+        if name in names:
+            ctx[name] = value
+    ctx["sids"] = np.arange(n)
+    return ctx
+
+
+def _evaluate_gmpe_imts(
+    code: str,
+    imts: Tuple[str, ...],
+    mag: ArrayLike,
+    rrup: ArrayLike,
+    vs30: ArrayLike,
+    z1pt0: Optional[ArrayLike] = None,
+    z2pt5: Optional[ArrayLike] = None,
+    hypo_depth: ArrayLike = 10.0,
+    site_key: Optional[Hashable] = None,
+    distances: Optional[Dict[str, ArrayLike]] = None,
+    rupture: Optional[Dict[str, ArrayLike]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluasi 1 GMPE untuk N skenario dan M IMT sekaligus (1 context, 1 panggilan
+    OpenQuake), tanpa memo. Return (mean, sigma) berbentuk (M, *shape).
+    Kode "db:<nama>" (tabel koefisien DB) dievaluasi evaluator native NumPy.
+    """
+    if is_native_gmpe(code):
+        return evaluate_native(code, imts, mag, rrup, vs30)
+    distances = distances or {}
+    rupture = rupture or {}
+    cls = resolve_gmpe(code)
+    imt_strs = tuple(get_imt(i).string for i in imts)
+    site = get_site_params(vs30, z1pt0, z2pt5, site_key)
+
+    shape = np.broadcast_shapes(
+        np.shape(mag), np.shape(rrup), np.shape(hypo_depth),
+        *(np.shape(v) for v in site.values()),
+        *(np.shape(v) for v in distances.values()),
+        *(np.shape(v) for v in rupture.values()),
+    )
+
+    def _flat(x: ArrayLike) -> np.ndarray:
+        return np.broadcast_to(np.asarray(x, dtype=float), shape).ravel()
+
+    req = required_params(cls)
+    dists = _build_distances(
+        req["distances"], _flat(rrup), {k: _flat(v) for k, v in distances.items()}, _flat(hypo_depth)
+    )
+
+    cmaker = get_context_maker((code,), imt_strs)
+    ctx = _build_context(
+        cmaker,
+        mag=_flat(mag),
+        hypo_depth=_flat(hypo_depth),
+        sites={k: _flat(v) for k, v in site.items()},
+        distances=dists,
+        rupture={k: _flat(v) for k, v in rupture.items()},
+    )
+    # out: (4, G, M, N) -> [mean, sig, tau, phi]; urutan M mengikuti cmaker.imtls
+    try:
+        out = cmaker.get_mean_stds([ctx], split_by_mag=False)
+    except KeyError as e:
+        # tabel koefisien OQ tidak punya periode tsb (mis. SA(20.0), SA(0)) -> input user, bukan bug
+        raise ValueError(f"IMT {e.args[0] if e.args else e} tidak didukung oleh GMPE '{code}'.")
+    order = [list(cmaker.imtls).index(i) for i in imt_strs]
+    # fancy index -> salinan, tidak menahan seluruh array out di memo
+    return out[0, 0, order].reshape((-1,) + shape), out[1, 0, order].reshape((-1,) + shape)
+
+
+# --------- memo hasil evaluasi ----------
+MEMO_FIELDS = ("mag", "rrup", "vs30", "z1pt0", "z2pt5", "hypo_depth")
+
+
+def _parse_tolerances(raw: str) -> Dict[str, float]:
+    """'mag=0.01,rrup=0.1' -> {'mag': 0.01, 'rrup': 0.1}"""
+    out: Dict[str, float] = {}
+    for part in filter(None, (p.strip() for p in raw.split(","))):
+        name, _, value = part.partition("=")
+        if name.strip() not in MEMO_FIELDS:
+            raise ValueError(f"Toleransi memo tidak dikenal: '{name.strip()}'")
+        out[name.strip()] = float(value)
+    return out
+
+
+def _memo_sizeof(value: Tuple[np.ndarray, np.ndarray]) -> int:
+    # + overhead kasar untuk key & tuple
+    return value[0].nbytes + value[1].nbytes + 256
+
+
+_memo_enabled = os.environ.get("GMPE_MEMO_ENABLED", "true").lower() in ("true", "1")
+# step kuantisasi absolut per input; kosong -> key eksak
+_memo_tolerances: Dict[str, float] = _parse_tolerances(os.environ.get("GMPE_MEMO_TOLERANCES", ""))
+_memo = LRUCache(
+    int(os.environ.get("GMPE_MEMO_MAX_ENTRIES", 4096)),
+    max_bytes=int(os.environ.get("GMPE_MEMO_MAX_BYTES", 64 * 1024 * 1024)),
+    sizeof=_memo_sizeof,
+)
+
+
+def configure_memo(
+    enabled: Optional[bool] = None,
+    max_entries: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    tolerances: Optional[Dict[str, float]] = None,
+) -> None:
+    """
+    Atur memo evaluasi GMPE saat runtime.
+    tolerances: step kuantisasi per input, mis. {"mag": 0.01, "rrup": 0.1, "vs30": 1.0}.
+    Mengubah toleransi mengosongkan memo (key lama tidak sebanding lagi).
+    """
+    global _memo_enabled, _memo_tolerances
+    if enabled is not None:
+        _memo_enabled = enabled
+    _memo.resize(maxsize=max_entries, max_bytes=max_bytes)
+    if tolerances is not None:
+        unknown = set(tolerances) - set(MEMO_FIELDS)
+        if unknown:
+            raise ValueError(f"Toleransi memo tidak dikenal: {sorted(unknown)}")
+        _memo_tolerances = {k: float(v) for k, v in tolerances.items() if v}
+        _memo.clear()
+
+
+def _quantize(name: str, x: Optional[ArrayLike]) -> Optional[ArrayLike]:
+    step = _memo_tolerances.get(name)
+    if not step or x is None:
+        return x
+    return np.round(np.asarray(x, dtype=float) / step) * step
+
+
+def memo_tolerances() -> Dict[str, float]:
+    """Toleransi kuantisasi yang aktif (kosong kalau memo mati): ikut mengubah angka hasil."""
+    return dict(_memo_tolerances) if _memo_enabled else {}
+
+
+def memo_stats() -> Dict[str, Any]:
+    return {**_memo.stats(), "enabled": _memo_enabled, "tolerances": dict(_memo_tolerances)}
+
+
+def evaluate_gmpe_imts(
+    code: str,
+    imts: Sequence[str],
+    mag: ArrayLike,
+    rrup: ArrayLike,
+    vs30: ArrayLike,
+    z1pt0: Optional[ArrayLike] = None,
+    z2pt5: Optional[ArrayLike] = None,
+    hypo_depth: ArrayLike = 10.0,
+    site_key: Optional[Hashable] = None,
+    distances: Optional[Dict[str, ArrayLike]] = None,
+    rupture: Optional[Dict[str, ArrayLike]] = None,
+    memoize: bool = True,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluasi 1 GMPE untuk N skenario dan beberapa IMT sekaligus: context
+    (jarak, site, rupture) dibangun sekali dan dipakai bersama semua IMT.
+    Input sama dengan evaluate_gmpe_array.
+    Hasil di-memo per (GMPE, daftar IMT, input); kalau toleransi kuantisasi aktif,
+    input dibulatkan dulu sehingga input yang hampir sama berbagi hasil.
+    Return: (mean_ln, sigma_total) -> dua array (read-only) berbentuk (M, *shape).
+    """
+    imts = tuple(imts)
+    if not (memoize and _memo_enabled):
+        return _evaluate_gmpe_imts(
+            code, imts, mag, rrup, vs30, z1pt0, z2pt5, hypo_depth, site_key, distances, rupture
+        )
+
+    inputs = dict(mag=mag, rrup=rrup, vs30=vs30, z1pt0=z1pt0, z2pt5=z2pt5, hypo_depth=hypo_depth)
+    inputs = {name: _quantize(name, value) for name, value in inputs.items()}
+    extra = {k: _quantize("rrup", v) for k, v in (distances or {}).items()}
+    # model DB: tabel ikut di key -> import ulang koefisien tidak memakai hasil lama
+    model = native_table(code)[0] if is_native_gmpe(code) else None
+    key = (
+        (code, model, tuple(get_imt(i).string for i in imts))
+        + tuple(_array_key(inputs[n]) for n in MEMO_FIELDS)
+        + tuple((k, _array_key(v)) for k, v in sorted(extra.items()))
+        + tuple((k, _array_key(v)) for k, v in sorted((rupture or {}).items()))
+    )
+
+    def _make() -> Tuple[np.ndarray, np.ndarray]:
+        mean, sigma = _evaluate_gmpe_imts(
+            code, imts, site_key=site_key, distances=extra, rupture=rupture, **inputs
+        )
+        mean.setflags(write=False)
+        sigma.setflags(write=False)
+        return mean, sigma
+
+    return _memo.get_or_create(key, _make)
+
+
+def check_imt_support(codes: Iterable[str], imts: Sequence[str]) -> None:
+    """
+    Pastikan tiap GMPE punya koefisien untuk semua IMT: 1 skenario dummy per GMPE.
+    Dipakai sebelum hitungan yang di-stream, supaya IMT tak didukung jadi 400
+    dan bukan stream yang putus di tengah. ValueError kalau ada yang tidak didukung.
+    """
+    imts = tuple(imts)
+    for code in dict.fromkeys(codes):
+        _evaluate_gmpe_imts(code, imts, mag=6.0, rrup=10.0, vs30=760.0)
+
+
+def evaluate_gmpe_array(
+    code: str,
+    imt: str,
+    mag: ArrayLike,
+    rrup: ArrayLike,
+    vs30: ArrayLike,
+    z1pt0: Optional[ArrayLike] = None,
+    z2pt5: Optional[ArrayLike] = None,
+    hypo_depth: ArrayLike = 10.0,
+    site_key: Optional[Hashable] = None,
+    distances: Optional[Dict[str, ArrayLike]] = None,
+    rupture: Optional[Dict[str, ArrayLike]] = None,
+    memoize: bool = True,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluasi 1 GMPE untuk N skenario sekaligus (1 panggilan OpenQuake).
+    mag, rrup, vs30, z1pt0, z2pt5, hypo_depth boleh skalar atau array
+    dan di-broadcast ke bentuk yang sama.
+    distances: jarak tambahan selain rrup, mis. {"rjb": ..., "rx": ...}.
+    rupture: parameter rupture per skenario, mis. {"dip": ..., "ztor": ..., "width": ...}.
+    Return: (mean_ln, sigma_total) -> dua array (read-only) dengan bentuk hasil broadcast.
+    """
+    mean, sigma = evaluate_gmpe_imts(
+        code, (imt,), mag, rrup, vs30, z1pt0, z2pt5, hypo_depth, site_key, distances, rupture, memoize
+    )
+    return mean[0], sigma[0]
+
+
 def evaluate_gmpe(
     code: str,
     imt: str,
@@ -157,36 +476,43 @@ def evaluate_gmpe(
     Menghitung mean ln(IMT) dan stddevs untuk 1 GMPE dan 1 kondisi (1 site, 1 distance).
     Return: (mean_ln, stddevs)
     """
-    cls = resolve_gmpe(code)
-    imt_obj = from_string(imt)
-
-    site = Site(
-        location=Point(0.0, 0.0),
-        vs30=vs30,
-        vs30measured=False,
-        z1pt0=z1pt0,
-        z2pt5=z2pt5,
+    mean, sigma = evaluate_gmpe_array(
+        code, imt, mag, rrup, vs30, z1pt0, z2pt5, hypo_depth
     )
-    sites = SiteCollection([site])
+    return float(mean), [float(sigma)]
 
-    rupture = PointRupture(
-        mag=mag,
-        hypocenter=Point(0.0, 0.0, hypo_depth),
-        tectonic_region_type=getattr(cls, "DEFINED_FOR_TECTONIC_REGION_TYPE", None),
-    )
 
+# --------- logic tree combiner ----------
+def combine_gmpe_logic_tree_array(
+    items: List[Dict[str, Any]],
+    imt: str,
+    mag: ArrayLike,
+    rrup: ArrayLike,
+    vs30: ArrayLike,
+    z1pt0: Optional[ArrayLike] = None,
+    z2pt5: Optional[ArrayLike] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Versi array dari combine_gmpe_logic_tree: 1 panggilan OpenQuake per GMPE
+    untuk semua skenario (mag, rrup, site) sekaligus.
+    return: (mu_w, sigma_w) array dalam space ln (natural log).
+    """
+    if not items:
+        raise ValueError("Logic tree kosong.")
 
-    req = required_params(cls)
-    distances = _build_distances(req["distances"], rrup)
+    weights = np.array([float(it.get("weight", 1.0)) for it in items], dtype=float)
+    weights = weights / weights.sum()
 
-    gmpe = cls()
-    mean, stddevs = gmpe.get_mean_and_stddevs(
-        sites, rupture, distances, imt_obj, [StdDev.TOTAL]
-    )
-    return float(mean[0]), [float(s) for s in stddevs]
+    mu_w = 0.0
+    var_w = 0.0
+    for it, w in zip(items, weights):
+        mu, sigma = evaluate_gmpe_array(it["code"], imt, mag, rrup, vs30, z1pt0, z2pt5)
+        mu_w = mu_w + w * mu
+        # var total disederhanakan: rata-rata tertimbang dari varians (abaikan antar-model var)
+        var_w = var_w + w * sigma ** 2
+    return np.asarray(mu_w, dtype=float), np.sqrt(var_w)
 
 
-# --------- logic tree combiner ----------
 def combine_gmpe_logic_tree(
     items: List[Dict[str, Any]],
     imt: str,
@@ -201,42 +527,15 @@ def combine_gmpe_logic_tree(
     items: [{code: 'ChiouYoungs2008', weight: 0.5}, ...]
     return: (mu_w, sigma_w) dalam space ln (natural log).
     """
-    if not items:
-        raise ValueError("Logic tree kosong.")
-
-    mus = []
-    sigmas = []
-    weights = []
-
-    for it in items:
-        code = it["code"]
-        w = float(it.get("weight", 1.0))
-        mu, stds = evaluate_gmpe(code, imt, mag, rrup, vs30, z1pt0, z2pt5)
-        sigma = float(stds[0]) if stds else 0.6
-        mus.append(mu)
-        sigmas.append(sigma)
-        weights.append(w)
-
-    w = np.array(weights, dtype=float)
-    w = w / w.sum()
-
-    mu_w = float(np.sum(w * np.array(mus)))
-    # var total disederhanakan: rata-rata tertimbang dari varians (abaikan antar-model var)
-    sigma_w = float(np.sum(w * (np.array(sigmas) ** 2)) ** 0.5)
-    return mu_w, sigma_w
+    mu_w, sigma_w = combine_gmpe_logic_tree_array(
+        items, imt, mag, rrup, vs30, z1pt0, z2pt5
+    )
+    return float(mu_w), float(sigma_w)
 
 
 # --------- hazard curve ----------
-def _lognormal_cdf(x: np.ndarray, mu: float, sigma: float) -> np.ndarray:
-    """
-    CDF lognormal memakai mu/sigma di space ln.
-    """
-    x = np.asarray(x, dtype=float)
-    # hindari log(0)
-    x = np.maximum(x, np.finfo(float).tiny)
-    z = (np.log(x) - mu) / (sigma * sqrt(2.0))
-    return 0.5 * (1.0 + erf(z))
-
+# grid IML adaptif (g) kalau imls tidak diberikan; lihat iml_scale untuk PGV/PGD
+ADAPTIVE_IML_RANGE = (1e-3, 5.0)
 
 def hazard_curve(
     logic: List[Dict[str, Any]],
@@ -244,42 +543,65 @@ def hazard_curve(
     mag: float,
     rrup: List[float],
     vs30: float,
-    imls: List[float],
+    imls: Optional[List[float]] = None,
     z1pt0: Optional[float] = None,
     z2pt5: Optional[float] = None,
     annual_rate: float = 0.01,
+    truncation_level: Optional[float] = None,
+    return_periods: Optional[List[int]] = None,
 ) -> Dict[str, Any]:
     """
-    Hitung hazard curve sederhana:
-    - Ambil mu,sigma (ln) untuk tiap jarak dalam rrup, lalu rata-rata mu (baseline sederhana).
+    Hitung hazard curve sederhana untuk 1 magnitudo:
+    - tiap jarak dalam rrup dianggap skenario dengan peluang sama
+    - PoE(iml) = sum_g w_g * rata-rata_r P(IM > iml | m, r, GMPE g) (kernel exceedance)
     - Asumsi proses Poisson: PoE_annual = 1 - exp(-rate * PoE_iml)
+    imls kosong -> grid adaptif yang dirapatkan di sekitar return_periods.
     Catatan: ini **sederhana** untuk demo/UI; bukan pengganti engine OQ.
     """
-    if not imls:
+    if imls is not None and not imls:
         raise ValueError("Daftar IML kosong.")
 
     if not rrup:
         raise ValueError("Daftar jarak rrup kosong.")
+    if not logic:
+        raise ValueError("Logic tree kosong.")
 
-    # Dapatkan mu,sigma per rrup lalu rata-ratakan (sederhana)
-    mus = []
-    sigmas = []
-    for r in rrup:
-        mu_r, sigma_r = combine_gmpe_logic_tree(
-            logic, imt, mag, float(r), vs30, z1pt0, z2pt5
+    return_periods = return_periods or []
+    weights = np.array([float(it.get("weight", 1.0)) for it in logic], dtype=float)
+    weights = weights / weights.sum()
+    rrup_arr = np.asarray(rrup, dtype=float)
+
+    # (GMPE, skenario) -> satu panggilan kernel untuk matriks (GMPE x skenario x IML)
+    evals = [evaluate_gmpe_array(it["code"], imt, mag, rrup_arr, vs30, z1pt0, z2pt5) for it in logic]
+    mus = np.array([m for m, _ in evals])
+    sigmas = np.array([sg for _, sg in evals])
+    scen_w = weights[:, None] / len(rrup_arr)
+    scen_rate = annual_rate * np.broadcast_to(scen_w, mus.shape).ravel()
+
+    def _rate(log_imls: np.ndarray) -> np.ndarray:
+        return exceedance_rate(mus.ravel(), sigmas.ravel(), scen_rate, log_imls, truncation_level)
+
+    if imls is None:
+        scale = iml_scale(imt)
+        imls_arr, lam = adaptive_hazard_curve(
+            _rate, return_periods, min_iml=ADAPTIVE_IML_RANGE[0] * scale, max_iml=ADAPTIVE_IML_RANGE[1] * scale
         )
-        mus.append(mu_r)
-        sigmas.append(sigma_r)
-
-    mu_eff = float(np.mean(mus))
-    sigma_eff = float(np.mean(sigmas))
-
-    imls_arr = np.array(imls, dtype=float)
-    poe_iml = 1.0 - _lognormal_cdf(imls_arr, mu_eff, sigma_eff)
-    poe_annual = 1.0 - np.exp(-annual_rate * poe_iml)
+    else:
+        imls_arr = np.array(imls, dtype=float)
+        lam = _rate(np.log(imls_arr))
+    poe_annual = 1.0 - np.exp(-lam)
+    at_rp = iml_at_return_periods(imls_arr, lam, return_periods) if return_periods else []
 
     return {
         "imls": imls_arr.tolist(),
         "poe": poe_annual.tolist(),
-        "meta": {"mu_ln": mu_eff, "sigma_ln": sigma_eff, "annual_rate": annual_rate},
+        "meta": {
+            "mu_ln": float(np.sum(scen_w * mus)),
+            "sigma_ln": float(np.sqrt(np.sum(scen_w * sigmas ** 2))),
+            "annual_rate": annual_rate,
+            "iml_at_return_periods": [
+                {"return_period": rp, "iml": None if np.isnan(v) else float(v)}
+                for rp, v in zip(return_periods, at_rp)
+            ],
+        },
     }
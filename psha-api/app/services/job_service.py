@@ -0,0 +1,285 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.job import AnalysisJob
+from app.models.result import Result
+from app.schemas.analysis import HazardRequest, LogicTreeRequest, MultiSiteRequest
+from app.services.analysis_service import run_psha_analysis
+from app.services.gmpe_service import parse_imt
+from app.services.logic_tree_service import run_logic_tree
+from app.services.result_cache import analysis_cache_key, find_cached_result
+from app.services.result_store import store_multi_site
+
+logger = logging.getLogger(__name__)
+
+# jumlah job analisis yang jalan bersamaan per proses web
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+# update progress ke DB paling sering tiap N detik (hindari commit per chunk)
+JOB_PROGRESS_INTERVAL = float(os.environ.get("JOB_PROGRESS_INTERVAL", 1.0))
+# lease job "running": heartbeat tiap JOB_LEASE_SECONDS / 3; tanpa heartbeat selama
+# JOB_LEASE_SECONDS -> proses pemiliknya dianggap mati dan job diantrekan ulang
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", 60.0))
+
+# identitas proses ini (unik antar worker gunicorn dan antar replika)
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_heartbeat: Optional[threading.Thread] = None
+_stop = threading.Event()
+_lock = threading.Lock()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor, _heartbeat
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max(1, JOB_WORKERS), thread_name_prefix="job")
+                _stop.clear()
+                _heartbeat = threading.Thread(target=_heartbeat_loop, name="job-heartbeat", daemon=True)
+                _heartbeat.start()
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor, _heartbeat
+    with _lock:
+        if _executor is not None:
+            # job yang belum selesai tetap "queued"/"running" di DB; lease-nya kedaluwarsa
+            # lalu diantrekan ulang oleh proses lain (atau proses ini saat start lagi)
+            _stop.set()
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+            _heartbeat = None
+
+
+# --------- lease ----------
+def _renew_leases(db: Session) -> int:
+    """Perbarui heartbeat semua job "running" milik proses ini."""
+    n = (
+        db.query(AnalysisJob)
+        .filter(AnalysisJob.status == "running", AnalysisJob.worker_id == WORKER_ID)
+        .update({"heartbeat_at": _now()}, synchronize_session=False)
+    )
+    db.commit()
+    return n
+
+
+def requeue_expired(db: Session) -> int:
+    """
+    Satu UPDATE bersyarat: job "running" yang lease-nya kedaluwarsa (atau tanpa
+    lease, dari versi lama) dikembalikan ke "queued". Job yang masih di-heartbeat
+    proses lain tidak disentuh.
+    """
+    cutoff = _now() - timedelta(seconds=JOB_LEASE_SECONDS)
+    n = db.execute(
+        update(AnalysisJob)
+        .where(
+            AnalysisJob.status == "running",
+            or_(AnalysisJob.heartbeat_at.is_(None), AnalysisJob.heartbeat_at < cutoff),
+        )
+        .values(status="queued", progress=0.0, worker_id=None, heartbeat_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return n
+
+
+def _heartbeat_loop() -> None:
+    """Thread per proses: heartbeat job sendiri + ambil alih job dari proses yang mati."""
+    while not _stop.wait(JOB_LEASE_SECONDS / 3):
+        try:
+            db = SessionLocal()
+            try:
+                _renew_leases(db)
+                requeued = requeue_expired(db)
+            finally:
+                db.close()
+            if requeued:
+                schedule_queued()
+        except Exception as e:
+            logger.error(f"[JOB HEARTBEAT ERROR] {e}", exc_info=True)
+
+
+# --------- validasi ----------
+def parse_params(mode: str, params: Dict[str, Any]):
+    """Validasi params job sesuai mode -> HazardRequest / MultiSiteRequest / LogicTreeRequest."""
+    if mode == "single":
+        req = HazardRequest(**params)
+    elif mode == "multi":
+        req = MultiSiteRequest(**params)
+    elif mode == "logic_tree":
+        req = LogicTreeRequest(**params)
+        if not req.datasource_ids and not req.source_branch_sets:
+            raise ValueError("Minimal 1 datasource harus dipilih")
+        parse_imt(req.imt)
+        return req
+    else:
+        raise ValueError(f"Mode job tidak dikenal: {mode}")
+    if not req.datasource_ids:
+        raise ValueError("Minimal 1 datasource harus dipilih")
+    parse_imt(req.imt)
+    return req
+
+
+# --------- eksekusi ----------
+def _claim(db: Session, job_id: int) -> bool:
+    """Ambil job secara atomik (queued -> running + lease); False kalau sudah diambil worker lain."""
+    now = _now()
+    n = (
+        db.query(AnalysisJob)
+        .filter(AnalysisJob.id == job_id, AnalysisJob.status == "queued")
+        .update(
+            {"status": "running", "started_at": now, "progress": 0.0, "worker_id": WORKER_ID, "heartbeat_at": now},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return n == 1
+
+
+def _finish(db: Session, job: AnalysisJob, result: Result) -> None:
+    job.result_id = result.id
+    job.status = "done"
+    job.progress = 1.0
+    job.finished_at = _now()
+    db.commit()
+
+
+def _run_job(job_id: int) -> None:
+    db = SessionLocal()
+    try:
+        if not _claim(db, job_id):
+            return
+        job = db.get(AnalysisJob, job_id)
+        last = [0.0]
+
+        def progress(frac: float) -> None:
+            now = time.monotonic()
+            if now - last[0] < JOB_PROGRESS_INTERVAL and frac < 1.0:
+                return
+            last[0] = now
+            db.query(AnalysisJob).filter(AnalysisJob.id == job_id, AnalysisJob.worker_id == WORKER_ID).update(
+                {"progress": min(float(frac), 0.99), "heartbeat_at": _now()}, synchronize_session=False
+            )
+            db.commit()
+
+        req = parse_params(job.mode, job.params)
+        key = analysis_cache_key(db, job.mode, req)
+        result = find_cached_result(db, job.project_id, key) if job.use_cache else None
+        if result is not None:
+            # job identik selesai lebih dulu saat job ini masih antre
+            _finish(db, job, result)
+            return
+
+        index = {"type": job.mode, "job_id": job.id, "request": job.params}
+        if job.mode == "multi":
+            # grid bisa ratusan ribu site -> kurva disimpan binary (npz), bukan JSON
+            result = store_multi_site(db, job.project_id, req, index, progress=progress)
+        else:
+            if job.mode == "single":
+                out = run_psha_analysis(req, db)
+            else:
+                out = run_logic_tree(req, db)
+            result = Result(project_id=job.project_id, output={**index, "data": out.dict()})
+            db.add(result)
+        result.cache_key = key
+        db.flush()
+        _finish(db, job, result)
+    except Exception as e:
+        logger.error(f"[JOB ERROR] job {job_id}: {e}", exc_info=True)
+        db.rollback()
+        db.query(AnalysisJob).filter(AnalysisJob.id == job_id).update(
+            {"status": "failed", "error": str(e), "finished_at": _now()}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+# --------- API ----------
+def submit_job(
+    db: Session, project_id: int, mode: str, params: Dict[str, Any], use_cache: bool = True
+) -> AnalysisJob:
+    """
+    Simpan job (status queued) lalu jadwalkan di background; langsung return.
+    Kalau input identik sudah pernah dihitung di project ini, job langsung
+    "done" dengan result yang sama (tanpa dijadwalkan).
+    """
+    req = parse_params(mode, params)  # tolak params invalid sebelum masuk antrean
+    job = AnalysisJob(
+        project_id=project_id, mode=mode, params=params, use_cache=use_cache, status="queued", progress=0.0
+    )
+    cached = find_cached_result(db, project_id, analysis_cache_key(db, mode, req)) if use_cache else None
+    if cached is not None:
+        job.status = "done"
+        job.progress = 1.0
+        job.result_id = cached.id
+        job.started_at = job.finished_at = _now()
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    if cached is None:
+        get_executor().submit(_run_job, job.id)
+    return job
+
+
+def get_job(db: Session, job_id: int) -> Optional[AnalysisJob]:
+    return db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+
+
+def list_jobs(db: Session, project_id: Optional[int] = None, limit: int = 50) -> List[AnalysisJob]:
+    q = db.query(AnalysisJob)
+    if project_id is not None:
+        q = q.filter(AnalysisJob.project_id == project_id)
+    return q.order_by(AnalysisJob.id.desc()).limit(limit).all()
+
+
+def schedule_queued() -> int:
+    """Jadwalkan semua job "queued" di proses ini; _claim mencegah job dihitung dua kali."""
+    db = SessionLocal()
+    try:
+        ids = [
+            r[0]
+            for r in db.query(AnalysisJob.id)
+            .filter(AnalysisJob.status == "queued")
+            .order_by(AnalysisJob.id)
+            .all()
+        ]
+    finally:
+        db.close()
+    for job_id in ids:
+        get_executor().submit(_run_job, job_id)
+    return len(ids)
+
+
+def resume_jobs() -> int:
+    """
+    Dipanggil saat startup: hanya job "running" yang lease-nya kedaluwarsa
+    (proses pemiliknya mati) yang dikembalikan ke antrean; job yang masih
+    dihitung worker / replika lain dibiarkan. Lalu job "queued" dijadwalkan.
+    """
+    db = SessionLocal()
+    try:
+        requeue_expired(db)
+    finally:
+        db.close()
+    n = schedule_queued()
+    if n:
+        logger.info(f"✅ {n} job analisis dilanjutkan")
+    return n
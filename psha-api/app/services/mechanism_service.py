@@ -1,4 +1,5 @@
-from typing import List
+import os
+from typing import Dict, List, Optional
 
 # daftar mekanisme & mapping ke tectonic region type (OQ standard)
 MECHANISMS = [
@@ -11,3 +12,26 @@ MECHANISMS = [
 
 def list_mechanisms() -> List[dict]:
     return MECHANISMS
+
+
+# jarak integrasi (km) per mechanism / TRT: sumber lebih jauh dari ini
+# diabaikan untuk site tsb. Override lewat env, mis.
+# INTEGRATION_DISTANCE="Active Shallow Crust=200,Subduction Interface=400"
+DEFAULT_INTEGRATION_DISTANCE = 300.0
+INTEGRATION_DISTANCE: Dict[str, float] = {
+    "Active Shallow Crust": 200.0,
+    "Stable Continental Crust": 300.0,
+    "Subduction Interface": 400.0,
+    "Subduction IntraSlab": 300.0,
+    "Background Source": 200.0,
+}
+for _part in filter(None, (p.strip() for p in os.environ.get("INTEGRATION_DISTANCE", "").split(","))):
+    _name, _, _value = _part.partition("=")
+    INTEGRATION_DISTANCE[_name.strip()] = float(_value)
+
+
+def integration_distance(mechanism: str, overrides: Optional[Dict[str, float]] = None) -> float:
+    """Jarak integrasi untuk mechanism; overrides (per request) didahulukan."""
+    if overrides and mechanism in overrides:
+        return float(overrides[mechanism])
+    return INTEGRATION_DISTANCE.get(mechanism, DEFAULT_INTEGRATION_DISTANCE)
@@ -0,0 +1,110 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.datasource import DataSource
+from app.models.result import Result
+from app.models.siteparameter import SiteParameter
+from app.schemas.analysis import HazardRequest, LogicTreeRequest, MultiSiteRequest
+from app.services.analysis_service import IML_COARSE_POINTS, IML_REFINE_POINTS
+from app.services.gmpe_native import native_fingerprint
+from app.services.gmpe_registry import openquake_version
+from app.services.gmpe_service import memo_tolerances
+from app.services.mechanism_service import DEFAULT_INTEGRATION_DISTANCE, INTEGRATION_DISTANCE
+from app.services.mfd_service import MFD_VERSION
+from app.services.result_store import STORE_VERSION
+from app.services.source_service import MESH_SPACING_KM
+
+# naikkan kalau algoritma hazard berubah -> semua result lama tidak dipakai lagi dari cache
+ENGINE_VERSION = 2
+
+AnalysisRequest = Union[HazardRequest, MultiSiteRequest, LogicTreeRequest]
+
+
+def _datasource_ids(req: AnalysisRequest) -> List[int]:
+    ids = list(req.datasource_ids)
+    if isinstance(req, LogicTreeRequest):
+        ids += [i for bs in req.source_branch_sets for b in bs.branches for i in b.datasource_ids]
+    return sorted(set(ids))
+
+
+def datasource_fingerprint(ds: DataSource) -> List[Any]:
+    """Semua isi datasource yang mempengaruhi hazard (geometri, MFD, GMPE)."""
+    return [
+        ds.id, ds.name, ds.mechanism, ds.min_mag, ds.max_mag,
+        ds.coords_up, ds.coords_down, ds.gr_beta, ds.gr_rate, ds.gr_weight,
+        ds.mfd_type, ds.mfd_bin_width, ds.char_mag, ds.char_rate,
+        ds.dip_angle, ds.strike_angle,
+        sorted([g.gmpe_name, g.weight] for g in ds.gmpe_weights),
+    ]
+
+
+def engine_settings() -> Dict[str, Any]:
+    """Setting engine (env / runtime) yang ikut menentukan angka hasil."""
+    return {
+        "mesh_spacing_km": MESH_SPACING_KM,
+        "integration_distance": [DEFAULT_INTEGRATION_DISTANCE, sorted(INTEGRATION_DISTANCE.items())],
+        "iml_points": [IML_COARSE_POINTS, IML_REFINE_POINTS],
+        "memo_tolerances": sorted(memo_tolerances().items()),
+    }
+
+
+def _site_digest(db: Session, project_id: int) -> str:
+    """Hash SiteParameter project (urutan id), tanpa membuat objek ORM per baris."""
+    rows = (
+        db.query(SiteParameter.longitude, SiteParameter.latitude, SiteParameter.vs30,
+                 SiteParameter.z1p0, SiteParameter.z2p5)
+        .filter(SiteParameter.project_id == project_id)
+        .order_by(SiteParameter.id)
+        .all()
+    )
+    arr = np.array([[np.nan if v is None else v for v in r] for r in rows], dtype=np.float64)
+    return hashlib.blake2b(arr.tobytes(), digest_size=16).hexdigest()
+
+
+def analysis_cache_key(db: Session, mode: str, req: AnalysisRequest) -> str:
+    """
+    Hash isi semua input analisis: request (setelah default pydantic), isi
+    datasource + bobot GMPE, koefisien GMPE tabel DB yang dipakai, SiteParameter
+    (kalau site diambil dari project), serta versi + setting engine (mesh, jarak
+    integrasi, grid IML, toleransi memo) dan OpenQuake. Datasource, site, atau
+    setting diubah -> key berubah, jadi result lama otomatis tidak terpakai
+    (tanpa invalidasi eksplisit).
+    """
+    ids = _datasource_ids(req)
+    rows = (
+        db.query(DataSource)
+        .options(selectinload(DataSource.gmpe_weights))
+        .filter(DataSource.id.in_(ids))
+        .order_by(DataSource.id)
+        .all()
+    )
+    request = req.dict()
+    codes = {g.gmpe_name for ds in rows for g in ds.gmpe_weights}
+    if isinstance(req, LogicTreeRequest) and req.gmpe_branch_sets:
+        codes |= {w.code for ws in req.gmpe_branch_sets.values() for w in ws}
+    payload: Dict[str, Any] = {
+        "engine": [ENGINE_VERSION, MFD_VERSION, STORE_VERSION, openquake_version(), engine_settings()],
+        "mode": mode,
+        "request": request,
+        "datasources": [datasource_fingerprint(ds) for ds in rows],
+        # koefisien model DB di-import ulang -> key berubah
+        "native_gmpes": native_fingerprint(db, codes),
+    }
+    if isinstance(req, MultiSiteRequest) and not req.sites and req.project_id is not None:
+        payload["sites"] = _site_digest(db, req.project_id)
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def find_cached_result(db: Session, project_id: int, key: str) -> Optional[Result]:
+    """Result terbaru project dengan key yang sama, kalau ada."""
+    return (
+        db.query(Result)
+        .filter(Result.project_id == project_id, Result.cache_key == key)
+        .order_by(Result.id.desc())
+        .first()
+    )
@@ -0,0 +1,271 @@
+import bisect
+import io
+import os
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import LargeBinary, cast, func, update
+from sqlalchemy.orm import Session
+
+from app.models.result import Result
+from app.schemas.analysis import MultiSiteRequest
+from app.services.analysis_service import disagg_stats, iter_multi_site_chunks, prepare_multi_site
+
+# versi layout member npz; naikkan kalau nama / bentuk member berubah
+STORE_VERSION = 1
+# buffer baca blob (1 query substr per buffer)
+READ_BUFFER_BYTES = int(os.environ.get("RESULT_READ_BUFFER_BYTES", 256 * 1024))
+# hasil tulis di atas ini di-spool ke disk sebelum disimpan ke DB
+SPOOL_MAX_BYTES = int(os.environ.get("RESULT_SPOOL_MAX_BYTES", 64 * 1024 * 1024))
+# blob ditulis ke DB per potongan sebesar ini (data = data || potongan)
+WRITE_CHUNK_BYTES = int(os.environ.get("RESULT_WRITE_CHUNK_BYTES", 8 * 1024 * 1024))
+
+
+# --------- tulis ----------
+class ResultWriter:
+    """
+    Tulis result binary (npz = zip berisi .npy) bertahap, satu member per array,
+    sehingga potongan site bisa ditulis begitu selesai dihitung tanpa menahan
+    seluruh grid di memori.
+    """
+
+    def __init__(self):
+        self._file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        self._zip = zipfile.ZipFile(self._file, "w", compression=zipfile.ZIP_DEFLATED)
+        self.members: List[str] = []
+
+    def add(self, name: str, arr: np.ndarray) -> None:
+        with self._zip.open(name + ".npy", "w", force_zip64=True) as f:
+            np.lib.format.write_array(f, np.asanyarray(arr), allow_pickle=False)
+        self.members.append(name)
+
+    def close(self) -> int:
+        """Tutup zip (tulis central directory); return ukuran total dalam byte."""
+        self._zip.close()
+        return self._file.seek(0, io.SEEK_END)
+
+    def iter_chunks(self, size: int = WRITE_CHUNK_BYTES) -> Iterator[bytes]:
+        """Isi file per potongan (setelah close), lalu file sementara dibuang."""
+        self._file.seek(0)
+        try:
+            while True:
+                chunk = self._file.read(size)
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            self._file.close()
+
+
+def chunk_member(name: str, start: int) -> str:
+    """Nama member potongan site, mis. curve_lam/c000500."""
+    return f"{name}/c{start:09d}"
+
+
+def save_binary_result(db: Session, project_id: int, index: Dict[str, Any], writer: ResultWriter) -> Result:
+    """
+    Simpan result npz: index kecil di output (JSON), array di kolom data.
+    Blob di-stream dari file spool ke DB per potongan (UPDATE data = data ||
+    potongan), jadi tidak pernah utuh di memori.
+    """
+    size = writer.close()
+    result = Result(
+        project_id=project_id,
+        format="npz",
+        output={**index, "format": "npz", "store_version": STORE_VERSION, "size": size},
+        data=b"",
+    )
+    db.add(result)
+    db.flush()
+    for chunk in writer.iter_chunks():
+        # CAST: di SQLite "||" menghasilkan TEXT; di PostgreSQL bytea || bytea (no-op)
+        db.execute(
+            update(Result)
+            .where(Result.id == result.id)
+            .values(data=cast(Result.data.concat(chunk), LargeBinary))
+            .execution_options(synchronize_session=False)
+        )
+    db.expire(result, ["data"])
+    return result
+
+
+# --------- baca lazy ----------
+class _BlobReader(io.RawIOBase):
+    """
+    File read-only di atas kolom results.data: tiap read = SELECT substr(...),
+    jadi zip/npz hanya mengambil byte yang dibutuhkan (central directory +
+    member yang diminta), bukan seluruh blob.
+    """
+
+    def __init__(self, db: Session, result_id: int, size: int):
+        self._db = db
+        self._id = result_id
+        self._size = size
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._size}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def readinto(self, buf) -> int:
+        n = min(len(buf), self._size - self._pos)
+        if n <= 0:
+            return 0
+        chunk = (
+            self._db.query(func.substr(Result.data, self._pos + 1, n))
+            .filter(Result.id == self._id)
+            .scalar()
+        )
+        chunk = bytes(chunk or b"")
+        buf[: len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+
+
+@contextmanager
+def open_result(db: Session, result: Result) -> Iterator[np.lib.npyio.NpzFile]:
+    """
+    Buka result npz secara lazy: np.load hanya membaca member yang diakses.
+    """
+    if result.format != "npz":
+        raise ValueError("Result ini tidak disimpan dalam format binary.")
+    raw = io.BufferedReader(_BlobReader(db, result.id, result.output["size"]), buffer_size=READ_BUFFER_BYTES)
+    npz = np.load(raw, allow_pickle=False)
+    try:
+        yield npz
+    finally:
+        npz.close()
+        raw.close()
+
+
+def _chunk_of(index: Dict[str, Any], site: int) -> int:
+    starts = [a for a, _ in index["chunks"]]
+    i = bisect.bisect_right(starts, site) - 1
+    if i < 0 or not (index["chunks"][i][0] <= site < index["chunks"][i][1]):
+        raise ValueError(f"Site {site} di luar rentang result (0..{index['n_sites'] - 1}).")
+    return index["chunks"][i][0]
+
+
+def _none_if_nan(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(v) else float(v) for v in np.asarray(values, dtype=float)]
+
+
+def read_site(db: Session, result: Result, site: int) -> Dict[str, Any]:
+    """Kurva hazard + IML@RP satu site; hanya potongan site tsb yang dibaca."""
+    index = result.output
+    start = _chunk_of(index, site)
+    k = site - start
+    with open_result(db, result) as npz:
+        imls = npz[chunk_member("curve_imls", start)][k]
+        lam = npz[chunk_member("curve_lam", start)][k]
+        out = {
+            "site": site,
+            "lat": float(npz[chunk_member("lat", start)][k]),
+            "lon": float(npz[chunk_member("lon", start)][k]),
+            "imt": index["imt"],
+            # Poisson, 1 tahun
+            "curve": [{"iml": float(x), "prob": float(p)} for x, p in zip(imls, 1.0 - np.exp(-lam))],
+            "iml_at_rp": _none_if_nan(npz[chunk_member("iml_at_rp", start)][k]),
+        }
+        if index.get("disagg_return_periods"):
+            out["disagg"] = {
+                "return_periods": index["disagg_return_periods"],
+                "iml": _none_if_nan(npz[chunk_member("disagg_iml", start)][k]),
+                # [mag, dist, eps] per RP
+                "mean": [_none_if_nan(v) for v in npz[chunk_member("disagg_mean", start)][k]],
+                "mode": [_none_if_nan(v) for v in npz[chunk_member("disagg_mode", start)][k]],
+            }
+    return out
+
+
+def nearest_site(db: Session, result: Result, lat: float, lon: float) -> int:
+    """Indeks site terdekat (derajat, cukup untuk grid); hanya member lon/lat yang dibaca."""
+    with open_result(db, result) as npz:
+        lons, lats = npz["lon"], npz["lat"]
+    d2 = (lons - lon) ** 2 * np.cos(np.radians(lat)) ** 2 + (lats - lat) ** 2
+    return int(np.argmin(d2))
+
+
+def read_period_slice(db: Session, result: Result, return_period: int) -> Dict[str, Any]:
+    """IML satu return period untuk semua site (peta), tanpa membaca kurva."""
+    index = result.output
+    if return_period not in index["return_periods"]:
+        raise ValueError(f"Return period {return_period} tidak ada di result ini.")
+    r = index["return_periods"].index(return_period)
+    with open_result(db, result) as npz:
+        lons, lats = npz["lon"], npz["lat"]
+        values = npz["iml_at_rp"][:, r]
+    return {
+        "imt": index["imt"],
+        "return_period": return_period,
+        "lon": lons.tolist(),
+        "lat": lats.tolist(),
+        "iml": _none_if_nan(values),
+    }
+
+
+def store_multi_site(
+    db: Session,
+    project_id: int,
+    req: MultiSiteRequest,
+    index: Dict[str, Any],
+    progress: Optional[Callable[[float], None]] = None,
+) -> Result:
+    """
+    Jalankan analisis multi-site dan tulis hasilnya langsung ke result npz:
+    kurva (imls, lam) + IML@RP (+ ringkasan disagregasi) per potongan site,
+    ditulis begitu potongan selesai. Index JSON di results.output memuat
+    metadata dan daftar potongan [start, stop).
+    """
+    plan = prepare_multi_site(req, db)
+    sites, chunks = plan["sites"], plan["chunks"]
+    n_sites = len(sites["lon"])
+
+    writer = ResultWriter()
+    writer.add("lon", sites["lon"])
+    writer.add("lat", sites["lat"])
+    iml_at_rp = np.full((n_sites, len(req.return_periods)), np.nan)
+    for i, (sl, chunk) in enumerate(iter_multi_site_chunks(plan), start=1):
+        iml_at_rp[sl] = chunk["iml_at_rp"]
+        writer.add(chunk_member("lon", sl.start), sites["lon"][sl])
+        writer.add(chunk_member("lat", sl.start), sites["lat"][sl])
+        writer.add(chunk_member("curve_imls", sl.start), chunk["imls"])
+        writer.add(chunk_member("curve_lam", sl.start), chunk["lam"])
+        writer.add(chunk_member("iml_at_rp", sl.start), chunk["iml_at_rp"])
+        if chunk["disagg"] is not None:
+            stats = disagg_stats(chunk["disagg"], plan["bins"])
+            for name in ("iml", "mean", "mode"):
+                writer.add(chunk_member(f"disagg_{name}", sl.start), stats[name])
+        if progress is not None:
+            progress(i / len(chunks))
+    writer.add("iml_at_rp", iml_at_rp)
+
+    return save_binary_result(db, project_id, {
+        **index,
+        "imt": req.imt,
+        "return_periods": req.return_periods,
+        "n_sites": n_sites,
+        "chunks": [[sl.start, sl.stop] for sl in chunks],
+        "disagg_return_periods": plan["bins"]["return_periods"] if plan["bins"] else None,
+        "meta": {"n_chunks": len(chunks), "n_sources": len(plan["specs"])},
+    }, writer)
+
+
+def read_raw(db: Session, result: Result) -> bytes:
+    """Seluruh blob npz (untuk diunduh dan dibuka dengan numpy.load)."""
+    if result.format != "npz":
+        raise ValueError("Result ini tidak disimpan dalam format binary.")
+    return db.query(Result.data).filter(Result.id == result.id).scalar()
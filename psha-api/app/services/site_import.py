@@ -0,0 +1,131 @@
+import math
+import os
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.imports import IMPORT_LOCK
+from app.models.siteparameter import SiteParameter
+from app.schemas.datasource import ImportRowError
+from app.schemas.siteparameter import SiteUploadResult
+from app.utils.tabular import iter_records
+
+# baris per INSERT executemany (ribuan site per round-trip, memori datar)
+SITE_CHUNK_SIZE = int(os.environ.get("SITE_CHUNK_SIZE", 5000))
+MAX_SITE_ERRORS = 100
+
+# header template_sites.csv (Latitude,Longitude) + nama kolom alternatif
+_ALIASES = {
+    "lat": "latitude", "y": "latitude",
+    "lon": "longitude", "long": "longitude", "lng": "longitude", "x": "longitude",
+    "z1pt0": "z1p0", "z1.0": "z1p0", "z1": "z1p0",
+    "z2pt5": "z2p5", "z2.5": "z2p5", "z2": "z2p5",
+    "name": "site_name", "site": "site_name",
+}
+_RANGES = {"latitude": (-90.0, 90.0), "longitude": (-180.0, 180.0)}
+
+
+def _parse_site(rec: Dict[str, str], defaults: Dict[str, Optional[float]]) -> Dict[str, object]:
+    if "_error" in rec:
+        raise ValueError(rec["_error"])
+    row: Dict[str, object] = {}
+    for key in ("latitude", "longitude", "vs30", "z1p0", "z2p5"):
+        text = rec.get(key)
+        if text is None:
+            if key in _RANGES:
+                raise ValueError(f"{key} wajib diisi.")
+            row[key] = defaults.get(key)
+            continue
+        try:
+            value = float(text)
+        except ValueError:
+            raise ValueError(f"{key}: '{text}' bukan angka.")
+        if not math.isfinite(value):
+            raise ValueError(f"{key}: '{text}' bukan angka.")
+        lo, hi = _RANGES.get(key, (0.0, math.inf))
+        if not (lo <= value <= hi) or (key == "vs30" and value == 0):
+            raise ValueError(f"{key}={value:g} di luar rentang.")
+        row[key] = value
+    row["site_name"] = rec.get("site_name")
+    return row
+
+
+def _fill_depths(rows: List[Dict[str, object]]) -> None:
+    """z1p0 / z2p5 kosong -> korelasi vs30 OpenQuake (disimpan dalam meter)."""
+    missing = [r for r in rows if r["vs30"] is not None and (r["z1p0"] is None or r["z2p5"] is None)]
+    if not missing:
+        return
+    with IMPORT_LOCK:
+        from openquake.hazardlib.site import calculate_z1pt0, calculate_z2pt5
+
+    vs30 = np.array([r["vs30"] for r in missing], dtype=float)
+    z1 = calculate_z1pt0(vs30)            # m
+    z25 = calculate_z2pt5(vs30) * 1000.0  # km -> m
+    for r, a, b in zip(missing, z1, z25):
+        if r["z1p0"] is None:
+            r["z1p0"] = float(a)
+        if r["z2p5"] is None:
+            r["z2p5"] = float(b)
+
+
+def import_sites(
+    db: Session,
+    project_id: int,
+    lines: Iterable[str],
+    delimiter: Optional[str] = ",",
+    vs30: Optional[float] = 760.0,
+    z1p0: Optional[float] = None,
+    z2p5: Optional[float] = None,
+    derive_depths: bool = True,
+    replace: bool = False,
+) -> SiteUploadResult:
+    """
+    Upload site project dari CSV secara streaming: baris valid di-insert per
+    potongan SITE_CHUNK_SIZE (executemany), baris invalid dilewati dan
+    dilaporkan. Kolom kosong -> default vs30/z1p0/z2p5; z masih kosong dan
+    derive_depths -> dari vs30. replace=True -> site lama project dihapus dulu.
+    Semua potongan dalam satu transaksi (commit di akhir).
+    """
+    defaults = {"vs30": vs30, "z1p0": z1p0, "z2p5": z2p5}
+    errors: List[ImportRowError] = []
+    n_errors = 0
+    inserted = 0
+    chunk: List[Dict[str, object]] = []
+
+    def _flush():
+        nonlocal chunk, inserted
+        if not chunk:
+            return
+        if derive_depths:
+            _fill_depths(chunk)
+        db.execute(insert(SiteParameter), [{**r, "project_id": project_id} for r in chunk])
+        inserted += len(chunk)
+        chunk = []
+
+    try:
+        deleted = 0
+        if replace:
+            deleted = (
+                db.query(SiteParameter)
+                .filter(SiteParameter.project_id == project_id)
+                .delete(synchronize_session=False)
+            )
+        for line, rec in iter_records(lines, delimiter, _ALIASES):
+            try:
+                chunk.append(_parse_site(rec, defaults))
+            except ValueError as e:
+                n_errors += 1
+                if len(errors) < MAX_SITE_ERRORS:
+                    errors.append(ImportRowError(line=line, error=str(e)))
+                continue
+            if len(chunk) >= SITE_CHUNK_SIZE:
+                _flush()
+        _flush()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return SiteUploadResult(inserted=inserted, deleted=deleted, n_errors=n_errors, errors=errors)
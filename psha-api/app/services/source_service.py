@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.models.datasource import DataSource
+from app.utils.cache import LRUCache
+from app.utils.geometry import fault_surface, floating_ruptures
+from app.utils.spatial import SourceIndex
+
+# jarak antar node mesh permukaan sumber (km)
+MESH_SPACING_KM = float(os.environ.get("MESH_SPACING_KM", 5.0))
+
+# satu entry per datasource: mesh permukaan + rupture per set magnitudo
+_geometry_cache = LRUCache(int(os.environ.get("SOURCE_CACHE_SIZE", 512)))
+# set rupture (per array magnitudo, mis. MFD yang diedit) yang disimpan per datasource;
+# total rupture ter-cache <= SOURCE_CACHE_SIZE x RUPTURE_SETS_PER_SOURCE
+RUPTURE_SETS_PER_SOURCE = int(os.environ.get("RUPTURE_SETS_PER_SOURCE", 4))
+# index spasial per set sumber (praktisnya per project)
+_index_cache = LRUCache(int(os.environ.get("SOURCE_INDEX_CACHE_SIZE", 16)))
+
+
+def geometry_fingerprint(ds: DataSource) -> str:
+    """Hash isi geometri datasource; berubah -> mesh dibangun ulang."""
+    raw = json.dumps(
+        [ds.coords_up or [], ds.coords_down or [], ds.dip_angle, ds.strike_angle],
+        sort_keys=True,
+        default=float,
+    )
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _entry(ds: DataSource, spacing: float) -> Dict[str, Any]:
+    fp = geometry_fingerprint(ds)
+    entry = _geometry_cache.get(ds.id)
+    if entry is None or entry["fingerprint"] != fp or entry["spacing"] != spacing:
+        entry = {
+            "fingerprint": fp,
+            "spacing": spacing,
+            "surface": fault_surface(
+                ds.coords_up or [], ds.coords_down or [], ds.dip_angle, ds.strike_angle, spacing
+            ),
+            "ruptures": LRUCache(RUPTURE_SETS_PER_SOURCE),
+        }
+        _geometry_cache.put(ds.id, entry)
+    return entry
+
+
+def source_surface(ds: DataSource, spacing: float = MESH_SPACING_KM) -> Dict[str, Any]:
+    """Mesh permukaan sumber (cache per datasource)."""
+    return _entry(ds, spacing)["surface"]
+
+
+def source_ruptures(
+    ds: DataSource, mags: np.ndarray, spacing: float = MESH_SPACING_KM
+) -> Dict[str, np.ndarray]:
+    """Rupture planar mengambang untuk bin magnitudo `mags` (cache per datasource + mags)."""
+    entry = _entry(ds, spacing)
+    key = np.asarray(mags, dtype=float).round(6).tobytes()
+
+    def _make() -> Dict[str, np.ndarray]:
+        ruptures = floating_ruptures(entry["surface"], mags)
+        for arr in ruptures.values():
+            arr.setflags(write=False)
+        return ruptures
+
+    return entry["ruptures"].get_or_create(key, _make)
+
+
+def source_index(
+    datasources: List[DataSource], max_distance: List[float], spacing: float = MESH_SPACING_KM
+) -> SourceIndex:
+    """
+    Index spasial (KD-tree vertex mesh) untuk sekumpulan datasource, mis. semua
+    sumber satu project. Di-cache per (datasource, geometri, jarak integrasi),
+    jadi edit geometri otomatis memakai index baru.
+    """
+    key = tuple(
+        (ds.id, geometry_fingerprint(ds), float(d)) for ds, d in zip(datasources, max_distance)
+    ) + (spacing,)
+
+    def _make() -> SourceIndex:
+        vertices = [source_surface(ds, spacing)["mesh"].reshape(-1, 3) for ds in datasources]
+        # rupture bisa berada hingga setengah diagonal sel mesh dari vertex terdekat
+        return SourceIndex(vertices, max_distance, margin=spacing / np.sqrt(2.0))
+
+    return _index_cache.get_or_create(key, _make)
+
+
+def invalidate_source(ds_id: int) -> None:
+    """Dipanggil saat datasource diubah / dihapus."""
+    _geometry_cache.pop(ds_id)
+
+
+def geometry_cache_stats() -> Dict[str, Any]:
+    return {"geometry": _geometry_cache.stats(), "index": _index_cache.stats()}
@@ -0,0 +1,132 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Cache LRU sederhana, thread-safe, dengan batas jumlah entry
+    dan (opsional) batas memori dalam byte.
+    Dipakai untuk objek mahal (instance GSIM, ContextMaker, IMT, blok site)
+    dan memo hasil evaluasi GMPE.
+
+    sizeof(value) -> perkiraan ukuran entry dalam byte; wajib kalau max_bytes diisi.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("sizeof wajib diisi kalau max_bytes dipakai.")
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # --------- internal (lock sudah dipegang) ----------
+    def _insert(self, key: Hashable, value: Any) -> None:
+        if key in self._data:
+            self._bytes -= self._sizes.pop(key, 0)
+        size = self._sizeof(value) if self._sizeof else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            # entry lebih besar dari seluruh budget -> tidak disimpan
+            self._data.pop(key, None)
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self._sizes[key] = size
+        self._bytes += size
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._data) > self.maxsize or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            key, _ = self._data.popitem(last=False)
+            self._bytes -= self._sizes.pop(key, 0)
+            self.evictions += 1
+
+    # --------- API ----------
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._insert(key, value)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Ambil dari cache, atau buat lewat factory() lalu simpan.
+        factory dipanggil di luar lock supaya thread lain tidak tertahan;
+        kalau dua thread membuat bersamaan, hasil pertama yang disimpan dipakai.
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        value = factory()
+        with self._lock:
+            if key in self._data:
+                return self._data[key]
+            self._insert(key, value)
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Buang satu entry (invalidasi eksplisit)."""
+        with self._lock:
+            self._bytes -= self._sizes.pop(key, 0)
+            return self._data.pop(key, default)
+
+    def resize(self, maxsize: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if max_bytes is not None:
+                if self._sizeof is None:
+                    raise ValueError("sizeof wajib diisi kalau max_bytes dipakai.")
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            out = {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+            if self.max_bytes is not None:
+                out["bytes"] = self._bytes
+                out["max_bytes"] = self.max_bytes
+            return out
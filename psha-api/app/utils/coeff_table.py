@@ -0,0 +1,87 @@
+import re
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# konvensi periode: PGA = 0, PGV = -1 (seperti OpenQuake CoeffsTable)
+PGA_PERIOD = 0.0
+PGV_PERIOD = -1.0
+_SA = re.compile(r"^SA\(\s*([0-9.eE+-]+)\s*\)$")
+
+
+def imt_period(imt: str) -> float:
+    """"PGA" -> 0, "PGV" -> -1, "SA(0.2)" -> 0.2."""
+    text = imt.strip().upper()
+    if text == "PGA":
+        return PGA_PERIOD
+    if text == "PGV":
+        return PGV_PERIOD
+    m = _SA.match(text)
+    if not m:
+        raise ValueError(f"IMT '{imt}' tidak dikenal.")
+    return float(m.group(1))
+
+
+class CoefficientTable:
+    """
+    Koefisien satu GMPE sebagai array (P, C) terurut periode. Periode spektral
+    (> 0) di antara dua baris diinterpolasi linear terhadap ln(T); PGA / PGV
+    hanya cocok persis.
+    """
+
+    def __init__(self, names: Sequence[str], periods: Sequence[float], values: np.ndarray):
+        periods = np.asarray(periods, dtype=float)
+        values = np.asarray(values, dtype=float).reshape(len(periods), len(names))
+        order = np.argsort(periods, kind="stable")
+        self.names: List[str] = list(names)
+        self.periods = periods[order]
+        self.values = values[order]
+        if np.any(np.diff(self.periods) == 0):
+            raise ValueError("Periode koefisien duplikat.")
+        self._col = {n: j for j, n in enumerate(self.names)}
+        sa = self.periods > 0
+        self._log_sa = np.log(self.periods[sa])
+        self._sa_values = self.values[sa]
+        for arr in (self.periods, self.values, self._log_sa, self._sa_values):
+            arr.setflags(write=False)
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.periods.nbytes + self._sa_values.nbytes
+
+    def column(self, name: str) -> int:
+        if name not in self._col:
+            raise KeyError(f"Koefisien '{name}' tidak ada (tersedia: {', '.join(self.names)}).")
+        return self._col[name]
+
+    def at(self, periods: Sequence[float]) -> np.ndarray:
+        """Koefisien untuk tiap periode -> (len(periods), C), vektoris (satu searchsorted)."""
+        t = np.atleast_1d(np.asarray(periods, dtype=float))
+        out = np.empty((len(t), len(self.names)))
+        exact = np.searchsorted(self.periods, t)
+        hit = (exact < len(self.periods)) & (self.periods[np.minimum(exact, len(self.periods) - 1)] == t)
+        out[hit] = self.values[exact[hit]]
+
+        rest = ~hit
+        if rest.any():
+            tr = t[rest]
+            if np.any(tr <= 0) or len(self._log_sa) < 2:
+                raise ValueError(f"Periode {tr[tr <= 0].tolist() or tr.tolist()} tidak ada di tabel koefisien.")
+            lt = np.log(tr)
+            lo, hi = self._log_sa[0], self._log_sa[-1]
+            if np.any((lt < lo) | (lt > hi)):
+                bad = tr[(lt < lo) | (lt > hi)]
+                raise ValueError(
+                    f"Periode {bad.tolist()} di luar rentang tabel "
+                    f"({np.exp(lo):g}-{np.exp(hi):g} s)."
+                )
+            i = np.clip(np.searchsorted(self._log_sa, lt) - 1, 0, len(self._log_sa) - 2)
+            w = (lt - self._log_sa[i]) / (self._log_sa[i + 1] - self._log_sa[i])
+            out[rest] = self._sa_values[i] + w[:, None] * (self._sa_values[i + 1] - self._sa_values[i])
+        return out
+
+    def for_imts(self, imts: Sequence[str]) -> np.ndarray:
+        return self.at([imt_period(i) for i in imts])
+
+    def as_dict(self, period: float) -> Dict[str, float]:
+        return dict(zip(self.names, self.at([period])[0].tolist()))
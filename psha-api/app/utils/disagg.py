@@ -0,0 +1,48 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+
+# tepi bin epsilon default; nilai di luar rentang masuk bin ujung
+DEFAULT_EPS_EDGES = (-3.0, -2.0, -1.0, 0.0, 1.0, 2.0, 3.0)
+
+
+def bin_edges(lo: float, hi: float, width: float) -> np.ndarray:
+    """Tepi bin selebar `width` yang menutup [lo, hi], dibulatkan ke kelipatan width."""
+    if width <= 0:
+        raise ValueError("Lebar bin harus > 0.")
+    start = np.floor(lo / width) * width
+    n = max(int(np.ceil(round((hi - start) / width, 6))), 1)
+    return start + width * np.arange(n + 1)
+
+
+def bin_index(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Indeks bin tiap nilai; di luar rentang (dan NaN) di-clip ke bin ujung."""
+    idx = np.searchsorted(edges, values, side="right") - 1
+    return np.clip(idx, 0, len(edges) - 2)
+
+
+def bin_centers(edges: np.ndarray) -> np.ndarray:
+    return 0.5 * (edges[:-1] + edges[1:])
+
+
+def add_histogram(hist: np.ndarray, index: Tuple[np.ndarray, ...], weights: np.ndarray) -> None:
+    """
+    hist[index] += weights (in-place) dengan satu np.bincount: index = satu
+    array indeks per sumbu hist, di-broadcast ke bentuk weights.
+    """
+    index = [np.broadcast_to(i, weights.shape) for i in index]
+    flat = np.ravel_multi_index(index, hist.shape)
+    hist += np.bincount(flat.ravel(), weights=weights.ravel(), minlength=hist.size).reshape(hist.shape)
+
+
+def histogram_mode(hist: np.ndarray, centers: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Titik tengah bin dengan kontribusi terbesar untuk hist (..., n1, n2, ...)
+    -> (..., len(centers)); NaN kalau hist kosong.
+    """
+    n_axes = len(centers)
+    lead = hist.shape[:-n_axes]
+    flat = hist.reshape(lead + (-1,))
+    idx = np.unravel_index(flat.argmax(axis=-1), hist.shape[-n_axes:])
+    out = np.stack([np.asarray(c)[i] for c, i in zip(centers, idx)], axis=-1)
+    return np.where(flat.sum(axis=-1, keepdims=True) > 0, out, np.nan)
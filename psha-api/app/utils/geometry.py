@@ -0,0 +1,318 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# radius bumi (km) seperti OQ; km per derajat lintang
+EARTH_RADIUS = 6371.0
+KM_PER_DEG = 111.195
+
+
+def _to_array(coords: List[Dict[str, float]]) -> np.ndarray:
+    """list of {lat, lon, depth} -> array (N, 3) [lon, lat, depth]."""
+    return np.array(
+        [[float(c["lon"]), float(c["lat"]), float(c.get("depth") or 0.0)] for c in coords],
+        dtype=float,
+    ).reshape(-1, 3)
+
+
+def project(lon: np.ndarray, lat: np.ndarray, lon0, lat0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Proyeksi azimuthal equidistant di sekitar (lon0, lat0) -> (x, y) dalam km:
+    jarak great-circle dan azimuth dari origin tepat (bola R = 6371 km, seperti
+    geodetic OQ), jadi tidak melenceng untuk site yang jauh dari origin.
+    lon0/lat0 boleh array (di-broadcast), mis. satu origin per rupture.
+    """
+    lam = np.radians(np.asarray(lon, dtype=float) - lon0)
+    phi, phi0 = np.radians(np.asarray(lat, dtype=float)), np.radians(lat0)
+    cos_phi = np.cos(phi)
+    # haversine (stabil untuk jarak kecil)
+    h = np.sin((phi - phi0) / 2.0) ** 2 + np.cos(phi0) * cos_phi * np.sin(lam / 2.0) ** 2
+    dist = 2.0 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+    az = np.arctan2(
+        np.sin(lam) * cos_phi,
+        np.cos(phi0) * np.sin(phi) - np.sin(phi0) * cos_phi * np.cos(lam),
+    )
+    return dist * np.sin(az), dist * np.cos(az)
+
+
+def resample_line(points: np.ndarray, n: int) -> np.ndarray:
+    """Sampel ulang polyline (N, 3) menjadi n titik berjarak sama sepanjang garis."""
+    if len(points) == 1 or n == 1:
+        return np.repeat(points[:1], n, axis=0)
+    x, y = project(points[:, 0], points[:, 1], points[0, 0], points[0, 1])
+    seg = np.hypot(np.diff(x), np.diff(y))
+    cum = np.concatenate([[0.0], np.cumsum(seg)])
+    if cum[-1] == 0.0:
+        return np.repeat(points[:1], n, axis=0)
+    target = np.linspace(0.0, cum[-1], n)
+    return np.column_stack([np.interp(target, cum, points[:, k]) for k in range(3)])
+
+
+def line_length_km(points: np.ndarray) -> float:
+    if len(points) < 2:
+        return 0.0
+    x, y = project(points[:, 0], points[:, 1], points[0, 0], points[0, 1])
+    return float(np.hypot(np.diff(x), np.diff(y)).sum())
+
+
+# --------- permukaan fault & rupture planar ----------
+# Wells & Coppersmith (1994), semua mekanisme: log10(A) = -3.49 + 0.91 M (km2)
+WC94_A, WC94_B = -3.49, 0.91
+RUPTURE_ASPECT_RATIO = 1.5
+
+
+def magnitude_width(mag) -> np.ndarray:
+    """Lebar rupture (km) dari luas WC1994 dan aspect ratio default."""
+    area = 10.0 ** (WC94_A + WC94_B * np.asarray(mag, dtype=float))
+    return np.sqrt(area / RUPTURE_ASPECT_RATIO)
+
+
+def _azimuth(lon1, lat1, lon2, lat2) -> np.ndarray:
+    """Azimuth (derajat dari utara, searah jarum jam) dari titik 1 ke titik 2."""
+    x, y = project(lon2, lat2, lon1, lat1)
+    return np.degrees(np.arctan2(x, y)) % 360.0
+
+
+def fault_surface(
+    coords_up: List[Dict[str, float]],
+    coords_down: List[Dict[str, float]],
+    dip: Optional[float] = None,
+    strike: Optional[float] = None,
+    spacing: float = 5.0,
+) -> Dict[str, Any]:
+    """
+    Mesh permukaan sumber (n_down, n_along, 3) [lon, lat, depth] berjarak ~spacing km.
+    - coords_up + coords_down -> bidang fault
+    - hanya coords_up         -> trace (lebar 0, dip dari `dip`, default 90)
+    - 1 titik                 -> sumber titik (strike dari `strike`, default 0)
+    """
+    if not coords_up:
+        raise ValueError("Datasource tidak punya koordinat (coords_up kosong).")
+    up = _to_array(coords_up)
+    n_along = max(int(np.ceil(line_length_km(up) / spacing)) + 1, 1)
+    top = resample_line(up, n_along)
+
+    if coords_down:
+        bottom = resample_line(_to_array(coords_down), n_along)
+        x, y = project(bottom[:, 0], bottom[:, 1], top[:, 0], top[:, 1])
+        down_dip = np.sqrt(x ** 2 + y ** 2 + (bottom[:, 2] - top[:, 2]) ** 2)
+        n_down = max(int(np.ceil(down_dip.max() / spacing)) + 1, 1)
+        frac = np.linspace(0.0, 1.0, n_down)[:, None, None]
+        mesh = top[None, :, :] + frac * (bottom - top)[None, :, :]
+    else:
+        mesh = top[None, :, :]
+
+    return {
+        "mesh": mesh,
+        "dip": 90.0 if dip is None else float(dip),
+        "strike": 0.0 if strike is None else float(strike),
+    }
+
+
+def floating_ruptures(surface: Dict[str, Any], mags: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Rupture planar (persegi panjang) yang "mengambang" di mesh permukaan untuk
+    tiap magnitudo: luas dari WC1994 dengan aspect ratio tetap, dibatasi ukuran
+    fault, digeser per sel mesh searah strike dan dip (posisi seragam).
+    Return array per rupture: mag_idx, weight (1/jumlah posisi di magnitudo tsb),
+    lon, lat, depth (sudut awal top edge), strike, dip, length, width,
+    ztor, hypo_depth. Sumber titik / trace -> rupture berukuran 0 / lebar 0.
+    """
+    mesh = surface["mesh"]
+    n_down, n_along = mesh.shape[:2]
+
+    # jarak antar node (rata-rata) di arah strike & dip
+    def _step(a: np.ndarray, b: np.ndarray) -> float:
+        x, y = project(b[..., 0], b[..., 1], a[..., 0], a[..., 1])
+        return float(np.mean(np.sqrt(x ** 2 + y ** 2 + (b[..., 2] - a[..., 2]) ** 2)))
+
+    d_along = _step(mesh[:, :-1], mesh[:, 1:]) if n_along > 1 else 0.0
+    d_down = _step(mesh[:-1], mesh[1:]) if n_down > 1 else 0.0
+
+    area = 10.0 ** (WC94_A + WC94_B * np.asarray(mags, dtype=float))
+    width = np.minimum(magnitude_width(mags), d_down * (n_down - 1))
+    length = np.where(width > 0, area / np.maximum(width, 1e-9), np.sqrt(area * RUPTURE_ASPECT_RATIO))
+
+    cols: Dict[str, List[np.ndarray]] = {k: [] for k in ("mag_idx", "weight", "i", "j", "w", "h")}
+    for m, (length_m, width_m) in enumerate(zip(length, width)):
+        w = int(np.clip(np.rint(length_m / d_along), 1, n_along - 1)) if n_along > 1 else 0
+        h = int(np.clip(np.rint(width_m / d_down), 1, n_down - 1)) if n_down > 1 else 0
+        ii, jj = np.meshgrid(np.arange(n_down - h), np.arange(n_along - w), indexing="ij")
+        n_pos = ii.size
+        cols["mag_idx"].append(np.full(n_pos, m))
+        cols["weight"].append(np.full(n_pos, 1.0 / n_pos))
+        cols["i"].append(ii.ravel())
+        cols["j"].append(jj.ravel())
+        cols["w"].append(np.full(n_pos, w))
+        cols["h"].append(np.full(n_pos, h))
+    c = {k: np.concatenate(v) for k, v in cols.items()}
+
+    origin = mesh[c["i"], c["j"]]
+    end = mesh[c["i"], c["j"] + c["w"]]
+    bottom = mesh[c["i"] + c["h"], c["j"]]
+
+    if n_along > 1:
+        strike = _azimuth(origin[:, 0], origin[:, 1], end[:, 0], end[:, 1])
+        x, y = project(end[:, 0], end[:, 1], origin[:, 0], origin[:, 1])
+        length_r = np.sqrt(x ** 2 + y ** 2 + (end[:, 2] - origin[:, 2]) ** 2)
+    else:
+        strike = np.full(len(origin), surface["strike"])
+        length_r = np.zeros(len(origin))
+
+    if n_down > 1:
+        x, y = project(bottom[:, 0], bottom[:, 1], origin[:, 0], origin[:, 1])
+        dz = bottom[:, 2] - origin[:, 2]
+        dip = np.degrees(np.arctan2(dz, np.hypot(x, y)))
+        width_r = np.sqrt(x ** 2 + y ** 2 + dz ** 2)
+    else:
+        dip = np.full(len(origin), surface["dip"])
+        width_r = np.zeros(len(origin))
+
+    return {
+        "mag_idx": c["mag_idx"],
+        "weight": c["weight"],
+        "lon": origin[:, 0],
+        "lat": origin[:, 1],
+        "depth": origin[:, 2],
+        "strike": strike,
+        "dip": dip,
+        "length": length_r,
+        "width": width_r,
+        "ztor": origin[:, 2],
+        "hypo_depth": origin[:, 2] + 0.5 * width_r * np.sin(np.radians(dip)),
+    }
+
+
+# --------- jarak site-rupture (bola, seperti PlanarSurface OQ) ----------
+def _unit_vectors(lon, lat) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(posisi, timur, utara) sebagai vektor satuan kartesian (..., 3) di (lon, lat)."""
+    lam, phi = np.radians(lon), np.radians(lat)
+    cl, sl, cp, sp = np.cos(lam), np.sin(lam), np.cos(phi), np.sin(phi)
+    pos = np.stack([cp * cl, cp * sl, sp], axis=-1)
+    east = np.stack([-sl, cl, np.zeros_like(lam)], axis=-1)
+    north = np.stack([-sp * cl, -sp * sl, cp], axis=-1)
+    return pos, east, north
+
+
+def _to_lonlat(u: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    return np.degrees(np.arctan2(u[..., 1], u[..., 0])), np.degrees(np.arcsin(np.clip(u[..., 2], -1.0, 1.0)))
+
+
+def _point_at(pos, east, north, azimuth, distance) -> np.ndarray:
+    """Vektor satuan titik sejauh `distance` km dari pos sepanjang great circle berazimuth `azimuth`."""
+    az = np.radians(azimuth)[..., None]
+    ang = (np.asarray(distance, dtype=float) / EARTH_RADIUS)[..., None]
+    return pos * np.cos(ang) + (north * np.cos(az) + east * np.sin(az)) * np.sin(ang)
+
+
+def _arc_normal(lon, lat, azimuth) -> np.ndarray:
+    """Normal bidang great circle lewat (lon, lat) berazimuth `azimuth`; s . n > 0 di kanan arah arc."""
+    pos, east, north = _unit_vectors(lon, lat)
+    az = np.radians(azimuth)[..., None]
+    return np.cross(north * np.cos(az) + east * np.sin(az), pos)
+
+
+def rupture_distances(site_lon, site_lat, ruptures: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Semua jarak OpenQuake (rrup, rjb, rx, ry0, rhypo, repi) dari site ke rupture
+    planar, sekaligus untuk semua site x rupture (tanpa loop).
+    Geometri mengikuti PlanarSurface OQ di bola R = 6371 km: sudut rupture dari
+    point_at sepanjang strike / arah dip, rrup ke bidang lewat sudut-sudut itu
+    dalam kartesian 3D, rx/ry0/rjb dari jarak ke great circle arc.
+    Site di permukaan; hiposenter di tengah rupture.
+    site_lon/site_lat skalar -> array (R,); array (K,) -> array (K, R).
+    """
+    scalar = np.ndim(site_lon) == 0
+    s, _, _ = _unit_vectors(np.atleast_1d(np.asarray(site_lon, dtype=float)),
+                            np.atleast_1d(np.asarray(site_lat, dtype=float)))   # (K, 3)
+
+    strike, dip = ruptures["strike"], np.radians(ruptures["dip"])
+    length, width, depth = ruptures["length"], ruptures["width"], ruptures["depth"]
+    width_h = width * np.cos(dip)
+    downdip = strike + 90.0
+
+    # sudut rupture: tl (awal top edge), tr, bl, br -> vektor satuan (R, 3)
+    tl, east, north = _unit_vectors(ruptures["lon"], ruptures["lat"])
+    tr = _point_at(tl, east, north, strike, length)
+    bl = _point_at(tl, east, north, downdip, width_h)
+    tr_lon, tr_lat = _to_lonlat(tr)
+    _, tr_east, tr_north = _unit_vectors(tr_lon, tr_lat)
+    br = _point_at(tr, tr_east, tr_north, downdip, width_h)
+    bl_lon, bl_lat = _to_lonlat(bl)
+
+    # --- rrup: bidang lewat sudut-sudut (kartesian 3D, km) ---
+    bottom = (EARTH_RADIUS - depth - width * np.sin(dip))[:, None]
+    top = (EARTH_RADIUS - depth)[:, None]
+    p_tl, p_tr, p_bl, p_br = tl * top, tr * top, bl * bottom, br * bottom
+    # basis bidang seperti OQ (uv1 searah strike, uv2 searah dip); rupture
+    # berukuran 0 memakai arah strike / dip di tl
+    dir_strike = north * np.cos(np.radians(strike))[:, None] + east * np.sin(np.radians(strike))[:, None]
+    dir_dip = (
+        (north * np.cos(np.radians(downdip))[:, None] + east * np.sin(np.radians(downdip))[:, None])
+        * np.cos(dip)[:, None] - tl * np.sin(dip)[:, None]
+    )
+
+    def _normalized(v: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+        norm = np.linalg.norm(v, axis=-1, keepdims=True)
+        return np.where(norm > 1e-9, v / np.where(norm > 1e-9, norm, 1.0), fallback)
+
+    uv1 = _normalized(p_tr - p_tl, dir_strike)
+    b = p_bl - p_tl
+    uv2 = _normalized(b - np.sum(b * uv1, axis=-1, keepdims=True) * uv1,
+                      dir_dip - np.sum(dir_dip * uv1, axis=-1, keepdims=True) * uv1)
+    normal = np.cross(uv1, uv2)
+    plen = 0.5 * (np.sum((p_tr - p_tl) * uv1, -1) + np.sum((p_br - p_bl) * uv1, -1))
+    pwid = 0.5 * (np.sum((p_bl - p_tl) * uv2, -1) + np.sum((p_br - p_tr) * uv2, -1))
+
+    rel_site = s * EARTH_RADIUS                            # (K, 3)
+    base = np.sum(p_tl * uv1, -1), np.sum(p_tl * uv2, -1), np.sum(p_tl * normal, -1)
+    xx = rel_site @ uv1.T - base[0]                        # (K, R)
+    yy = rel_site @ uv2.T - base[1]
+    zz = rel_site @ normal.T - base[2]
+    mxx = np.where(xx < 0, xx, np.where(xx > plen, xx - plen, 0.0))
+    myy = np.where(yy < 0, yy, np.where(yy > pwid, yy - pwid, 0.0))
+    rrup = np.sqrt(zz ** 2 + mxx ** 2 + myy ** 2)
+
+    # --- rx, ry0, rjb: jarak bertanda ke great circle arc di permukaan ---
+    def _to_arc(lon, lat, azimuth) -> np.ndarray:
+        return EARTH_RADIUS * np.arcsin(np.clip(s @ _arc_normal(lon, lat, azimuth).T, -1.0, 1.0))
+
+    d_top = _to_arc(ruptures["lon"], ruptures["lat"], strike)     # arc top edge (= rx)
+    d_bot = _to_arc(bl_lon, bl_lat, strike)                      # arc bottom edge
+    d_left = _to_arc(ruptures["lon"], ruptures["lat"], downdip)  # arc sisi kiri (lewat tl)
+    d_right = _to_arc(tr_lon, tr_lat, downdip)                   # arc sisi kanan (lewat tr)
+
+    same_lr = np.sign(d_left) == np.sign(d_right)
+    ry0 = np.where(same_lr, np.minimum(np.abs(d_left), np.abs(d_right)), 0.0)
+
+    same_tb = np.sign(d_top) == np.sign(d_bot)
+    # jarak chord ke sudut terdekat (proyeksi permukaan): |s - c| = R sqrt(2 (1 - s . c))
+    cos_corner = np.maximum.reduce([s @ tl.T, s @ tr.T, s @ bl.T, s @ br.T])
+    to_corner = EARTH_RADIUS * np.sqrt(np.maximum(2.0 * (1.0 - cos_corner), 0.0))
+    rjb = np.select(
+        [same_tb & same_lr, same_tb, same_lr],
+        [to_corner, np.minimum(np.abs(d_top), np.abs(d_bot)), np.minimum(np.abs(d_left), np.abs(d_right))],
+        default=0.0,
+    )
+
+    # --- hiposenter di tengah rupture ---
+    mid = _point_at(tl, east, north, strike, 0.5 * length)
+    mid_lon, mid_lat = _to_lonlat(mid)
+    _, mid_east, mid_north = _unit_vectors(mid_lon, mid_lat)
+    hypo = _point_at(mid, mid_east, mid_north, downdip, 0.5 * width_h)
+    repi = EARTH_RADIUS * np.arccos(np.clip(s @ hypo.T, -1.0, 1.0))
+    rhypo = np.hypot(repi, ruptures["hypo_depth"])
+
+    out = {"rrup": rrup, "rjb": rjb, "rx": d_top, "ry0": ry0, "rhypo": rhypo, "repi": repi}
+    return {k: v[0] for k, v in out.items()} if scalar else out
+
+
+def point_rupture_distances(rrup, hypo_depth) -> Dict[str, np.ndarray]:
+    """
+    Jarak pengganti kalau yang diketahui hanya rrup (mis. API skenario tunggal):
+    rupture dianggap titik di hypo_depth -> rhypo = rrup, rjb = repi dari
+    Pythagoras, site tepat di tegak lurus strike (rx = 0, ry0 = repi).
+    """
+    rrup = np.asarray(rrup, dtype=float)
+    repi = np.sqrt(np.maximum(rrup ** 2 - np.asarray(hypo_depth, dtype=float) ** 2, 0.0))
+    return {"rhypo": rrup, "rjb": repi, "repi": repi, "rx": np.zeros_like(repi), "ry0": repi}
@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 
 class LogicTreeGMPE:
@@ -20,3 +20,87 @@ class LogicTreeGMPE:
             y = g["func"](imls, **kwargs)
             combined += g["weight"] * y
         return combined
+
+
+# --------- logic tree umum (source model + GMPE) ----------
+class BranchSet:
+    """
+    Satu ketidakpastian (branch set) dengan cabang-cabang alternatif berbobot.
+    branches: list of {"id": ..., "weight": ..., "value": ...}
+    """
+
+    def __init__(self, name: str, branches: List[Dict]):
+        if not branches:
+            raise ValueError(f"Branch set '{name}' kosong.")
+        weights = np.array([float(b["weight"]) for b in branches], dtype=float)
+        if np.any(weights < 0) or weights.sum() <= 0:
+            raise ValueError(f"Bobot branch set '{name}' tidak valid.")
+        self.name = name
+        self.branches = branches
+        # bobot dinormalisasi supaya total 1 per branch set
+        self.weights = weights / weights.sum()
+
+    def __len__(self) -> int:
+        return len(self.branches)
+
+
+class LogicTree:
+    """
+    Logic tree = perkalian kartesius beberapa BranchSet.
+    Realisasi (path) direpresentasikan sebagai array indeks cabang (R, n_set)
+    + bobot path (R,), supaya kurva per path bisa dihitung dalam batch.
+    """
+
+    def __init__(self, branch_sets: List[BranchSet]):
+        self.branch_sets = branch_sets
+
+    @property
+    def n_paths(self) -> int:
+        return int(np.prod([len(bs) for bs in self.branch_sets], dtype=float))
+
+    def enumerate_paths(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Semua path (enumerasi penuh); bobot = perkalian bobot cabang."""
+        sizes = [len(bs) for bs in self.branch_sets]
+        if not sizes:
+            return np.zeros((1, 0), dtype=np.int64), np.ones(1)
+        choices = np.indices(sizes).reshape(len(sizes), -1).T
+        weights = np.ones(len(choices))
+        for k, bs in enumerate(self.branch_sets):
+            weights *= bs.weights[choices[:, k]]
+        return choices, weights
+
+    def sample_paths(self, n: int, seed: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Monte Carlo: tiap branch set diundi sesuai bobotnya (independen),
+        sehingga semua sampel berbobot sama 1/n.
+        """
+        rng = np.random.default_rng(seed)
+        choices = np.column_stack(
+            [rng.choice(len(bs), size=n, p=bs.weights) for bs in self.branch_sets]
+        ).astype(np.int64) if self.branch_sets else np.zeros((n, 0), dtype=np.int64)
+        return choices, np.full(n, 1.0 / n)
+
+    def paths(
+        self, max_paths: int = 1000, n_samples: int = 500, seed: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray, str]:
+        """Enumerasi kalau jumlah path <= max_paths, selain itu sampling Monte Carlo."""
+        if self.n_paths <= max_paths:
+            choices, weights = self.enumerate_paths()
+            return choices, weights, "enumeration"
+        choices, weights = self.sample_paths(n_samples, seed)
+        return choices, weights, "sampling"
+
+
+def weighted_quantile(values: np.ndarray, weights: np.ndarray, q: float) -> np.ndarray:
+    """
+    Kuantil berbobot sepanjang sumbu 0: values (R, ...) -> (...).
+    Interpolasi linear pada CDF bobot (konvensi kuantil kurva hazard OpenQuake).
+    """
+    order = np.argsort(values, axis=0)
+    sorted_vals = np.take_along_axis(values, order, axis=0)
+    cum = np.cumsum(np.asarray(weights, dtype=float)[order], axis=0)
+    cum = cum / cum[-1]
+    flat_vals = sorted_vals.reshape(len(values), -1)
+    flat_cum = cum.reshape(len(values), -1)
+    out = np.array([np.interp(q, flat_cum[:, j], flat_vals[:, j]) for j in range(flat_vals.shape[1])])
+    return out.reshape(values.shape[1:])
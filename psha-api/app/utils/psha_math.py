@@ -1,5 +1,13 @@
+from typing import Callable, Optional, Sequence, Tuple
+
 import numpy as np
 
+from app.core.imports import IMPORT_LOCK
+
+# NB: SciPy di-import di dalam fungsi (lazy, di bawah IMPORT_LOCK) supaya import app tetap murah;
+# app.core.warmup yang memuatnya lebih dulu.
+
+
 def dummy_gmpe(imls: np.ndarray, mag: float, dist: float, vs30: float, imt: str, **kwargs):
     """
     Dummy GMPE: prob_exceed = exp(-a * imls), hanya contoh
@@ -9,3 +17,234 @@ def dummy_gmpe(imls: np.ndarray, mag: float, dist: float, vs30: float, imt: str,
 
 def compute_hazard_curve(logic_tree, imls: np.ndarray, mag: float, dist: float, vs30: float, imt: str):
     return logic_tree.get_mean_hazard(imls, mag=mag, dist=dist, vs30=vs30, imt=imt)
+
+
+# --------- magnitude-frequency ----------
+def _mag_bins(lo_mag: float, hi_mag: float, bin_width: float) -> np.ndarray:
+    """
+    Titik tengah bin magnitudo seperti MFD OQ: lo_mag / hi_mag dibulatkan
+    (half-up, seperti python3compat.round OQ - bukan banker's rounding) ke
+    kelipatan bin_width, lalu titik tengah diakumulasi berurutan (m += bin_width)
+    supaya perbandingan batas (mis. char_mag - 0.25) sama persis dengan OQ.
+    """
+    if bin_width <= 0:
+        raise ValueError("bin_width harus > 0.")
+    lo_edge = np.floor(lo_mag / bin_width + 0.5) * bin_width
+    hi_edge = np.floor(hi_mag / bin_width + 0.5) * bin_width
+    if lo_edge == hi_edge:
+        return np.array([lo_edge])
+    steps = np.full(max(int(np.floor((hi_edge - lo_edge) / bin_width + 0.5)), 1), bin_width)
+    steps[0] = lo_edge + bin_width / 2.0
+    return np.add.accumulate(steps)
+
+
+def truncated_gr_rates(
+    min_mag: float,
+    max_mag: float,
+    beta: float,
+    rate: float,
+    bin_width: float = 0.1,
+):
+    """
+    Distribusi Gutenberg-Richter terpotong (Mmin..Mmax) dalam bin magnitudo,
+    sama dengan TruncatedGRMFD OpenQuake dengan a_val dari laju kontinu.
+    beta = b * ln(10); rate = laju tahunan kejadian M >= Mmin (GR terpotong).
+    Return: (mags, rates) -> titik tengah bin dan laju tahunan per bin.
+    """
+    if max_mag <= min_mag:
+        raise ValueError(f"max_mag ({max_mag}) harus > min_mag ({min_mag}).")
+    mags = _mag_bins(min_mag, max_mag, bin_width)
+
+    # N(M >= m) = A exp(-beta (m - Mmin)) - konstanta; A dari normalisasi GR terpotong
+    a = rate / (1.0 - np.exp(-beta * (max_mag - min_mag)))
+    lo, hi = mags - bin_width / 2.0, mags + bin_width / 2.0
+    rates = a * (np.exp(-beta * (lo - min_mag)) - np.exp(-beta * (hi - min_mag)))
+    return mags, rates
+
+
+def youngs_coppersmith_rates(
+    min_mag: float,
+    beta: float,
+    char_mag: float,
+    char_rate: float,
+    bin_width: float = 0.1,
+):
+    """
+    MFD karakteristik Youngs & Coppersmith (1985), sama dengan
+    YoungsCoppersmith1985MFD OpenQuake: kotak karakteristik lebar 0.5 berpusat di
+    char_mag dengan laju total char_rate, bagian eksponensial yang densitasnya
+    1 unit magnitudo di bawah kotak (char_mag - 1.25) sama dengan densitas kotak.
+    Binning mengikuti OQ (_mag_bins dari min_mag ke char_mag + 0.25); bin dengan
+    titik tengah < char_mag - 0.25 memakai bagian eksponensial, sisanya laju
+    kotak (char_rate / 0.5) * bin_width.
+    Return: (mags, rates) -> titik tengah bin dan laju tahunan per bin.
+    """
+    if not 0 < bin_width <= 0.5:
+        raise ValueError("bin_width harus di rentang (0, 0.5] untuk MFD karakteristik.")
+    m_char_lo = char_mag - 0.25
+    if m_char_lo < min_mag + bin_width:
+        raise ValueError(f"char_mag ({char_mag}) terlalu dekat dengan min_mag ({min_mag}).")
+    mags = _mag_bins(min_mag, char_mag + 0.25, bin_width)
+
+    # laju kumulatif bagian eksponensial N(m) = A exp(-beta (m - Mmin)),
+    # A dari syarat densitas di (char_mag - 1.25) = char_rate / 0.5
+    a = (char_rate / 0.5) / (beta * np.exp(-beta * (char_mag - 1.25 - min_mag)))
+    lo, hi = mags - bin_width / 2.0, mags + bin_width / 2.0
+    expo = a * (np.exp(-beta * (lo - min_mag)) - np.exp(-beta * (hi - min_mag)))
+    rates = np.where((mags >= min_mag) & (mags < m_char_lo), expo, (char_rate / 0.5) * bin_width)
+    return mags, rates
+
+
+# --------- exceedance kernel ----------
+def exceedance_probability(
+    mean: np.ndarray,
+    sigma: np.ndarray,
+    log_imls: np.ndarray,
+    truncation_level: Optional[float] = None,
+    dtype=np.float64,
+) -> np.ndarray:
+    """
+    P(ln IM > ln iml | skenario) untuk semua skenario x IML sekaligus (ufunc, tanpa loop).
+    mean/sigma: array (...,) di space ln; log_imls: (N,) -> hasil (..., N);
+    log_imls boleh (..., N) (grid per kurva) asalkan broadcast dengan mean[..., None].
+    truncation_level: truncation distribusi normal dalam jumlah sigma
+    (None -> tanpa truncation, 0 -> median saja / fungsi tangga), konvensi OpenQuake.
+    dtype: np.float32 untuk menghemat memori & bandwidth pada matriks besar.
+    """
+    with IMPORT_LOCK:
+        from scipy.special import ndtr
+
+    dtype = np.dtype(dtype)
+    mean = np.asarray(mean, dtype=dtype)[..., None]
+    sigma = np.asarray(sigma, dtype=dtype)[..., None]
+    # z = (ln iml - mean) / sigma, dikerjakan in-place di satu buffer (..., N)
+    z = np.subtract(np.asarray(log_imls, dtype=dtype), mean)
+    if truncation_level == 0:
+        return (z < 0).astype(dtype)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z /= sigma
+    if truncation_level is None:
+        np.negative(z, out=z)
+        return ndtr(z, out=z)
+
+    # normal terpotong di +-t: (Phi(t) - Phi(z)) / (Phi(t) - Phi(-t)), di-clip ke [0, 1]
+    phi_t = ndtr(dtype.type(truncation_level))
+    ndtr(z, out=z)
+    np.subtract(phi_t, z, out=z)
+    z /= 2.0 * phi_t - 1.0
+    return np.clip(z, 0.0, 1.0, out=z)
+
+
+def exceedance_rate(
+    mean: np.ndarray,
+    sigma: np.ndarray,
+    rate: np.ndarray,
+    log_imls: np.ndarray,
+    truncation_level: Optional[float] = None,
+    dtype=np.float64,
+) -> np.ndarray:
+    """
+    Laju tahunan exceedance: sum_s rate[..., s] * P(IM > iml | s).
+    mean/sigma/rate: (..., S) (rate di-broadcast) -> hasil (..., N), float64.
+    """
+    poe = exceedance_probability(mean, sigma, log_imls, truncation_level, dtype)
+    rate = np.broadcast_to(np.asarray(rate, dtype=dtype), poe.shape[:-1])
+    return np.einsum("...si,...s->...i", poe, rate).astype(float)
+
+
+# --------- return period ----------
+def iml_at_return_periods(
+    imls: np.ndarray, annual_rate: np.ndarray, return_periods: Sequence[float]
+) -> np.ndarray:
+    """
+    Interpolasi log-log banyak kurva hazard sekaligus pada laju 1/RP.
+    imls: (N,) atau (..., N); annual_rate: (..., N), turun seiring IML naik.
+    Return (..., R); RP di luar rentang kurva -> NaN.
+    """
+    log_lam = np.log(np.maximum(np.asarray(annual_rate, dtype=float), np.finfo(float).tiny))
+    log_imls = np.broadcast_to(np.log(np.asarray(imls, dtype=float)), log_lam.shape)
+    target = -np.log(np.asarray(return_periods, dtype=float))
+    n = log_lam.shape[-1]
+    if n < 2:
+        return np.full(log_lam.shape[:-1] + target.shape, np.nan)
+
+    # banyak titik dengan laju > target = ujung kanan segmen yang memotong target
+    hi = np.clip((log_lam[..., None, :] > target[:, None]).sum(axis=-1), 1, n - 1)
+    x0 = np.take_along_axis(log_lam, hi - 1, axis=-1)
+    x1 = np.take_along_axis(log_lam, hi, axis=-1)
+    y0 = np.take_along_axis(log_imls, hi - 1, axis=-1)
+    y1 = np.take_along_axis(log_imls, hi, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = np.where(x1 != x0, (target - x0) / (x1 - x0), 0.0)
+    inside = (target <= log_lam[..., :1]) & (target >= log_lam[..., -1:])
+    return np.where(inside, np.exp(y0 + frac * (y1 - y0)), np.nan)
+
+
+def iml_at_return_period(imls: np.ndarray, annual_rate: np.ndarray, return_period: float) -> float:
+    """
+    Interpolasi log-log kurva hazard (laju tahunan vs IML) pada laju 1/RP.
+    Di luar rentang kurva -> NaN.
+    """
+    return float(iml_at_return_periods(imls, annual_rate, [return_period])[0])
+
+
+# --------- grid IML adaptif ----------
+def log_iml_grid(min_iml: float, max_iml: float, n: int) -> np.ndarray:
+    """Grid IML log-spaced (g), min_iml..max_iml inklusif."""
+    return np.geomspace(min_iml, max_iml, n)
+
+
+def refine_iml_grid(
+    imls: np.ndarray,
+    annual_rate: np.ndarray,
+    return_periods: Sequence[float],
+    n_points: int = 4,
+    width: float = 0.1,
+) -> np.ndarray:
+    """
+    Titik IML tambahan di sekitar perpotongan kurva kasar dengan tiap 1/RP:
+    n_points titik log-spaced selebar +-width x langkah log grid kasar, berpusat
+    di IML hasil inversi kasar. RP di luar rentang kurva -> dipusatkan di ujung
+    grid yang terdekat (memperpanjang kurva ke arah target).
+    imls: (N,) log-spaced; annual_rate: (..., N) -> (..., R * n_points), belum urut.
+    """
+    imls = np.asarray(imls, dtype=float)
+    lam = np.asarray(annual_rate, dtype=float)
+    center = iml_at_return_periods(imls, lam, return_periods)
+    above = lam[..., -1:] >= 1.0 / np.asarray(return_periods, dtype=float)
+    center = np.where(np.isnan(center), np.where(above, imls[-1], imls[0]), center)
+
+    step = np.log(imls[-1] / imls[0]) / max(len(imls) - 1, 1)
+    offsets = width * step * (np.linspace(-1.0, 1.0, n_points) if n_points > 1 else np.zeros(1))
+    points = center[..., None] * np.exp(offsets)
+    return points.reshape(points.shape[:-2] + (-1,))
+
+
+def adaptive_hazard_curve(
+    rate_fn: Callable[[np.ndarray], np.ndarray],
+    return_periods: Sequence[float],
+    min_iml: float = 1e-3,
+    max_iml: float = 5.0,
+    n_coarse: int = 12,
+    n_refine: int = 4,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Kurva hazard dengan grid IML adaptif: rate_fn dievaluasi di grid kasar
+    log-spaced, lalu sekali lagi hanya di titik yang merapatkan grid di sekitar
+    perpotongan tiap return period.
+    rate_fn(log_imls) -> laju tahunan (..., N); log_imls (N,) untuk grid kasar
+    atau (..., P) per kurva untuk titik tambahan.
+    Return (imls, lam) berbentuk (..., n_coarse + R * n_refine), IML urut naik.
+    """
+    coarse = log_iml_grid(min_iml, max_iml, n_coarse)
+    lam_c = np.asarray(rate_fn(np.log(coarse)), dtype=float)
+    if not len(return_periods) or n_refine < 1:
+        return np.broadcast_to(coarse, lam_c.shape).copy(), lam_c
+
+    fine = refine_iml_grid(coarse, lam_c, return_periods, n_refine)
+    lam_f = np.asarray(rate_fn(np.log(fine)), dtype=float)
+
+    imls = np.concatenate([np.broadcast_to(coarse, lam_c.shape), fine], axis=-1)
+    lam = np.concatenate([lam_c, np.broadcast_to(lam_f, fine.shape)], axis=-1)
+    order = np.argsort(imls, axis=-1, kind="stable")
+    return np.take_along_axis(imls, order, axis=-1), np.take_along_axis(lam, order, axis=-1)
@@ -0,0 +1,81 @@
+from typing import List
+
+import numpy as np
+
+from app.core.imports import IMPORT_LOCK
+
+# NB: SciPy di-import di dalam method (lazy, di bawah IMPORT_LOCK) supaya import app tetap murah;
+# app.core.warmup yang memuatnya lebih dulu.
+
+# radius bumi (km), sama dengan EARTH_RADIUS di geometry
+EARTH_RADIUS_KM = 6371.0
+
+
+def to_xyz(lon, lat) -> np.ndarray:
+    """lon/lat (derajat) -> koordinat kartesius di permukaan bumi (km), (N, 3)."""
+    lon = np.radians(np.asarray(lon, dtype=float))
+    lat = np.radians(np.asarray(lat, dtype=float))
+    cos_lat = np.cos(lat)
+    return EARTH_RADIUS_KM * np.column_stack(
+        [cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)]
+    )
+
+
+def _chord(dist_km: float) -> float:
+    """Jarak great-circle -> jarak tali busur (yang dipakai KD-tree)."""
+    return 2.0 * EARTH_RADIUS_KM * np.sin(min(dist_km, np.pi * EARTH_RADIUS_KM) / (2.0 * EARTH_RADIUS_KM))
+
+
+class SourceIndex:
+    """
+    Index spasial sumber untuk memilih sumber yang cukup dekat ke tiap site
+    sebelum GMPE dievaluasi:
+    1. KD-tree atas pusat tiap sumber (+ radius lingkup) -> kandidat (site, sumber)
+    2. KD-tree atas vertex mesh tiap sumber -> jarak horizontal ke vertex terdekat
+    Jarak integrasi per sumber (dari TRT / mechanism) + margin (setengah diagonal
+    sel mesh) supaya tidak ada rupture dalam jarak integrasi yang terbuang.
+    """
+
+    def __init__(self, vertices: List[np.ndarray], max_distance: np.ndarray, margin: float = 0.0):
+        """
+        vertices: per sumber array (P, >=2) [lon, lat, ...]
+        max_distance: jarak integrasi per sumber (km)
+        """
+        with IMPORT_LOCK:
+            from scipy.spatial import cKDTree
+
+        self.n_sources = len(vertices)
+        self._trees = []
+        centers, reach = [], []
+        for v in vertices:
+            xyz = to_xyz(v[:, 0], v[:, 1])
+            c = xyz.mean(axis=0)
+            c = c * (EARTH_RADIUS_KM / max(np.linalg.norm(c), 1e-9))
+            self._trees.append(cKDTree(xyz))
+            centers.append(c)
+            reach.append(np.linalg.norm(xyz - c, axis=1).max())
+        self._centers = cKDTree(np.array(centers).reshape(-1, 3))
+        self._radius = np.array([_chord(d + margin) for d in np.asarray(max_distance, dtype=float)])
+        # jarak maksimum pusat sumber -> site yang masih mungkin relevan
+        self._reach = self._radius + np.array(reach)
+
+    def sources_within(self, lons, lats) -> np.ndarray:
+        """Mask (K, n_sumber): True kalau sumber ada dalam jarak integrasi site."""
+        with IMPORT_LOCK:
+            from scipy.spatial import cKDTree
+
+        xyz = to_xyz(np.atleast_1d(lons), np.atleast_1d(lats))
+        mask = np.zeros((len(xyz), self.n_sources), dtype=bool)
+        if not self.n_sources:
+            return mask
+
+        pairs = cKDTree(xyz).sparse_distance_matrix(
+            self._centers, self._reach.max(), output_type="ndarray"
+        )
+        pairs = pairs[pairs["v"] <= self._reach[pairs["j"]]]
+        pairs = pairs[np.argsort(pairs["j"], kind="stable")]
+        sources, starts = np.unique(pairs["j"], return_index=True)
+        for s, sites in zip(sources, np.split(pairs["i"], starts[1:])):
+            dist, _ = self._trees[s].query(xyz[sites], k=1)
+            mask[sites[dist <= self._radius[s]], s] = True
+        return mask
@@ -0,0 +1,63 @@
+import csv
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_COMMENT = ("#", "!", "//")
+# ekstensi file -> delimiter; selain ini = TXT legacy dipisah spasi / tab
+DELIMITERS = {".csv": ",", ".tsv": "\t"}
+
+
+def _rows(lines: Iterable[str], delimiter: Optional[str]) -> Iterator[Tuple[int, List[str]]]:
+    """(nomor baris, kolom) per baris data; baris kosong / komentar dilewati."""
+    def _clean():
+        for n, line in enumerate(lines, start=1):
+            text = line.strip()
+            if text and not text.startswith(_COMMENT):
+                yield n, line
+
+    if delimiter is None:
+        # TXT legacy: dipisah spasi / tab
+        for n, line in _clean():
+            yield n, line.split()
+        return
+    numbered = _clean()
+    current = [0]
+
+    def _text():
+        for n, line in numbered:
+            current[0] = n
+            yield line
+
+    for cols in csv.reader(_text(), delimiter=delimiter):
+        yield current[0], cols
+
+
+def normalize_column(name: str, aliases: Optional[Dict[str, str]] = None) -> str:
+    key = name.strip().lower().replace(" ", "_").replace("-", "_")
+    return (aliases or {}).get(key, key)
+
+
+def iter_records(
+    lines: Iterable[str],
+    delimiter: Optional[str] = None,
+    aliases: Optional[Dict[str, str]] = None,
+    names: Optional[List[str]] = None,
+) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """
+    Baca file tabel (baris pertama = header, kecuali `names` diisi untuk file
+    tanpa header) secara streaming -> (nomor baris, {kolom: nilai}); sel
+    kosong / "-" dilewati. Nama kolom dinormalisasi (huruf kecil, snake_case)
+    lalu dipetakan lewat aliases.
+    Baris dengan kolom lebih banyak dari header diberi key "_error".
+    """
+    rows = _rows(lines, delimiter)
+    if names is None:
+        header = next(rows, None)
+        if header is None:
+            return
+        names = header[1]
+    names = [normalize_column(c, aliases) for c in names]
+    for n, cols in rows:
+        rec = {k: v.strip() for k, v in zip(names, cols) if v.strip() not in ("", "-")}
+        if len(cols) > len(names):
+            rec["_error"] = f"{len(cols)} kolom, header hanya {len(names)}."
+        yield n, rec
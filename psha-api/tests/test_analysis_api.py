@@ -0,0 +1,115 @@
+import os
+import tempfile
+
+import pytest
+
+# konfigurasi minimal sebelum app di-import: SQLite sementara, tanpa pool proses
+_tmp = tempfile.mkdtemp(prefix="psha-test-")
+for key, value in {
+    "SECRET_KEY": "test",
+    "ALGORITHM": "HS256",
+    "DATABASE_URL": f"sqlite:///{os.path.join(_tmp, 'psha.db')}",
+    "GOOGLE_CLIENT_ID": "test",
+    "GOOGLE_CLIENT_SECRET": "test",
+    "GOOGLE_REDIRECT_URI": "http://localhost",
+    "GMPE_REGISTRY_DIR": os.path.join(_tmp, "registry"),
+    "COMPUTE_WORKERS": "0",
+}.items():
+    os.environ.setdefault(key, value)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import DataSource, DataSourceGMPE, Project, User  # noqa: E402
+from app.models.base import Base  # noqa: E402
+
+SITE = {"site_lat": -6.9, "site_lon": 107.6, "vs30": 400.0}
+
+
+@pytest.fixture(scope="module")
+def client():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        user = User(username="t", email="t@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        project = Project(name="p", user_id=user.id)
+        db.add(project)
+        db.commit()
+        ds = DataSource(
+            name="pt", mechanism="Active Shallow Crust", min_mag=5.0, max_mag=7.0,
+            gr_beta=2.3, gr_rate=0.02, coords_up=[{"lat": -6.8, "lon": 107.5, "depth": 10}],
+            project_id=project.id,
+        )
+        ds.gmpe_weights = [DataSourceGMPE(gmpe_name="ChiouYoungs2014", weight=1.0)]
+        db.add(ds)
+        db.commit()
+        ids = [ds.id]
+    yield TestClient(app), ids
+    Base.metadata.drop_all(engine)
+
+
+@pytest.mark.parametrize("imt", ["SA(20.0)", "SA(0)"])
+def test_unsupported_period_returns_400(client, imt):
+    c, ids = client
+    r = c.post("/api/v1/analysis/", json={"datasource_ids": ids, "imt": imt, "return_periods": [475], **SITE})
+    assert r.status_code == 400
+    assert "tidak didukung" in r.json()["detail"]
+
+
+def test_unsupported_period_multi_stream_returns_400(client):
+    c, ids = client
+    sites = [{"lat": SITE["site_lat"], "lon": SITE["site_lon"], "vs30": SITE["vs30"]}]
+    body = {"datasource_ids": ids, "imt": "SA(20.0)", "return_periods": [475], "sites": sites}
+    for path in ("/api/v1/analysis/multi", "/api/v1/analysis/multi/stream"):
+        assert c.post(path, json=body).status_code == 400
+
+
+def test_supported_period_still_runs(client):
+    c, ids = client
+    r = c.post("/api/v1/analysis/", json={"datasource_ids": ids, "imt": "SA(1.0)", "return_periods": [475], **SITE})
+    assert r.status_code == 200
+
+
+def test_pgv_adaptive_grid_in_cm_per_s(client):
+    # grid adaptif default dalam g (<= 5); PGV dalam cm/s harus tetap berpotongan dengan 1/RP
+    c, ids = client
+    r = c.post("/api/v1/analysis/", json={"datasource_ids": ids, "imt": "PGV", "return_periods": [475, 2475], **SITE})
+    ivs = [p["iml"] for p in r.json()["iml_at_return_periods"]]
+    assert None not in ivs
+    assert 5.0 < ivs[0] < ivs[1]
+
+
+def test_uhs_matches_single_imt_analyses(client):
+    # satu pass multi-IMT harus sama dengan analisis per IMT di grid adaptif yang sama
+    c, ids = client
+    rps = [475, 2475]
+    imts = ["PGA", "SA(0.2)", "SA(1.0)"]
+    r = c.post("/api/v1/analysis/uhs", json={"datasource_ids": ids, "imts": imts, "return_periods": rps, **SITE})
+    assert r.status_code == 200
+    uhs = r.json()
+    assert set(uhs["curves"]) == set(imts)
+    assert [s["return_period"] for s in uhs["spectra"]] == rps
+
+    for k, imt in enumerate(imts):
+        single = c.post(
+            "/api/v1/analysis/", json={"datasource_ids": ids, "imt": imt, "return_periods": rps, **SITE}
+        ).json()
+        expected = [p["iml"] for p in single["iml_at_return_periods"]]
+        assert None not in expected
+        got = [s["points"][k] for s in uhs["spectra"]]
+        assert all(p["imt"] == imt for p in got)
+        assert [p["iml"] for p in got] == pytest.approx(expected, rel=1e-9)
+    assert [p["period"] for p in uhs["spectra"][0]["points"]] == [0.0, 0.2, 1.0]
+
+
+def test_uhs_unsupported_period_returns_400(client):
+    c, ids = client
+    r = c.post(
+        "/api/v1/analysis/uhs",
+        json={"datasource_ids": ids, "imts": ["PGA", "SA(20.0)"], "return_periods": [475], **SITE},
+    )
+    assert r.status_code == 400
+    assert "SA(20.0)" in r.json()["detail"]
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from openquake.hazardlib.calc.disagg import uniform_bins
+
+from app.utils.disagg import add_histogram, bin_centers, bin_edges, bin_index, histogram_mode
+
+
+@pytest.mark.parametrize("max_dist,width", [(200.0, 10.0), (300.0, 20.0), (250.0, 7.5)])
+def test_distance_edges_match_openquake_uniform_bins(max_dist, width):
+    np.testing.assert_allclose(bin_edges(0.0, max_dist, width), uniform_bins(0.0, max_dist, width))
+
+
+@pytest.mark.parametrize("min_mag,max_mag,width", [(5.05, 7.25, 0.1), (4.55, 8.05, 0.2), (5.12, 6.97, 0.25)])
+def test_magnitude_edges_match_openquake(min_mag, max_mag, width):
+    # aturan mag_edges di openquake.hazardlib.calc.disagg._build_bin_edges
+    n1, n2 = int(np.floor(min_mag / width)), int(np.ceil(max_mag / width))
+    np.testing.assert_allclose(bin_edges(min_mag, max_mag, width), width * np.arange(n1, n2 + 1))
+
+
+def test_bin_index_matches_digitize_and_clips_outside():
+    edges = bin_edges(0.0, 100.0, 10.0)
+    values = np.array([-5.0, 0.0, 9.99, 10.0, 55.0, 99.9, 100.0, 150.0, np.nan])
+    idx = bin_index(values, edges)
+    inside = (values >= edges[0]) & (values < edges[-1])
+    np.testing.assert_array_equal(idx[inside], np.digitize(values[inside], edges) - 1)
+    assert idx[0] == 0 and idx[-3] == idx[-2] == len(edges) - 2
+    assert 0 <= idx[-1] <= len(edges) - 2
+
+
+def test_add_histogram_matches_add_at_and_histogramdd():
+    rng = np.random.default_rng(5)
+    mag_edges, dist_edges, eps_edges = bin_edges(5.0, 7.5, 0.25), bin_edges(0.0, 200.0, 20.0), np.arange(-3.0, 4.0)
+    n_sites, n_scen = 3, 500
+    mags = rng.uniform(5.0, 7.5, n_scen)
+    dists = rng.uniform(0.0, 200.0, (n_sites, n_scen))
+    eps = rng.normal(0.0, 1.2, (n_sites, n_scen))
+    weights = rng.uniform(0.0, 1e-3, (n_sites, n_scen))
+
+    shape = (n_sites, len(mag_edges) - 1, len(dist_edges) - 1, len(eps_edges) - 1)
+    hist = np.zeros(shape)
+    index = (np.arange(n_sites)[:, None], bin_index(mags, mag_edges)[None, :],
+             bin_index(dists, dist_edges), bin_index(eps, eps_edges))
+    add_histogram(hist, index, weights)
+
+    ref = np.zeros(shape)
+    np.add.at(ref, tuple(np.broadcast_to(i, weights.shape) for i in index), weights)
+    np.testing.assert_allclose(hist, ref, rtol=1e-12)
+    np.testing.assert_allclose(hist.sum(), weights.sum(), rtol=1e-12)
+
+    # eps di dalam rentang: sama dengan histogramdd per site
+    for k in range(n_sites):
+        keep = (eps[k] >= eps_edges[0]) & (eps[k] < eps_edges[-1])
+        dd, _ = np.histogramdd(
+            np.column_stack([mags[keep], dists[k, keep], eps[k, keep]]),
+            bins=[mag_edges, dist_edges, eps_edges], weights=weights[k, keep],
+        )
+        inner = np.zeros(shape[1:])
+        np.add.at(inner, (index[1][0, keep], index[2][k, keep], index[3][k, keep]), weights[k, keep])
+        np.testing.assert_allclose(inner, dd, rtol=1e-12, atol=1e-18)
+
+
+def test_histogram_mode():
+    centers = [bin_centers(np.array([5.0, 6.0, 7.0])), bin_centers(np.array([0.0, 50.0, 100.0]))]
+    hist = np.zeros((2, 2, 2))
+    hist[0, 1, 0] = 3.0
+    hist[0, 0, 1] = 1.0
+    np.testing.assert_allclose(histogram_mode(hist, centers)[0], [6.5, 25.0])
+    assert np.isnan(histogram_mode(hist, centers)[1]).all()
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from openquake.hazardlib.geo import Mesh, PlanarSurface, Point
+
+from app.utils.geometry import fault_surface, floating_ruptures, rupture_distances
+
+
+def _oq_surface(lon, lat, depth, strike, dip, length, width):
+    """PlanarSurface OQ dari parameter yang sama dengan rupture kita."""
+    tl = Point(lon, lat, depth)
+    tr = tl.point_at(length, 0.0, strike)
+    hor, ver = width * np.cos(np.radians(dip)), width * np.sin(np.radians(dip))
+    return PlanarSurface.from_corner_points(
+        tl, tr, tr.point_at(hor, ver, strike + 90.0), tl.point_at(hor, ver, strike + 90.0)
+    )
+
+
+def _oq_distances(surface, lons, lats):
+    mesh = Mesh(lons, lats)
+    return {
+        "rrup": surface.get_min_distance(mesh),
+        "rjb": surface.get_joyner_boore_distance(mesh),
+        "rx": surface.get_rx_distance(mesh),
+        "ry0": surface.get_ry0_distance(mesh),
+    }
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_planar_distances_match_openquake(seed):
+    rng = np.random.default_rng(seed)
+    n = 8
+    rup = {
+        "lon": rng.uniform(95.0, 140.0, n),
+        "lat": rng.uniform(-10.0, 5.0, n),
+        "depth": rng.uniform(0.0, 15.0, n),
+        "strike": rng.uniform(0.0, 360.0, n),
+        "dip": rng.uniform(15.0, 90.0, n),
+        "length": rng.uniform(5.0, 80.0, n),
+        "width": rng.uniform(3.0, 30.0, n),
+    }
+    rup["hypo_depth"] = rup["depth"] + 0.5 * rup["width"] * np.sin(np.radians(rup["dip"]))
+    lons = rup["lon"][0] + rng.uniform(-1.5, 1.5, 40)
+    lats = rup["lat"][0] + rng.uniform(-1.5, 1.5, 40)
+
+    ours = rupture_distances(lons, lats, rup)
+    for r in range(n):
+        surface = _oq_surface(*(rup[k][r] for k in ("lon", "lat", "depth", "strike", "dip", "length", "width")))
+        for name, ref in _oq_distances(surface, lons, lats).items():
+            np.testing.assert_allclose(ours[name][:, r], ref, atol=1e-6, err_msg=name)
+
+
+def test_floating_ruptures_distances_match_openquake():
+    surface = fault_surface(
+        [{"lon": 110.0, "lat": -7.0, "depth": 2.0}, {"lon": 110.5, "lat": -6.7, "depth": 2.0}],
+        [{"lon": 110.1, "lat": -7.15, "depth": 20.0}, {"lon": 110.6, "lat": -6.85, "depth": 20.0}],
+        spacing=2.0,
+    )
+    rup = floating_ruptures(surface, np.array([5.5, 6.5, 7.0]))
+    rng = np.random.default_rng(1)
+    lons, lats = rng.uniform(109.0, 112.0, 50), rng.uniform(-8.0, -6.0, 50)
+
+    ours = rupture_distances(lons, lats, rup)
+    for r in (0, len(rup["lon"]) // 2, len(rup["lon"]) - 1):
+        oq = _oq_surface(*(rup[k][r] for k in ("lon", "lat", "depth", "strike", "dip", "length", "width")))
+        for name, ref in _oq_distances(oq, lons, lats).items():
+            np.testing.assert_allclose(ours[name][:, r], ref, atol=1e-6, err_msg=name)
+
+
+def test_scalar_site_returns_per_rupture_arrays():
+    rup = {k: np.array([v], dtype=float) for k, v in dict(
+        lon=110.0, lat=-7.0, depth=10.0, strike=45.0, dip=90.0, length=0.0, width=0.0, hypo_depth=10.0,
+    ).items()}
+    out = rupture_distances(110.0, -7.0, rup)
+    assert out["rrup"].shape == (1,)
+    np.testing.assert_allclose([out["rrup"][0], out["rjb"][0], out["rhypo"][0]], [10.0, 0.0, 10.0], atol=1e-9)
@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+import pytest
+from openquake.hazardlib.gsim.sadigh_1997 import SadighEtAl1997
+from openquake.hazardlib.imt import PGA
+
+from app.services import gmpe_native
+from app.services.gmpe_service import evaluate_gmpe_imts
+from app.utils.coeff_table import CoefficientTable
+
+IMTS = ["PGA", "SA(0.1)", "SA(0.25)", "SA(1.0)", "SA(2.5)"]
+COLUMNS = ["c1", "c2", "c3", "c4", "c5", "c6", "c7", "sigma"]
+
+
+def _sadigh_table(coeffs) -> CoefficientTable:
+    """Tabel DB dari koefisien batuan SadighEtAl1997 OQ; sigma = maxsigma (M besar)."""
+    imts = [PGA()] + sorted(coeffs.sa_coeffs, key=lambda imt: imt.period)
+    values = [
+        [coeffs[imt][f"c{i}"] for i in range(1, 8)] + [SadighEtAl1997.COEFFS_ROCK_STDDERR[imt]["maxsigma"]]
+        for imt in imts
+    ]
+    return CoefficientTable(COLUMNS, [imt.period for imt in imts], np.array(values))
+
+
+@pytest.fixture
+def native_sadigh(monkeypatch):
+    def _install(coeffs):
+        entry = (_sadigh_table(coeffs), "sadigh1997", time.monotonic())
+        monkeypatch.setitem(gmpe_native._tables, "sadigh_test", entry)
+        return "db:sadigh_test"
+    return _install
+
+
+@pytest.mark.parametrize("coeffs,mags", [
+    (SadighEtAl1997.COEFFS_ROCK_LOWMAG, np.array([4.5, 5.0, 5.7, 6.5])),
+    (SadighEtAl1997.COEFFS_ROCK_HIMAG, np.array([6.6, 7.0, 7.5, 8.0])),
+])
+def test_native_sadigh_matches_openquake(native_sadigh, coeffs, mags):
+    code = native_sadigh(coeffs)
+    mag = mags[:, None]
+    rrup = np.array([1.0, 5.0, 20.0, 75.0, 200.0])[None, :]
+    mean, sigma = evaluate_gmpe_imts(code, IMTS, mag, rrup, 760.0, memoize=False)
+    ref_mean, ref_sigma = evaluate_gmpe_imts("SadighEtAl1997", IMTS, mag, rrup, 760.0, memoize=False)
+
+    assert mean.shape == ref_mean.shape == (len(IMTS),) + np.broadcast_shapes(mag.shape, rrup.shape)
+    np.testing.assert_allclose(mean, ref_mean, rtol=1e-6, atol=1e-9)
+    # sigma OQ bergantung magnitudo; sama dengan maxsigma di atas maxmag
+    big = (mag > 7.21)[..., 0]
+    if big.any():
+        np.testing.assert_allclose(sigma[:, big], ref_sigma[:, big], rtol=1e-9)
+
+
+def test_unknown_form_is_rejected():
+    with pytest.raises(ValueError):
+        gmpe_native.check_form("nope", COLUMNS)
+    with pytest.raises(ValueError):
+        gmpe_native.check_form("sadigh1997", COLUMNS[:-1])
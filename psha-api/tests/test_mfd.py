@@ -0,0 +1,55 @@
+import itertools
+
+import numpy as np
+import pytest
+from openquake.hazardlib.mfd import TruncatedGRMFD, YoungsCoppersmith1985MFD
+
+from app.utils.psha_math import truncated_gr_rates, youngs_coppersmith_rates
+
+LN10 = np.log(10.0)
+
+
+def _assert_same_mfd(mags, rates, reference):
+    ref = np.array(reference)
+    assert len(mags) == len(ref)
+    np.testing.assert_array_equal(mags, ref[:, 0])
+    np.testing.assert_allclose(rates, ref[:, 1], rtol=1e-9, atol=0.0)
+
+
+@pytest.mark.parametrize(
+    "min_mag,max_mag,b_val,bin_width",
+    list(itertools.product([4.5, 4.95, 5.05, 5.12], [6.55, 7.0, 7.33, 8.1], [0.8, 1.0], [0.05, 0.1, 0.2])),
+)
+def test_truncated_gr_matches_openquake(min_mag, max_mag, b_val, bin_width):
+    rate, beta = 0.05, b_val * LN10
+    mags, rates = truncated_gr_rates(min_mag, max_mag, beta, rate, bin_width)
+    # a_val OQ (log10 N(M >= 0)) dari laju GR terpotong M >= min_mag
+    a_val = np.log10(rate / (1.0 - np.exp(-beta * (max_mag - min_mag)))) + b_val * min_mag
+    ref = TruncatedGRMFD(min_mag, max_mag, bin_width, a_val, b_val).get_annual_occurrence_rates()
+    _assert_same_mfd(mags, rates, ref)
+
+
+@pytest.mark.parametrize(
+    "min_mag,b_val,char_mag,char_rate,bin_width",
+    [
+        (5.0, 1.0, 7.0, 0.005, 0.1),
+        (5.05, 0.9, 6.83, 0.002, 0.1),
+        (4.5, 1.1, 7.4, 0.01, 0.2),
+        (5.0, 0.8, 7.0, 0.003, 0.05),
+        (5.0, 1.0, 6.9, 0.004, 0.1),
+        (4.95, 1.0, 7.25, 0.003, 0.1),
+    ],
+)
+def test_youngs_coppersmith_matches_openquake(min_mag, b_val, char_mag, char_rate, bin_width):
+    mags, rates = youngs_coppersmith_rates(min_mag, b_val * LN10, char_mag, char_rate, bin_width)
+    ref = YoungsCoppersmith1985MFD(min_mag, b_val, char_mag, char_rate, bin_width).get_annual_occurrence_rates()
+    _assert_same_mfd(mags, rates, ref)
+
+
+def test_invalid_mfd_parameters():
+    with pytest.raises(ValueError):
+        truncated_gr_rates(7.0, 6.0, LN10, 0.05)
+    with pytest.raises(ValueError):
+        youngs_coppersmith_rates(5.0, LN10, 5.2, 0.01)
+    with pytest.raises(ValueError):
+        youngs_coppersmith_rates(5.0, LN10, 7.0, 0.01, bin_width=1.0)
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from openquake.hazardlib.probability_map import compute_hazard_maps
+from openquake.hazardlib.stats import truncnorm_sf
+from scipy.special import ndtr
+from scipy.stats import norm
+
+from app.utils.psha_math import (
+    adaptive_hazard_curve,
+    exceedance_probability,
+    exceedance_rate,
+    iml_at_return_period,
+    iml_at_return_periods,
+)
+
+
+def _scenarios(seed=0, n=30):
+    rng = np.random.default_rng(seed)
+    return rng.normal(-2.0, 1.0, n), rng.uniform(0.3, 0.9, n), rng.uniform(1e-5, 1e-2, n)
+
+
+# --------- exceedance kernel ----------
+@pytest.mark.parametrize("truncation_level", [1.0, 2.5, 3.0])
+def test_truncated_exceedance_matches_openquake(truncation_level):
+    mean, sigma, _ = _scenarios()
+    log_imls = np.log(np.geomspace(1e-3, 3.0, 25))
+    poe = exceedance_probability(mean, sigma, log_imls, truncation_level)
+    z = (log_imls[None, :] - mean[:, None]) / sigma[:, None]
+    np.testing.assert_allclose(poe, truncnorm_sf(ndtr(truncation_level), z), rtol=1e-12, atol=1e-15)
+
+
+def test_untruncated_and_step_exceedance():
+    mean, sigma, _ = _scenarios(1)
+    log_imls = np.log(np.geomspace(1e-3, 3.0, 25))
+    poe = exceedance_probability(mean, sigma, log_imls)
+    np.testing.assert_allclose(poe, norm.sf(log_imls, mean[:, None], sigma[:, None]), rtol=1e-12, atol=1e-15)
+    step = exceedance_probability(mean, sigma, log_imls, truncation_level=0)
+    np.testing.assert_array_equal(step, (log_imls[None, :] < mean[:, None]).astype(float))
+
+
+def test_float32_kernel_close_to_float64():
+    mean, sigma, rate = _scenarios(2)
+    log_imls = np.log(np.geomspace(1e-3, 3.0, 25))
+    lam64 = exceedance_rate(mean, sigma, rate, log_imls, 3.0)
+    lam32 = exceedance_rate(mean, sigma, rate, log_imls, 3.0, dtype=np.float32)
+    np.testing.assert_allclose(lam32, lam64, rtol=1e-4, atol=1e-12)
+
+
+# --------- grid IML adaptif ----------
+def test_adaptive_grid_matches_dense_inversion():
+    mean, sigma, rate = _scenarios(3, 200)
+    mean = np.stack([mean - 1.5, mean - 1.0])  # dua kurva sekaligus
+    return_periods = [100.0, 475.0, 2475.0]
+
+    def rate_fn(log_imls):
+        # grid bersama (N,) / grid per kurva (2, P) -> sisipkan sumbu skenario
+        return exceedance_rate(mean, sigma, rate, log_imls[..., None, :], 3.0)
+
+    imls, lam = adaptive_hazard_curve(rate_fn, return_periods, n_coarse=12, n_refine=4)
+    assert imls.shape == lam.shape == (2, 12 + 3 * 4)
+    assert np.all(np.diff(imls, axis=-1) >= 0)
+
+    dense = np.geomspace(1e-3, 5.0, 4000)
+    lam_dense = rate_fn(np.log(dense))
+    for c in range(2):
+        for rp in return_periods:
+            # referensi: interpolasi log-log di grid rapat
+            ref = np.exp(np.interp(-np.log(rp), np.log(lam_dense[c][::-1]), np.log(dense[::-1])))
+            got = np.exp(np.interp(-np.log(rp), np.log(lam[c][::-1]), np.log(imls[c][::-1])))
+            assert got == pytest.approx(ref, rel=2e-3)
+
+
+# --------- return period ----------
+def test_return_period_inversion_matches_openquake_hazard_maps():
+    mean, sigma, rate = _scenarios(4, 100)
+    imls = np.geomspace(1e-3, 5.0, 30)
+    curves = exceedance_rate(np.stack([mean, mean - 0.8, mean + 0.4]), sigma, rate, np.log(imls), 3.0)
+    return_periods = np.array([50.0, 100.0, 475.0, 975.0, 2475.0])
+
+    got = iml_at_return_periods(imls, curves, return_periods)
+    ref = compute_hazard_maps(curves, imls, 1.0 / return_periods)
+    inside = (1.0 / return_periods <= curves[:, :1]) & (1.0 / return_periods >= curves[:, -1:])
+    assert inside.any()
+    np.testing.assert_allclose(got[inside], ref[inside], rtol=1e-10)
+    # di luar rentang kurva: NaN (OQ memotong ke 0 / IML terakhir)
+    assert np.isnan(got[~inside]).all()
+    assert iml_at_return_period(imls, curves[0], 475.0) == pytest.approx(got[0, 2], nan_ok=True)
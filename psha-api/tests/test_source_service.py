@@ -0,0 +1,27 @@
+import numpy as np
+
+from app.models.datasource import DataSource
+from app.services import source_service
+
+
+def _fault(ds_id):
+    return DataSource(
+        id=ds_id, dip_angle=60, strike_angle=75,
+        coords_up=[{"lat": -6.9, "lon": 107.5, "depth": 0}, {"lat": -6.8, "lon": 107.9, "depth": 0}],
+        coords_down=[{"lat": -7.0, "lon": 107.52, "depth": 15}, {"lat": -6.9, "lon": 107.92, "depth": 15}],
+    )
+
+
+def test_rupture_sets_per_source_are_bounded():
+    ds = _fault(-101)
+    source_service.invalidate_source(ds.id)
+    first = source_service.source_ruptures(ds, np.array([5.05, 5.15]))
+    assert source_service.source_ruptures(ds, np.array([5.05, 5.15])) is first
+
+    # MFD diedit berkali-kali -> set rupture lama tergusur, bukan menumpuk
+    for k in range(3 * source_service.RUPTURE_SETS_PER_SOURCE):
+        source_service.source_ruptures(ds, np.array([5.05 + 0.01 * k, 6.0]))
+    cached = source_service._entry(ds, source_service.MESH_SPACING_KM)["ruptures"]
+    assert len(cached) == source_service.RUPTURE_SETS_PER_SOURCE
+    assert source_service.source_ruptures(ds, np.array([5.05, 5.15])) is not first
+    source_service.invalidate_source(ds.id)
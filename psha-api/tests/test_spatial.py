@@ -0,0 +1,38 @@
+import numpy as np
+from openquake.hazardlib.geo.geodetic import geodetic_distance
+
+from app.utils.spatial import SourceIndex
+
+
+def _random_sources(rng, n):
+    """Sumber acak: garis / poligon kecil dengan beberapa vertex."""
+    out = []
+    for _ in range(n):
+        lon0, lat0 = rng.uniform(100.0, 120.0), rng.uniform(-10.0, 3.0)
+        p = rng.integers(1, 12)
+        out.append(np.column_stack([lon0 + rng.uniform(-0.8, 0.8, p), lat0 + rng.uniform(-0.8, 0.8, p)]))
+    return out
+
+
+def test_sources_within_matches_brute_force_geodetic():
+    rng = np.random.default_rng(7)
+    vertices = _random_sources(rng, 40)
+    max_distance = rng.uniform(50.0, 300.0, len(vertices))
+    margin = 2.5
+    lons, lats = rng.uniform(98.0, 122.0, 300), rng.uniform(-12.0, 5.0, 300)
+
+    mask = SourceIndex(vertices, max_distance, margin=margin).sources_within(lons, lats)
+
+    for s, v in enumerate(vertices):
+        # great-circle ke vertex terdekat (min_geodetic_distance OQ memakai tali busur)
+        dist = geodetic_distance(v[:, 0, None], v[:, 1, None], lons, lats).min(axis=0)
+        limit = max_distance[s] + margin
+        decided = np.abs(dist - limit) > 1e-6  # abaikan pasangan tepat di batas
+        np.testing.assert_array_equal(mask[decided, s], dist[decided] <= limit)
+
+
+def test_sources_within_empty_and_scalar_site():
+    assert SourceIndex([], np.array([])).sources_within([110.0], [-7.0]).shape == (1, 0)
+    index = SourceIndex([np.array([[110.0, -7.0]])], np.array([100.0]))
+    assert index.sources_within(110.5, -7.0).tolist() == [[True]]
+    assert index.sources_within(112.0, -7.0).tolist() == [[False]]
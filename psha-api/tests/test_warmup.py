@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from app.core import warmup
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_warmup_and_first_request_import_openquake_concurrently():
+    # interpreter baru: OpenQuake belum termuat, warm-up dan request berebut import
+    script = textwrap.dedent("""
+        import threading
+        import numpy as np
+        from app.core.warmup import warmup_openquake
+
+        errors = []
+
+        def request():
+            try:
+                from app.services.gmpe_service import evaluate_gmpe_imts
+                evaluate_gmpe_imts("ChiouYoungs2014", ["PGA"], np.array([6.0]), np.array([20.0]), 760.0,
+                                   memoize=False)
+            except Exception as e:
+                errors.append(repr(e))
+
+        threads = [threading.Thread(target=warmup_openquake)] + [threading.Thread(target=request) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert not errors, errors
+    """)
+    proc = subprocess.run([sys.executable, "-c", script], cwd=APP_DIR, capture_output=True, text=True, timeout=300)
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+
+def test_failed_stage_is_retried(monkeypatch):
+    monkeypatch.setattr(warmup, "WARMUP_RETRY_DELAY", 0.0)
+    monkeypatch.setitem(warmup._status, "compute_pool", False)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RuntimeError("belum siap")
+
+    assert warmup._run_stage("compute_pool", flaky)
+    assert len(calls) == 3
+    assert warmup.readiness()["checks"]["compute_pool"] is True
+    assert "compute_pool" not in warmup.readiness()["errors"]
+
+
+def test_readiness_rechecks_failed_openquake_stage(monkeypatch):
+    monkeypatch.setattr(warmup, "OPENQUAKE_MODULES", ("json",))
+    monkeypatch.setitem(warmup._status, "openquake", False)
+    monkeypatch.setitem(warmup._errors, "openquake", "ImportError: circular import")
+    assert warmup.readiness()["checks"]["openquake"] is True
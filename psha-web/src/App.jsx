@@ -87,10 +87,18 @@ export default function App({ activeTab, setActiveTab }) {
 useEffect(() => {
   const fetchDatasources = async () => {
     try {
-      const res = await fetch(`${API_URL}/datasource/`);
-      if (!res.ok) throw new Error(`Fetch datasource status: ${res.status}`);
-      const data = await res.json();
-      setDatasources(Array.isArray(data) ? data : data.data || []);
+      // endpoint dipaginasi (keyset): ikuti header X-Next-Cursor sampai habis
+      const all = [];
+      let cursor = null;
+      do {
+        const qs = cursor ? `?after_id=${cursor}` : "";
+        const res = await fetch(`${API_URL}/datasource/${qs}`);
+        if (!res.ok) throw new Error(`Fetch datasource status: ${res.status}`);
+        const data = await res.json();
+        all.push(...(Array.isArray(data) ? data : data.data || []));
+        cursor = res.headers.get("X-Next-Cursor");
+      } while (cursor);
+      setDatasources(all);
     } catch (err) {
       console.error("Gagal fetch datasources:", err);
       setDatasources([]);